@@ -0,0 +1,111 @@
+"""
+SeasonCredit v2 — Running Portfolio Aggregates
+Updated on every onboard / add-user write so /api/dataset-stats is O(1);
+reconcile() periodically rebuilds them from the database to absorb writes
+made by other workers or directly in Supabase.
+"""
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+DEFAULT_SCORE   = 77        # same fallbacks the stats endpoint always used
+DEFAULT_REVENUE = 1500000
+
+def _bucket() -> dict:
+    return {"count": 0, "score_sum": 0.0, "eligible": 0, "revenue_sum": 0.0}
+
+def _summary(b: dict) -> dict:
+    n = b["count"]
+    return {"count": n,
+            "avg_season_score": round(b["score_sum"] / n, 1) if n else None,
+            "eligible_rate": round(b["eligible"] / n, 3) if n else None,
+            "avg_annual_rev": round(b["revenue_sum"] / n) if n else None}
+
+class RunningStats:
+    SEGMENTS = ("business_type", "city")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+        self.reconciled_at = None
+        self.reconcile_ms  = None
+
+    def _reset(self):
+        self.total   = _bucket()
+        self.by      = {seg: {} for seg in self.SEGMENTS}
+        self.contrib = {}   # id → (score, revenue, business_type, city)
+
+    @staticmethod
+    def _row(u: dict) -> tuple:
+        score = u.get("season_score")
+        rev   = u.get("annual_revenue")
+        return (DEFAULT_SCORE if score is None else float(score),
+                DEFAULT_REVENUE if rev is None else float(rev),
+                u.get("business_type") or "unknown",
+                u.get("city") or "unknown")
+
+    def _apply(self, c: tuple, sign: int):
+        score, rev, btype, city = c
+        for b in (self.total,
+                  self.by["business_type"].setdefault(btype, _bucket()),
+                  self.by["city"].setdefault(city, _bucket())):
+            b["count"]       += sign
+            b["score_sum"]   += sign * score
+            b["eligible"]    += sign * (score >= 50)
+            b["revenue_sum"] += sign * rev
+        for seg, key in (("business_type", btype), ("city", city)):
+            if self.by[seg][key]["count"] == 0:
+                del self.by[seg][key]
+
+    def add(self, u: dict):
+        """Insert or update one user (idempotent per id)"""
+        c = self._row(u)
+        with self.lock:
+            old = self.contrib.get(u["id"])
+            if old == c: return
+            if old: self._apply(old, -1)
+            self._apply(c, +1)
+            self.contrib[u["id"]] = c
+
+    def reconcile(self, rows: Iterable[dict], keep: Optional[set] = None):
+        """
+        Rebuild from a full pass over the database. Ids in `keep` (written
+        here but not flushed yet) carry over from the running totals.
+        """
+        t0    = time.perf_counter()
+        fresh = RunningStats()
+        for u in rows:
+            fresh.add(u)
+        with self.lock:
+            for uid in (keep or set()):
+                if uid in self.contrib and uid not in fresh.contrib:
+                    fresh._apply(self.contrib[uid], +1)
+                    fresh.contrib[uid] = self.contrib[uid]
+            self.total, self.by, self.contrib = fresh.total, fresh.by, fresh.contrib
+            self.reconciled_at = time.time()
+            self.reconcile_ms  = round((time.perf_counter() - t0) * 1000, 1)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"total": _summary(self.total),
+                    "segments": {seg: {k: _summary(b) for k, b in sorted(d.items())}
+                                 for seg, d in self.by.items()},
+                    "reconciled_at": self.reconciled_at,
+                    "reconcile_ms": self.reconcile_ms}
+
+    def start_reconciler(self, fetch: Callable[[], Optional[Iterable[dict]]],
+                         keep: Callable[[], set], interval: float = 600):
+        """Daemon thread: reconcile now, then every `interval` seconds.
+        fetch() returns None when the database is unavailable."""
+        stop = threading.Event()
+        def loop():
+            while True:
+                try:
+                    rows = fetch()
+                    if rows is not None:
+                        self.reconcile(rows, keep())
+                except Exception as e:
+                    print(f"Stats reconcile error: {e}")
+                if stop.wait(interval): return
+        threading.Thread(target=loop, name="stats-reconcile", daemon=True).start()
+        return stop
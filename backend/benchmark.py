@@ -0,0 +1,230 @@
+"""
+SeasonCredit v2 — Hot-Path Micro-Benchmarks
+Times the scoring, CIBIL blend, repayment calendar, lender offer and
+forecast functions (backend + ml_engine versions) at single-call and batch
+sizes on revenue generated from REVENUE_PATTERNS, records peak allocations
+and compares against a stored baseline.
+Cold start (fresh interpreter → /ready, then the first onboarding) is
+measured in subprocesses as the coldstart.* cases.
+Run: python3 benchmark.py                  # compare with benchmark_baseline.json
+     python3 benchmark.py --save           # record a new baseline
+     python3 benchmark.py --filter calendar --threshold 0.25 [--prophet]
+Exits 1 when a case is slower, or allocates more, than baseline × (1 + threshold).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import main
+import season_model
+from season_engine import score_matrix, score_row
+from harmonic_forecast import harmonic_forecast, harmonic_forecast_batch
+
+BASELINE   = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "benchmark_baseline.json")
+BATCH      = 1000
+ALLOC_SLACK_KB = 64     # ignore peak-memory drift below this
+COLD_RUNS  = 3
+
+COLD_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+if __name__ == "__main__":
+    with TestClient(main.app) as c:
+        main.WARMUP.wait(120)
+        t1 = time.perf_counter()
+        c.post("/api/onboard", json=json.loads(sys.argv[1]))
+        t2 = time.perf_counter()
+    print(json.dumps({"ready": t1 - t0, "first_onboard": t2 - t1}))
+"""
+
+def make_inputs(n: int = BATCH, seed: int = 7) -> dict:
+    """Realistic borrowers: a REVENUE_PATTERNS shape, ±10% monthly noise,
+    a third without CIBIL, loans of ₹50K–₹5L"""
+    rng   = np.random.default_rng(seed)
+    pats  = np.array(list(main.REVENUE_PATTERNS.values()), dtype=float)
+    rev   = pats[rng.integers(0, len(pats), n)] * rng.lognormal(0, 0.1, (n, 12))
+    revs  = np.round(rev, -2).tolist()
+    cibil = [None if rng.random() < 0.33 else int(rng.integers(300, 900))
+             for _ in range(n)]
+    loans = np.round(rng.uniform(50000, 500000, n), -3).tolist()
+    scores = [main.calc_season_score(r) for r in revs]
+    adjusted = [main.calc_cibil_adjusted_score(s, c) for s, c in zip(scores, cibil)]
+    hist  = np.round(np.hstack([rev * g for g in (0.85, 0.92, 1.0)]), -2)   # 36-month histories
+    return {"revs": revs, "cibil": cibil, "loans": loans,
+            "scores": scores, "adjusted": adjusted, "hist": hist.tolist()}
+
+def cases(d: dict, prophet: bool = False) -> list:
+    """(name, fn, items per call)"""
+    r0, s0, c0, a0, l0 = d["revs"][0], d["scores"][0], 750, d["adjusted"][0], d["loans"][0]
+    rows = list(zip(d["revs"], d["scores"], d["cibil"], d["adjusted"], d["loans"]))
+    out = [
+        ("score.single",          lambda: main.calc_season_score(r0), 1),
+        ("score.loop",            lambda: [main.calc_season_score(r) for r in d["revs"]], BATCH),
+        ("score.matrix",          lambda: score_matrix(d["revs"]), BATCH),
+        ("score.matrix.36mo",     lambda: score_matrix(d["hist"]), BATCH),
+        ("score.matrix+rows",     lambda: (lambda s: [score_row(s, i) for i in range(BATCH)])(
+                                      score_matrix(d["revs"])), BATCH),
+        ("cibil.single",          lambda: main.calc_cibil_adjusted_score(s0, c0), 1),
+        ("cibil.loop",            lambda: [main.calc_cibil_adjusted_score(s, c)
+                                           for _, s, c, _, _ in rows], BATCH),
+        ("calendar.single",       lambda: main.calc_repayment_calendar(l0, a0["rate"] or 16, r0), 1),
+        ("calendar.loop",         lambda: [main.calc_repayment_calendar(l, a["rate"] or 16, r)
+                                           for r, _, _, a, l in rows], BATCH),
+        ("offers.single",         lambda: main.calc_lender_offers(a0["total"], l0), 1),
+        ("offers.loop",           lambda: [main.calc_lender_offers(a["total"], l)
+                                           for _, _, _, a, l in rows], BATCH),
+        ("offers.top3_cost.loop", lambda: [main.calc_lender_offers(a["total"], l, k=3, sort="cost")
+                                           for _, _, _, a, l in rows], BATCH),
+        ("forecast.harmonic.single", lambda: harmonic_forecast(r0), 1),
+        ("forecast.harmonic.batch",  lambda: harmonic_forecast_batch(d["revs"]), BATCH),
+        ("model.score.single",    lambda: season_model.calculate_season_score(r0), 1),
+        ("model.score.loop",      lambda: [season_model.calculate_season_score(r) for r in d["revs"]], BATCH),
+        ("model.cibil.single",    lambda: season_model.cibil_adjusted(s0, c0), 1),
+        ("model.calendar.single", lambda: season_model.emi_calendar(l0, a0["rate"] or 16, r0), 1),
+        ("model.calendar.loop",   lambda: [season_model.emi_calendar(l, a["rate"] or 16, r)
+                                           for r, _, _, a, l in rows], BATCH),
+    ]
+    if prophet:   # seconds per call — opt-in
+        main.PROPHET_POOL.start()
+        out += [("forecast.prophet_pool.single", lambda: main.forecast_peaks(r0), 1),
+                ("model.forecast_prophet.single",
+                 lambda: season_model.forecast_with_prophet(r0), 1)]
+    return out
+
+def measure_cold(runs: int = COLD_RUNS) -> dict:
+    """coldstart.ready / coldstart.first_onboard, each a fresh process, no DB"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env  = {**os.environ, "SUPABASE_URL": "", "STORAGE_BACKEND": "supabase",
+            "FORECAST_MODE": "harmonic", "PROPHET_PREWARM": "0",
+            "WARMUP_BLOCKING": "0"}
+    body = {"full_name": "Bench", "mobile": "9000000000", "aadhaar_last4": "1234",
+            "business_name": "Bench Traders", "business_type": "festival_retail",
+            "business_address": "MG Road", "city": "Pune", "state": "Maharashtra",
+            "pincode": "411001", "years_active": 3, "bank_name": "SBI",
+            "account_number": "1", "ifsc_code": "SBIN0000001",
+            "account_type": "savings", "loan_amount": 200000,
+            "loan_purpose": "Stock / Inventory Purchase",
+            "monthly_revenue": main.REVENUE_PATTERNS["festival_retail"]}
+    runs_ = {"ready": [], "first_onboard": []}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_SCRIPT, json.dumps(body)],
+                             cwd=here, env=env, capture_output=True, text=True,
+                             timeout=300, check=True).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        for k in runs_: runs_[k].append(res[k])
+    return {f"coldstart.{k}": {"best_us": min(v) * 1e6,
+                               "median_us": statistics.median(v) * 1e6,
+                               "peak_kb": 0.0}
+            for k, v in runs_.items()}
+
+def measure(fn, repeat: int = 5) -> dict:
+    fn()                                   # warm caches / lazy imports
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()          # loops for ≥ 0.2 s
+    runs = [t / number for t in timer.repeat(repeat, number)]
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_us": min(runs) * 1e6, "median_us": statistics.median(runs) * 1e6,
+            "peak_kb": peak / 1024}
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "processor": platform.machine(),
+            "cpus": os.cpu_count()}
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="SeasonCredit hot-path benchmarks")
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--threshold", type=float,
+                    default=float(os.getenv("BENCH_THRESHOLD", "0.25")),
+                    help="allowed slowdown, 0.25 = 25%%")
+    ap.add_argument("--filter", help="only cases whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--prophet", action="store_true", help="include Prophet cases")
+    ap.add_argument("--json", help="also write this run's results here")
+    a = ap.parse_args()
+
+    base = None
+    if not a.save and os.path.exists(a.baseline):
+        with open(a.baseline) as f:
+            base = json.load(f)
+        if base.get("machine") != machine():
+            print("⚠️  Baseline was recorded on a different machine/runtime — "
+                  "compare with care")
+
+    d = make_inputs()
+    results, failed = {}, []
+    print(f"{'case':32} {'items':>5} {'best µs':>11} {'µs/item':>9} "
+          f"{'peak KB':>9} {'vs base':>8}")
+    cold = None
+    def cold_case(name):
+        def fn():
+            nonlocal cold
+            cold = cold or measure_cold()
+            return cold[name]
+        return fn
+    todo = cases(d, a.prophet) + [(n, cold_case(n), 1) for n in
+                                  ("coldstart.ready", "coldstart.first_onboard")]
+    for name, fn, items in todo:
+        if a.filter and a.filter not in name: continue
+        if name.startswith("coldstart."):
+            m = {**fn(), "items": items}
+        else:
+            m = {**measure(fn, a.repeat), "items": items}
+        results[name] = m
+        verdict = ""
+        old = (base or {}).get("cases", {}).get(name)
+        if old and m["best_us"] > old["best_us"] * (1 + a.threshold) \
+                and not name.startswith("coldstart."):
+            # confirm before flagging — one noisy run shouldn't fail the build
+            again = measure(fn, a.repeat)
+            m["best_us"] = min(m["best_us"], again["best_us"])
+        if old:
+            ratio = m["best_us"] / old["best_us"]
+            verdict = f"{ratio:7.2f}×"
+            slow  = ratio > 1 + a.threshold
+            fat   = (m["peak_kb"] > old["peak_kb"] * (1 + a.threshold) and
+                     m["peak_kb"] - old["peak_kb"] > ALLOC_SLACK_KB)
+            if slow or fat:
+                failed.append(name)
+                verdict += " ❌" + (" time" if slow else "") + (" mem" if fat else "")
+        print(f"{name:32} {items:5} {m['best_us']:11.1f} {m['best_us']/items:9.2f} "
+              f"{m['peak_kb']:9.1f} {verdict:>8}")
+
+    run = {"machine": machine(), "created": datetime.now().isoformat(),
+           "batch": BATCH, "cases": results}
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump(run, f, indent=2)
+    if a.save:
+        if a.filter and os.path.exists(a.baseline):   # merge a partial run
+            with open(a.baseline) as f:
+                run["cases"] = {**json.load(f).get("cases", {}), **results}
+        with open(a.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\n💾 Baseline saved to {a.baseline}")
+    elif base is None:
+        print("\nℹ️  No baseline yet — run with --save to record one")
+    elif failed:
+        print(f"\n❌ {len(failed)} regression(s) over {a.threshold:.0%}: {', '.join(failed)}")
+        sys.exit(1)
+    else:
+        print(f"\n✅ No regressions over {a.threshold:.0%}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,11 +1,26 @@
 """
 SeasonCredit v2 — Supabase Database Layer
 Run SUPABASE_SQL in Supabase SQL Editor first!
+One process-wide client over a keep-alive httpx pool (get_client).
+STORAGE_BACKEND=sqlite swaps the table helpers onto storage.SQLiteStorage.
 """
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 
+DB_POOL_SIZE      = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+DB_TIMEOUT        = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+DB_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+DB_KEEPALIVE      = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+
+SME_MONTHS = ["jan","feb","mar","apr","may","jun",
+              "jul","aug","sep","oct","nov","dec"]
+
+_client = None
+_http   = None
+_lock   = threading.Lock()
+
 SUPABASE_SQL = """
 -- Run this ENTIRE block in Supabase SQL Editor
 
@@ -47,6 +62,11 @@ CREATE TABLE users (
   created_at       TIMESTAMP DEFAULT NOW()
 );
 
+CREATE INDEX IF NOT EXISTS users_created_id_idx ON users (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS users_business_type_idx ON users (business_type, created_at DESC);
+CREATE INDEX IF NOT EXISTS users_state_idx ON users (state, created_at DESC);
+CREATE INDEX IF NOT EXISTS users_eligible_idx ON users (eligible, has_cibil, created_at DESC);
+
 -- SME Dataset table
 CREATE TABLE IF NOT EXISTS sme_dataset (
   id               TEXT PRIMARY KEY,
@@ -66,66 +86,166 @@ CREATE TABLE IF NOT EXISTS sme_dataset (
   default_risk     DECIMAL,
   jan DECIMAL, feb DECIMAL, mar DECIMAL, apr DECIMAL,
   may DECIMAL, jun DECIMAL, jul DECIMAL, aug DECIMAL,
-  sep DECIMAL, oct DECIMAL, nov DECIMAL, dec DECIMAL
+  sep DECIMAL, oct DECIMAL, nov DECIMAL, dec DECIMAL,
+  updated_at       TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- updated_at drives the backend's incremental sme_dataset snapshot
+ALTER TABLE sme_dataset ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS sme_dataset_updated_idx ON sme_dataset (updated_at);
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN NEW.updated_at = NOW(); RETURN NEW; END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS sme_dataset_touch ON sme_dataset;
+CREATE TRIGGER sme_dataset_touch BEFORE UPDATE ON sme_dataset
+  FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Lender marketplace catalog (empty table → built-in lenders)
+CREATE TABLE IF NOT EXISTS lenders (
+  name             TEXT PRIMARY KEY,
+  rate_offset      DECIMAL NOT NULL,
+  processing_fee   DECIMAL DEFAULT 0,
+  disbursal_hours  INT DEFAULT 48,
+  tranche          BOOLEAN DEFAULT FALSE,
+  upi_intercept    BOOLEAN DEFAULT FALSE,
+  badge            TEXT DEFAULT '',
+  min_score        INT DEFAULT 50,
+  max_score        INT DEFAULT 100,
+  min_amount       DECIMAL DEFAULT 0,
+  max_amount       DECIMAL,
+  states           TEXT[],
+  business_types   TEXT[],
+  quote_url        TEXT,                -- partner quote API (NULL = static)
+  active           BOOLEAN DEFAULT TRUE
 );
 
 -- Enable RLS
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sme_dataset ENABLE ROW LEVEL SECURITY;
+ALTER TABLE lenders ENABLE ROW LEVEL SECURITY;
 
 CREATE POLICY "allow_all" ON users FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "allow_all" ON sme_dataset FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY "allow_all" ON lenders FOR ALL USING (true) WITH CHECK (true);
 """
 
+def _create_client():
+    url = os.getenv("SUPABASE_URL","")
+    key = os.getenv("SUPABASE_KEY","")
+    if "supabase.co" not in url:
+        return None, None
+    from supabase import create_client, ClientOptions   # ~0.2s import
+    import httpx
+    http = httpx.Client(
+        limits=httpx.Limits(max_connections=DB_POOL_SIZE,
+                            max_keepalive_connections=DB_POOL_SIZE,
+                            keepalive_expiry=DB_KEEPALIVE),
+        timeout=httpx.Timeout(DB_TIMEOUT, connect=DB_CONNECT_TIMEOUT),
+        follow_redirects=True)
+    try:
+        options = ClientOptions(httpx_client=http)
+    except TypeError:   # supabase < 2.10 has no httpx_client option
+        http.close(); http = None
+        options = ClientOptions(postgrest_client_timeout=DB_TIMEOUT)
+    return create_client(url, key, options=options), http
+
 def get_client():
+    """Shared client, created on first use and after reset_client()"""
+    global _client, _http
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            try:
+                _client, _http = _create_client()
+            except Exception as e:
+                print(f"DB connect error: {e}")
+    return _client
+
+def reset_client():
+    """Drop the pooled client; the next get_client() reconnects"""
+    global _client, _http
+    with _lock:
+        http, _client, _http = _http, None, None
+    if http:
+        try: http.close()
+        except Exception: pass
+
+def handle_db_error(e: Exception):
+    """Transport failures (dead socket, DNS, timeout) drop the pool"""
     try:
-        from supabase import create_client
-        url = os.getenv("SUPABASE_URL","")
-        key = os.getenv("SUPABASE_KEY","")
-        if "supabase.co" in url:
-            return create_client(url, key)
-    except Exception:
+        import httpx
+        if isinstance(e, httpx.TransportError):
+            reset_client()
+    except ImportError:
         pass
-    return None
+
+def check_client() -> bool:
+    """Health check — a 1-row read; reconnects once on failure"""
+    for attempt in range(2):
+        sb = get_client()
+        if not sb: return False
+        try:
+            sb.table("users").select("id").limit(1).execute()
+            return True
+        except Exception as e:
+            print(f"DB health check failed: {e}")
+            reset_client()
+    return False
+
+def start_health_checks(interval: float = 60):
+    """Daemon thread: periodic check_client() so a dead pool is rebuilt
+    before the next request finds it"""
+    stop = threading.Event()
+    def loop():
+        while not stop.wait(interval):
+            check_client()
+    threading.Thread(target=loop, name="db-health", daemon=True).start()
+    return stop
+
+# Table helpers go through the STORAGE_BACKEND engine (storage.py)
 
 def save_user(user_id: str, data: dict) -> bool:
-    sb = get_client()
-    if not sb: return False
+    from storage import get_storage
+    st = get_storage()
+    if not st.available(): return False
     try:
-        sb.table("users").upsert({**data,"id":user_id}).execute()
+        st.upsert("users", [{**data,"id":user_id}])
         return True
     except Exception as e:
         print(f"DB save error: {e}")
         return False
 
 def get_all_users() -> list:
-    sb = get_client()
-    if not sb: return []
+    from storage import get_storage
+    st = get_storage()
+    if not st.available(): return []
     try:
-        r = sb.table("users").select("*").order(
-            "created_at", desc=True).execute()
-        return r.data or []
+        return sorted(st.scan("users"), key=lambda r: str(r.get("created_at") or ""),
+                      reverse=True)
     except Exception:
         return []
 
 def get_user(user_id: str) -> dict:
-    sb = get_client()
-    if not sb: return {}
+    from storage import get_storage
+    st = get_storage()
+    if not st.available(): return {}
     try:
-        r = sb.table("users").select("*").eq("id",user_id).execute()
-        return r.data[0] if r.data else {}
+        return st.get("users", user_id) or {}
     except Exception:
         return {}
 
 def upload_dataset(records: list) -> str:
-    sb = get_client()
-    if not sb: return "Supabase not configured"
+    from storage import get_storage
+    st = get_storage()
+    if not st.available(): return "Storage not configured"
     try:
-        r = sb.table("sme_dataset").upsert(records).execute()
-        return f"Uploaded {len(r.data)} records"
+        return f"Uploaded {st.upsert('sme_dataset', records)} records"
     except Exception as e:
         return f"Error: {e}"
 
 if __name__ == "__main__":
-    sb = get_client()
-    print("✅ Connected!" if sb else "❌ Not connected — check .env")
+    from storage import get_storage
+    st = get_storage()
+    print(f"✅ Connected ({st.name})!" if st.available() and st.check()
+          else "❌ Not connected — check .env")
@@ -0,0 +1,236 @@
+"""
+SeasonCredit v2 — Local Columnar Snapshot of sme_dataset
+One .npy file per column (12 monthly revenues, scores, default risk,
+dictionary-encoded business_type / city), memory-mapped on load so a restart
+never re-downloads the table. refresh() pulls only rows whose updated_at
+moved since the last sync from the storage engine (storage.py) and falls
+back to a full reload when the row count drifts (deletes) or the column is
+missing.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import numpy as np
+
+from database import SME_MONTHS
+
+NUMERIC  = ("season_score", "eligible_loan", "interest_rate",
+            "default_risk", "annual_revenue", "years_active")
+SEGMENTS = ("business_type", "city")
+SKEW     = timedelta(seconds=60)   # re-read rows committed slightly out of order
+
+def _empty() -> dict:
+    return {"id": np.zeros(0, dtype="U1"), "revenue": np.zeros((0, 12)),
+            **{c: np.zeros(0) for c in NUMERIC},
+            **{s: np.zeros(0, dtype=np.int32) for s in SEGMENTS}}
+
+class DatasetSnapshot:
+    def __init__(self, path: str):
+        self.path        = path
+        self.cols        = _empty()
+        self.categories  = {s: [] for s in SEGMENTS}
+        self.generation  = 0
+        self.synced_at   = None     # max updated_at seen (ISO string)
+        self.incremental = True     # False when sme_dataset has no updated_at
+        self.refresh_lock = threading.RLock()
+        self.stats = {"refreshes": 0, "full_reloads": 0, "rows_fetched": 0,
+                      "last_refresh_ms": None, "refreshed_at": None}
+
+    # ── disk ─────────────────────────────────────────────────
+    def _file(self, name: str, gen: int) -> str:
+        return os.path.join(self.path, f"{name}.{gen}.npy")
+
+    def load(self) -> bool:
+        """Map the last saved snapshot; False if there is none"""
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                meta = json.load(f)
+            gen  = meta["generation"]
+            cols = {name: np.load(self._file(name, gen), mmap_mode="r")
+                    for name in _empty()}
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Snapshot load error: {e}")
+            return False
+        self.cols, self.generation = cols, gen
+        self.categories  = meta["categories"]
+        self.synced_at   = meta.get("synced_at")
+        self.incremental = meta.get("incremental", True)
+        return True
+
+    def _save(self, cols: dict):
+        os.makedirs(self.path, exist_ok=True)
+        gen = self.generation + 1
+        for name, arr in cols.items():
+            np.save(self._file(name, gen), arr)
+        meta = {"generation": gen, "rows": len(cols["id"]),
+                "synced_at": self.synced_at, "incremental": self.incremental,
+                "categories": self.categories}
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+        for fname in os.listdir(self.path):   # mapped readers keep their inode
+            if fname.endswith(".npy") and not fname.endswith(f".{gen}.npy"):
+                os.remove(os.path.join(self.path, fname))
+        self.generation = gen
+        self.cols = {name: np.load(self._file(name, gen), mmap_mode="r")
+                     for name in cols}
+
+    # ── sync ─────────────────────────────────────────────────
+    def _fetch(self, store, since: Optional[str], page_size: int) -> list:
+        cols = ["id", *SME_MONTHS, *NUMERIC, *SEGMENTS]
+        if self.incremental: cols.append("updated_at")
+        return list(store.scan("sme_dataset", cols, since, page_size))
+
+    def _encode(self, rows: list) -> dict:
+        def num(r, c):
+            return np.nan if r.get(c) is None else float(r[c])
+        codes = {}
+        for s in SEGMENTS:
+            lookup = {v: i for i, v in enumerate(self.categories[s])}
+            out = np.empty(len(rows), dtype=np.int32)
+            for i, r in enumerate(rows):
+                v = r.get(s) or "unknown"
+                if v not in lookup:
+                    lookup[v] = len(self.categories[s])
+                    self.categories[s].append(v)
+                out[i] = lookup[v]
+            codes[s] = out
+        return {"id": np.array([r["id"] for r in rows], dtype=str),
+                "revenue": np.array([[num(r, m) for m in SME_MONTHS] for r in rows],
+                                    dtype=np.float64).reshape(-1, 12),
+                **{c: np.array([num(r, c) for r in rows], dtype=np.float64)
+                   for c in NUMERIC},
+                **codes}
+
+    @staticmethod
+    def _merge(old: dict, new: dict) -> dict:
+        """Upsert `new` into `old` by id; both stay sorted by id"""
+        if not len(old["id"]): return new
+        pos   = np.searchsorted(old["id"], new["id"])
+        pos_c = np.minimum(pos, len(old["id"]) - 1)
+        hit   = old["id"][pos_c] == new["id"]
+        out   = {}
+        for name, col in old.items():
+            col = np.array(col)           # copy out of the read-only map
+            if name == "id" and new["id"].dtype.itemsize > col.dtype.itemsize:
+                col = col.astype(new["id"].dtype)
+            col[pos_c[hit]] = new[name][hit]
+            out[name] = np.concatenate([col, new[name][~hit]])
+        order = np.argsort(out["id"], kind="stable")
+        return {name: col[order] for name, col in out.items()}
+
+    def refresh(self, store, page_size: int = 1000, full: bool = False) -> dict:
+        """Pull changes from storage (storage.py) and save a new generation"""
+        with self.refresh_lock:
+            t0   = time.perf_counter()
+            full = full or not self.incremental or self.synced_at is None
+            since = None
+            if not full:
+                since = (datetime.fromisoformat(self.synced_at) - SKEW).isoformat()
+            try:
+                rows = self._fetch(store, since, page_size)
+            except Exception as e:
+                if not (self.incremental and "updated_at" in str(e)):
+                    raise
+                print("⚠️  sme_dataset has no updated_at — snapshot will reload in full")
+                self.incremental, full, since = False, True, None
+                rows = self._fetch(store, None, page_size)
+            if full:
+                self.categories = {s: [] for s in SEGMENTS}
+            new  = self._encode(rows)
+            cols = new if full else self._merge(self.cols, new)
+            if full:
+                order = np.argsort(cols["id"], kind="stable")
+                cols  = {name: col[order] for name, col in cols.items()}
+            elif store.count("sme_dataset") != len(cols["id"]):
+                # rows were deleted upstream — only a full pull notices
+                return self.refresh(store, page_size, full=True)
+            stamps = [r["updated_at"] for r in rows if r.get("updated_at")]
+            if stamps:
+                self.synced_at = max(stamps + ([self.synced_at] if self.synced_at else []))
+            self._save(cols)
+            ms = round((time.perf_counter() - t0) * 1000, 1)
+            self.stats["refreshes"]    += 1
+            self.stats["full_reloads"] += full
+            self.stats["rows_fetched"] += len(rows)
+            self.stats["last_refresh_ms"] = ms
+            self.stats["refreshed_at"]    = time.time()
+            return {"mode": "full" if full else "incremental",
+                    "fetched": len(rows), "rows": len(cols["id"]), "ms": ms}
+
+    def start_refresher(self, get_store: Callable, interval: float = 300):
+        """Daemon thread: refresh now, then every `interval` seconds"""
+        stop = threading.Event()
+        def loop():
+            while True:
+                store = get_store()
+                if store:
+                    try:
+                        self.refresh(store)
+                    except Exception as e:
+                        print(f"Snapshot refresh error: {e}")
+                if stop.wait(interval): return
+        threading.Thread(target=loop, name="sme-snapshot", daemon=True).start()
+        return stop
+
+    # ── analytics ────────────────────────────────────────────
+    def mask(self, business_type: Optional[str] = None, city: Optional[str] = None,
+             min_score: Optional[float] = None, max_score: Optional[float] = None,
+             cols: Optional[dict] = None) -> np.ndarray:
+        cols = cols or self.cols
+        m = np.ones(len(cols["id"]), dtype=bool)
+        for seg, v in (("business_type", business_type), ("city", city)):
+            if v:
+                code = self.categories[seg].index(v) if v in self.categories[seg] else -1
+                m &= cols[seg] == code
+        score = cols["season_score"]
+        if min_score is not None: m &= score >= min_score
+        if max_score is not None: m &= score <= max_score
+        return m
+
+    def cohort(self, group_by: str = "business_type", **filters) -> dict:
+        """Summary of the filtered rows plus a per-segment breakdown"""
+        cols  = self.cols
+        m     = self.mask(cols=cols, **filters)
+        n     = int(m.sum())
+        score = np.asarray(cols["season_score"])[m]
+        risk  = np.asarray(cols["default_risk"])[m]
+        rev   = np.asarray(cols["revenue"])[m]
+
+        def mean(a):
+            return round(float(np.nanmean(a)), 2) if np.isfinite(a).any() else None
+        groups = np.asarray(cols[group_by])[m]
+        k      = len(self.categories[group_by])
+        count  = np.bincount(groups, minlength=k)
+        valid  = ~np.isnan(score)
+        s_sum  = np.bincount(groups[valid], weights=score[valid], minlength=k)
+        s_cnt  = np.bincount(groups[valid], minlength=k)
+        elig   = np.bincount(groups, weights=score >= 50, minlength=k)
+        return {
+            "count": n,
+            "avg_season_score": mean(score),
+            "eligible_rate": round(float((score >= 50).mean()), 3) if n else None,
+            "avg_default_risk": mean(risk),
+            "avg_annual_rev": mean(np.asarray(cols["annual_revenue"])[m]),
+            "monthly_profile": [round(float(v)) if np.isfinite(v) else None
+                                for v in (np.nanmean(rev, axis=0) if n else [np.nan] * 12)],
+            group_by: {self.categories[group_by][i]: {
+                           "count": int(count[i]),
+                           "avg_season_score": round(float(s_sum[i] / s_cnt[i]), 1) if s_cnt[i] else None,
+                           "eligible_rate": round(float(elig[i] / count[i]), 3)}
+                       for i in np.flatnonzero(count)},
+        }
+
+    def info(self) -> dict:
+        return {**self.stats, "rows": len(self.cols["id"]),
+                "generation": self.generation, "synced_at": self.synced_at,
+                "incremental": self.incremental, "path": self.path}
+
+    def __len__(self) -> int:
+        return len(self.cols["id"])
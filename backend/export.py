@@ -0,0 +1,100 @@
+"""
+SeasonCredit v2 — Streaming Table Export
+Turns a storage scan (keyset-paged by id, see storage.py) into CSV or NDJSON
+bytes as the pages arrive:
+  • rows are encoded into ~64 KB chunks, never the whole table
+  • optional gzip through one zlib stream (a valid .gz file)
+  • a fixed column list per table, so the CSV header is known up front
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+from database import SME_MONTHS
+from user_query import USER_COLUMNS
+
+SME_COLUMNS = (
+    "id","business_name","business_type","city","years_active",
+    "peak_season","off_season","annual_revenue","season_score",
+    "eligible_loan","interest_rate","supplier_split","operations_split",
+    "upi_payment","default_risk", *SME_MONTHS,
+)
+EXPORT_COLUMNS = {"users": USER_COLUMNS, "sme_dataset": SME_COLUMNS}
+EXPORT_FORMATS = {"csv":    "text/csv; charset=utf-8",
+                  "ndjson": "application/x-ndjson"}
+CHUNK_BYTES    = 64 * 1024
+
+class ExportError(ValueError):
+    pass
+
+def export_columns(table: str, fields: Optional[str]) -> List[str]:
+    """fields=a,b,c → validated column list (id first); None → every column"""
+    if table not in EXPORT_COLUMNS:
+        raise ExportError(f"table must be one of {list(EXPORT_COLUMNS)}")
+    known = EXPORT_COLUMNS[table]
+    if not fields:
+        return list(known)
+    cols = [f.strip() for f in fields.split(",") if f.strip()]
+    bad  = [c for c in cols if c not in known]
+    if bad:
+        raise ExportError(f"Unknown {table} fields: {bad}")
+    return ["id"] + [c for c in dict.fromkeys(cols) if c != "id"]
+
+def _cell(v):
+    if v is None: return ""
+    if isinstance(v, bool): return "true" if v else "false"
+    if isinstance(v, (list, dict)): return json.dumps(v, ensure_ascii=False)
+    return v
+
+def encode_csv(rows: Iterable[dict], columns: List[str],
+               chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w   = csv.writer(buf, lineterminator="\n")
+    w.writerow(columns)
+    for r in rows:
+        w.writerow([_cell(r.get(c)) for c in columns])
+        if buf.tell() >= chunk_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+def encode_ndjson(rows: Iterable[dict], columns: List[str],
+                  chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    parts, size = [], 0
+    for r in rows:
+        line = json.dumps({c: r.get(c) for c in columns},
+                          ensure_ascii=False, default=str) + "\n"
+        parts.append(line); size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)    # wbits 31 → gzip framing
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out: yield out
+    yield z.flush()
+
+def export_stream(rows: Iterable[dict], fmt: str, columns: List[str],
+                  gzip: bool = False, counter=None) -> Iterator[bytes]:
+    """rows → encoded (and optionally gzipped) chunks; counter(n) gets the row count"""
+    if counter is not None:
+        rows = _counted(rows, counter)
+    chunks = ENCODERS[fmt](rows, columns)
+    return gzip_stream(chunks) if gzip else chunks
+
+def _counted(rows: Iterable[dict], counter) -> Iterator[dict]:
+    n = 0
+    try:
+        for r in rows:
+            n += 1
+            yield r
+    finally:                  # also when the client disconnects mid-export
+        counter(n)
@@ -0,0 +1,105 @@
+"""
+SeasonCredit v2 — Content-Addressed Forecast Cache
+Key = sha256(float64 revenue bytes + model params), so every user on the
+same revenue vector (e.g. a REVENUE_PATTERNS fallback) shares one fit.
+Memory tier is an LRU with TTL; optional JSON-file disk tier survives restarts.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+def forecast_key(revenue: List[float], params: dict) -> str:
+    h = hashlib.sha256(np.asarray(revenue, dtype=np.float64).tobytes())
+    h.update(json.dumps(params, sort_keys=True).encode())
+    return h.hexdigest()
+
+class ForecastCache:
+    def __init__(self, max_entries: int = 5000, ttl: float = 86400,
+                 disk_dir: str = ""):
+        self.max_entries = max_entries
+        self.ttl      = ttl
+        self.disk_dir = disk_dir
+        self.mem      = OrderedDict()   # key → (stored_at, forecast)
+        self.lock     = threading.Lock()
+        self.stats    = {"hits": 0, "disk_hits": 0, "misses": 0,
+                         "evictions": 0, "expired": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self.lock:
+            hit = self.mem.get(key)
+            if hit and now - hit[0] < self.ttl:
+                self.mem.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit[1]
+            if hit:
+                del self.mem[key]
+                self.stats["expired"] += 1
+        hit = self._disk_get(key, now)
+        with self.lock:
+            if hit:
+                self.stats["disk_hits"] += 1
+                self._mem_put(key, hit)
+                return hit[1]
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, forecast: dict):
+        entry = (time.time(), forecast)
+        with self.lock:
+            self._mem_put(key, entry)
+        if self.disk_dir:
+            path, tmp = self._path(key), None
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # a temp file per write: threads storing one key never share it
+                fd, tmp = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp",
+                                           dir=os.path.dirname(path))
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"stored_at": entry[0], "forecast": forecast}, f)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"Forecast cache disk error: {e}")
+                if tmp and os.path.exists(tmp): os.remove(tmp)
+
+    def _mem_put(self, key: str, entry: tuple):
+        self.mem[key] = entry
+        self.mem.move_to_end(key)
+        while len(self.mem) > self.max_entries:
+            self.mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        if not self.disk_dir: return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - d["stored_at"] >= self.ttl:
+            try: os.remove(path)
+            except OSError: pass
+            return None
+        return (d["stored_at"], d["forecast"])
+
+    def info(self) -> dict:
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {**self.stats, "entries": len(self.mem),
+                    "max_entries": self.max_entries, "ttl": self.ttl,
+                    "disk": bool(self.disk_dir),
+                    "hit_rate": round((lookups - self.stats["misses"]) / lookups, 3)
+                                if lookups else None}
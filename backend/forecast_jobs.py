@@ -0,0 +1,119 @@
+"""
+SeasonCredit v2 — Background Forecast Jobs
+Prophet fits run on a small bounded pool, off the request path.
+Clients get a job id from /api/onboard and poll /api/forecast/{job_id}
+"""
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from forecast_cache import ForecastCache, forecast_key
+
+class ForecastJobs:
+    """
+    Bounded job queue: at most `workers` forecasts run at once and at most
+    `max_pending` wait behind them. Past that, submit() resolves the job
+    immediately with `fallback` so onboarding never blocks on the queue.
+    Finished jobs are kept for `ttl` seconds.
+    With a `cache`, hits resolve instantly and identical in-flight revenue
+    vectors share one fit.
+    """
+    def __init__(self, fn: Callable[[List[float]], dict],
+                 fallback: Callable[[List[float], str], dict],
+                 workers: int = 2, max_pending: int = 200,
+                 ttl: float = 3600, cache: Optional[ForecastCache] = None,
+                 params: Optional[dict] = None):
+        self.fn          = fn
+        self.fallback    = fallback
+        self.max_pending = max_pending
+        self.ttl         = ttl
+        self.cache       = cache
+        self.params      = params or {}
+        self.inflight    = {}   # cache key → Future
+        self.pool  = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="forecast")
+        self.jobs  = {}      # job_id → {"future", "created"}
+        self.lock  = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0,
+                      "rejected": 0, "cached": 0, "coalesced": 0}
+
+    def pending(self) -> int:
+        with self.lock:
+            return sum(1 for j in self.jobs.values()
+                       if not j["future"].done())
+
+    def submit(self, revenue: List[float]) -> str:
+        self._purge()
+        job_id = uuid.uuid4().hex[:12].upper()
+        rev    = list(revenue)
+        key    = forecast_key(rev, self.params) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        with self.lock:
+            if cached is not None:
+                fut = Future()
+                fut.set_result(cached)
+                self.stats["cached"] += 1
+            elif key in self.inflight:
+                fut = self.inflight[key]
+                self.stats["coalesced"] += 1
+            elif sum(1 for j in self.jobs.values()
+                     if not j["future"].done()) >= self.max_pending:
+                fut = Future()
+                fut.set_result(self.fallback(rev, "forecast queue full"))
+                self.stats["rejected"] += 1
+            else:
+                fut = self.pool.submit(self._run, rev, key)
+                if key: self.inflight[key] = fut
+                self.stats["submitted"] += 1
+            self.jobs[job_id] = {"future": fut, "created": time.time()}
+        return job_id
+
+    def _run(self, revenue: List[float], key: Optional[str] = None) -> dict:
+        try:
+            result, outcome = self.fn(revenue), "completed"
+        except Exception as e:
+            result, outcome = self.fallback(revenue, str(e)), "failed"
+        # fallbacks carry a "note" — only cache real model output
+        if key and outcome == "completed" and "note" not in result:
+            self.cache.put(key, result)
+        with self.lock:
+            self.stats[outcome] += 1
+            self.inflight.pop(key, None)
+        return result
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            for jid in [k for k, j in self.jobs.items()
+                        if j["future"].done() and j["created"] < cutoff]:
+                del self.jobs[jid]
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if not job: return None
+        fut = job["future"]
+        if not fut.done():
+            return {"job_id": job_id, "status": "pending"}
+        return {"job_id": job_id, "status": "done",
+                "forecast": fut.result()}
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Long-poll: return as soon as the job finishes or `timeout` passes"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if not job: return None
+        if timeout > 0 and not job["future"].done():
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(job["future"])),
+                    timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.status(job_id)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
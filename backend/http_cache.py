@@ -0,0 +1,65 @@
+"""
+SeasonCredit v2 — Pre-serialized Responses + HTTP Caching
+  • CachedJSON: a payload serialized once (same bytes FastAPI's JSONResponse
+    would send) with a strong ETag over those bytes
+  • ResponseMemo: bounded LRU of CachedJSON keyed by the endpoint's inputs
+  • GET / HEAD with a matching If-None-Match → 304, no body
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+MEDIA_TYPE = "application/json"
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if not header: return False
+    if header.strip() == "*": return True
+    return any(t.strip().removeprefix("W/") == etag for t in header.split(","))
+
+class CachedJSON:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload, ensure_ascii=False, allow_nan=False,
+                               indent=None, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+
+    def response(self, request: Optional[Request], cache_control: str) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if (request is not None and request.method in ("GET", "HEAD")
+                and _etag_matches(request.headers.get("if-none-match"), self.etag)):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type=MEDIA_TYPE, headers=headers)
+
+class ResponseMemo:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.items: "OrderedDict[Hashable, CachedJSON]" = OrderedDict()
+        self.lock  = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable, build: Callable[[], object]) -> CachedJSON:
+        with self.lock:
+            hit = self.items.get(key)
+            if hit is not None:
+                self.items.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit
+            self.stats["misses"] += 1
+        cached = CachedJSON(build())      # pure → a racing duplicate is harmless
+        with self.lock:
+            self.items[key] = cached
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+                self.stats["evictions"] += 1
+        return cached
+
+    def info(self) -> dict:
+        with self.lock:
+            return {**self.stats, "size": len(self.items), "maxsize": self.maxsize}
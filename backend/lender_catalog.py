@@ -0,0 +1,208 @@
+"""
+SeasonCredit v2 — Indexed Lender Catalog
+Lenders come from a JSON file, the Supabase `lenders` table or the built-in
+list. Every restriction (score band, ticket size, state, business type) is
+indexed as an int bitset over catalog positions, so a match is a handful of
+ANDs instead of a scan; base rates are precomputed per SeasonScore.
+"""
+import bisect
+import json
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+SCORES   = np.arange(101)
+# base rate by integer SeasonScore — same expression calc_lender_offers used
+BASE_RATE = [16 - ((s - 50) * 0.08) for s in range(101)]
+SORTS    = ("catalog", "cost", "rate", "speed")
+
+DEFAULTS = {"fee": 0.0, "hours": 48, "tranche": False, "upi": False,
+            "badge": "", "min_score": 50, "max_score": 100, "min_amount": 0,
+            "max_amount": None, "states": None, "business_types": None,
+            "quote_url": None, "active": True}
+# Supabase column → catalog key
+DB_COLUMNS = {"name": "name", "rate_offset": "offset", "processing_fee": "fee",
+              "disbursal_hours": "hours", "tranche": "tranche",
+              "upi_intercept": "upi", "badge": "badge", "min_score": "min_score",
+              "max_score": "max_score", "min_amount": "min_amount",
+              "max_amount": "max_amount", "states": "states",
+              "business_types": "business_types", "quote_url": "quote_url",
+              "active": "active"}
+
+def _bits(idx) -> int:
+    out = 0
+    for i in idx:
+        out |= 1 << int(i)
+    return out
+
+def _members(mask: int) -> List[int]:
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+class LenderIndex:
+    """Immutable index over one catalog snapshot"""
+    def __init__(self, lenders: List[dict]):
+        self.lenders = [{**DEFAULTS, **l} for l in lenders
+                        if l.get("active", True)]
+        L = self.lenders
+        n = len(L)
+        self.all = (1 << n) - 1
+        self.by_name = {l["name"]: l for l in L}
+        self.live    = any(l["quote_url"] for l in L)   # any partner quote API
+        # score band → one bitset per integer score
+        lo = np.array([l["min_score"] for l in L], dtype=float)
+        hi = np.array([l["max_score"] for l in L], dtype=float)
+        ok = (SCORES[:, None] >= lo[None, :]) & (SCORES[:, None] <= hi[None, :])
+        self.by_score = [_bits(np.flatnonzero(row)) for row in ok]
+        # ticket size → prefix bitsets over sorted min_amount (min ≤ amount)
+        # and suffix bitsets over sorted max_amount (max ≥ amount)
+        inf = float("inf")
+        by_min = sorted(range(n), key=lambda i: L[i]["min_amount"])
+        by_max = sorted(range(n), key=lambda i: L[i]["max_amount"] or inf)
+        self.mins = [float(L[i]["min_amount"]) for i in by_min]
+        self.maxs = [float(L[i]["max_amount"] or inf) for i in by_max]
+        self.min_prefix = [0]
+        for i in by_min:
+            self.min_prefix.append(self.min_prefix[-1] | (1 << i))
+        self.max_suffix = [0]
+        for i in reversed(by_max):
+            self.max_suffix.append(self.max_suffix[-1] | (1 << i))
+        self.max_suffix.reverse()
+        # segments → bitset per value, plus lenders with no restriction
+        self.segments = {}
+        for key in ("states", "business_types"):
+            free = _bits(i for i, l in enumerate(L) if not l[key])
+            vals = {}
+            for i, l in enumerate(L):
+                for v in l[key] or ():
+                    vals[v] = vals.get(v, 0) | (1 << i)
+            self.segments[key] = (free, vals)
+        # rate per (score, lender), rounded once with Python's round()
+        self.rates = [[round(b + l["offset"], 1) for l in L] for b in BASE_RATE]
+        # every ranking presorted per integer score → top-k walks the list
+        self.order = {sort: [sorted(range(n), key=self._key(sort, r)) for r in self.rates]
+                      for sort in SORTS if sort != "catalog"}
+
+    def _key(self, sort: str, rates):
+        L = self.lenders
+        return {"catalog": lambda i: i,
+                "cost":    lambda i: (rates[i] + L[i]["fee"], i),
+                "rate":    lambda i: (rates[i], i),
+                "speed":   lambda i: (L[i]["hours"], rates[i], i)}[sort]
+
+    def _amount_mask(self, amount: float) -> int:
+        return (self.min_prefix[bisect.bisect_right(self.mins, amount)] &
+                self.max_suffix[bisect.bisect_left(self.maxs, amount)])
+
+    def _segment_mask(self, key: str, value: Optional[str]) -> int:
+        free, vals = self.segments[key]
+        return free | vals.get(value, 0) if value else self.all
+
+    def _mask(self, score: float, amount: float, state: Optional[str],
+              business_type: Optional[str]) -> int:
+        if score < 0: return 0
+        mask = (self.by_score[min(100, int(score))] if score == int(score) else
+                _bits(i for i, l in enumerate(self.lenders)
+                      if l["min_score"] <= score <= l["max_score"]))
+        return (mask & self._amount_mask(amount)
+                & self._segment_mask("states", state)
+                & self._segment_mask("business_types", business_type))
+
+    def candidates(self, score: float, amount: float,
+                   state: Optional[str] = None,
+                   business_type: Optional[str] = None) -> List[int]:
+        return _members(self._mask(score, amount, state, business_type))
+
+    def rate(self, score: float, i: int) -> float:
+        if score == int(score) and 0 <= score <= 100:
+            return self.rates[int(score)][i]
+        return round(16 - ((score - 50) * 0.08) + self.lenders[i]["offset"], 1)
+
+    def match(self, score: float, amount: float, state: Optional[str] = None,
+              business_type: Optional[str] = None, k: Optional[int] = None,
+              sort: str = "catalog") -> List[dict]:
+        mask = self._mask(score, amount, state, business_type)
+        if sort == "catalog" or not (score == int(score) and 0 <= score <= 100):
+            idx = _members(mask)
+            if sort != "catalog":
+                rates = [self.rate(score, i) for i in range(len(self.lenders))]
+                idx.sort(key=self._key(sort, rates))
+            idx = idx[:k] if k else idx
+        else:
+            idx = []
+            for i in self.order[sort][int(score)]:
+                if mask >> i & 1:
+                    idx.append(i)
+                    if len(idx) == k: break
+        out = []
+        for i in idx:
+            l, rate = self.lenders[i], self.rate(score, i)
+            out.append({
+                "lender":          l["name"],
+                "rate":            rate,
+                "processing_fee":  l["fee"],
+                "fee_amount":      round(amount * l["fee"] / 100),
+                "disbursal_hours": l["hours"],
+                "tranche":         l["tranche"],
+                "upi_intercept":   l["upi"],
+                "badge":           l["badge"],
+                "total_repayable": round(amount*(1+rate/100)),
+                "saving_vs_bank":  round(amount*(0.18-rate/100)),
+            })
+        return out
+
+OFFER_KEYS = {"cost":  lambda o: o["rate"] + o["processing_fee"],
+              "rate":  lambda o: o["rate"],
+              "speed": lambda o: (o["disbursal_hours"], o["rate"])}
+
+def rank_offers(offers: List[dict], sort: str = "catalog",
+                k: Optional[int] = None) -> List[dict]:
+    """Re-rank finished offers (e.g. after live quotes changed the rates)"""
+    if sort != "catalog":
+        offers = sorted(offers, key=OFFER_KEYS[sort])
+    return offers[:k] if k else offers
+
+class LenderCatalog:
+    """Holds the current LenderIndex; reload() swaps in a new one atomically"""
+    def __init__(self, defaults: List[dict]):
+        self.defaults = defaults
+        self.index    = LenderIndex(defaults)
+        self.source   = "builtin"
+        self.generation = 0      # bumped on reload — keys memoized offers
+        self.lock     = threading.Lock()
+
+    def reload(self, path: Optional[str] = None, sb=None) -> str:
+        lenders, source = None, "builtin"
+        if path:
+            with open(path) as f:
+                lenders, source = json.load(f), path
+        elif sb is not None:
+            try:
+                rows = sb.table("lenders").select("*").execute().data or []
+                if rows:
+                    lenders = [{DB_COLUMNS[k]: v for k, v in r.items()
+                                if k in DB_COLUMNS and v is not None} for r in rows]
+                    source  = "supabase"
+            except Exception as e:
+                print(f"Lender catalog load error: {e}")
+        index = LenderIndex(lenders if lenders else self.defaults)
+        with self.lock:
+            self.index, self.source = index, source
+            self.generation += 1
+        return source
+
+    def match(self, *args, **kwargs) -> List[dict]:
+        return self.index.match(*args, **kwargs)
+
+    def info(self) -> dict:
+        ix = self.index
+        return {"source": self.source, "generation": self.generation,
+                "lenders": len(ix.lenders),
+                "live_quote_lenders": sum(1 for l in ix.lenders if l["quote_url"]),
+                "states": len(ix.segments["states"][1]),
+                "business_types": len(ix.segments["business_types"][1])}
@@ -0,0 +1,149 @@
+"""
+SeasonCredit v2 — Live Lender Quote Fan-out
+Asks every matching lender with a quote_url for a price concurrently:
+  • per-lender deadline, after which the static catalog price is used
+  • hedging: a lender still silent after `hedge_after` gets a second request
+  • quorum: returns once that share of lenders has answered, without
+    waiting on the stragglers
+  • one pooled client per event loop, all closed by aclose()
+"""
+import asyncio
+import math
+import time
+import weakref
+from typing import Dict, List, Optional
+
+import httpx
+
+class QuoteFanout:
+    def __init__(self, timeout: float = 0.8, hedge_after: float = 0.25,
+                 quorum: float = 0.8, max_connections: int = 100):
+        self.timeout     = timeout
+        self.hedge_after = hedge_after
+        self.quorum      = quorum
+        self.max_connections = max_connections
+        self.clients = weakref.WeakKeyDictionary()   # loop → AsyncClient bound to it
+        self.stats = {"fanouts": 0, "requests": 0, "hedges": 0, "live": 0,
+                      "errors": 0, "timeouts": 0, "quorum_early": 0,
+                      "last_ms": None, "max_ms": 0.0}
+
+    def _client(self) -> httpx.AsyncClient:
+        loop   = asyncio.get_running_loop()
+        client = self.clients.get(loop)
+        if client is None:
+            client = self.clients[loop] = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+        return client
+
+    async def _post(self, url: str, payload: dict) -> dict:
+        self.stats["requests"] += 1
+        r = await self._client().post(url, json=payload)
+        r.raise_for_status()
+        q = r.json()
+        float(q["rate"])     # a quote without a usable rate is an error
+        return q
+
+    async def _quote(self, url: str, payload: dict) -> dict:
+        """One lender: first request, a hedge if it is slow or fails, one deadline"""
+        loop     = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        tasks    = {asyncio.create_task(self._post(url, payload))}
+        hedged, error = False, None
+        try:
+            while tasks and loop.time() < deadline:
+                wait = deadline - loop.time()
+                if not hedged:
+                    wait = min(wait, self.hedge_after)
+                done, tasks = await asyncio.wait(tasks, timeout=wait,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        return t.result()
+                    error = t.exception()
+                if not hedged and loop.time() < deadline:
+                    hedged = True
+                    self.stats["hedges"] += 1
+                    tasks.add(asyncio.create_task(self._post(url, payload)))
+            raise error if error and not tasks else asyncio.TimeoutError()
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def quote(self, offers: List[dict], lenders: Dict[str, dict],
+                    payload: dict, amount: float) -> List[dict]:
+        """Replace static offers with live quotes where a lender answered in time"""
+        live = {i: lenders[o["lender"]]["quote_url"] for i, o in enumerate(offers)
+                if (lenders.get(o["lender"]) or {}).get("quote_url")}
+        if not live:
+            return offers
+        t0 = time.perf_counter()
+        self.stats["fanouts"] += 1
+        tasks   = {asyncio.create_task(self._quote(url, payload)): i
+                   for i, url in live.items()}
+        need    = math.ceil(self.quorum * len(tasks))
+        pending = set(tasks)
+        quotes  = {}
+        loop     = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while pending and len(quotes) < need:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0, deadline - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED)
+            if not done: break
+            for t in done:
+                e = t.exception()
+                if e is None:
+                    quotes[tasks[t]] = t.result()
+                else:
+                    self.stats["timeouts" if isinstance(e, asyncio.TimeoutError)
+                               else "errors"] += 1
+        if pending and len(quotes) >= need:
+            self.stats["quorum_early"] += 1
+        elif pending:                       # still silent at the deadline
+            self.stats["timeouts"] += len(pending)
+        for t in pending:
+            t.cancel()
+
+        out = []
+        for i, o in enumerate(offers):
+            if i in quotes:
+                out.append(_apply_quote(o, quotes[i], amount))
+            else:
+                out.append({**o, "quote_source": "static"})
+        self.stats["live"] += len(quotes)
+        ms = (time.perf_counter() - t0) * 1000
+        self.stats["last_ms"] = round(ms, 1)
+        self.stats["max_ms"]  = round(max(self.stats["max_ms"], ms), 1)
+        return out
+
+    def info(self) -> dict:
+        return {**self.stats, "timeout": self.timeout,
+                "hedge_after": self.hedge_after, "quorum": self.quorum,
+                "clients": len(self.clients)}
+
+    async def aclose(self):
+        """Close every loop's client, each on its own loop (a closed loop's
+        client is dropped — its connections cannot be awaited any more)"""
+        loop = asyncio.get_running_loop()
+        clients, self.clients = list(self.clients.items()), weakref.WeakKeyDictionary()
+        for owner, client in clients:
+            if owner is loop:
+                await client.aclose()
+            elif owner.is_running():
+                done = asyncio.run_coroutine_threadsafe(client.aclose(), owner)
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(done), timeout=5)
+                except Exception as e:
+                    print(f"Quote client close error: {e}")
+
+def _apply_quote(offer: dict, q: dict, amount: float) -> dict:
+    rate = round(float(q["rate"]), 1)
+    fee  = float(q.get("processing_fee", offer["processing_fee"]))
+    return {**offer, "rate": rate, "processing_fee": fee,
+            "fee_amount":      round(amount * fee / 100),
+            "disbursal_hours": int(q.get("disbursal_hours", offer["disbursal_hours"])),
+            "total_repayable": round(amount*(1+rate/100)),
+            "saving_vs_bank":  round(amount*(0.18-rate/100)),
+            "quote_source":    "live"}
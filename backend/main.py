@@ -6,16 +6,47 @@
 ╚══════════════════════════════════════════════════════════════╝
 Run: uvicorn main:app --reload --port 8000
 """
+import time
+BOOT_T0 = time.perf_counter()      # cold-start clock — see warmup.py
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
 import numpy as np
-import os, uuid
+import anyio.from_thread
+import itertools, json, os, sys, uuid
 from datetime import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "ml_engine"))
+from season_engine import (MAX_MONTHS, MIN_MONTHS, score_histories, score_matrix,
+                           score_one, score_row, seasonal_profile)
+from harmonic_forecast import harmonic_forecast, harmonic_forecast_batch
+from stress_test import SCENARIOS, stress_test
+from forecast_jobs import ForecastJobs
+from forecast_cache import ForecastCache
+from prophet_pool import ProphetPool
+from database import get_client, check_client, start_health_checks
+from storage import get_storage
+from write_behind import WriteBehind
+from user_store import UserStore
+from aggregates import RunningStats
+from dataset_snapshot import DatasetSnapshot
+from lender_catalog import LenderCatalog, rank_offers, SORTS as LENDER_SORTS
+from lender_quotes import QuoteFanout
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS,
+                     Counter, Gauge, Histogram, StageTimer, timed)
+from warmup import Warmup
+from http_cache import CachedJSON, ResponseMemo
+from export import EXPORT_FORMATS, ExportError, export_columns, export_stream
+from upi_stream import IST, UpiAggregator, month_key, month_label, parse_month
+from user_query import (QueryError, decode_cursor, encode_cursor,
+                        merge_page, parse_fields, project)
+
 load_dotenv()
 
 app = FastAPI(title="SeasonCredit API", version="2.0.0")
@@ -48,8 +79,48 @@ NBFC_LENDERS = [
     {"name":"Capital Float",     "offset":+1.5,"fee":1.2,"hours":20,"tranche":True, "upi":True, "badge":"📱 Digital",  "min_score":65},
 ]
 
-# ─── In-memory user store (backed by Supabase) ───────────────
-USERS_CACHE = {}
+LENDERS = LenderCatalog(NBFC_LENDERS)   # reloaded from LENDER_CATALOG / Supabase at startup
+LENDER_QUOTES = QuoteFanout(
+    timeout=float(os.getenv("LENDER_QUOTE_TIMEOUT", "0.8")),
+    hedge_after=float(os.getenv("LENDER_QUOTE_HEDGE", "0.25")),
+    quorum=float(os.getenv("LENDER_QUOTE_QUORUM", "0.8")))
+
+# ─── Metrics (GET /metrics, Server-Timing) ───────────────────
+STAGE_SECONDS   = Histogram("seasoncredit_stage_seconds",
+                            "Time spent in each step of a request", ("endpoint", "stage"))
+DB_SECONDS      = Histogram("seasoncredit_db_seconds",
+                            "Storage call latency", ("op",))
+DB_ERRORS       = Counter("seasoncredit_db_errors_total",
+                          "Storage calls that raised", ("op",))
+CACHE_FALLBACKS = Counter("seasoncredit_cache_fallbacks_total",
+                          "Reads answered from memory instead of storage", ("op",))
+FORECASTS       = Counter("seasoncredit_forecasts_total",
+                          "Forecasts produced, by source", ("source",))
+COLD_START      = Gauge("seasoncredit_cold_start_seconds",
+                        "Seconds from importing main to each startup phase", ("phase",))
+WARMUP_STEPS    = Gauge("seasoncredit_warmup_step_seconds",
+                        "Duration of each warm-up step", ("step",))
+MEMO_STATS      = Gauge("seasoncredit_response_memo",
+                        "Pre-serialized response memo: hits, misses, evictions, size", ("stat",))
+EXPORT_ROWS     = Counter("seasoncredit_export_rows_total",
+                          "Rows streamed by /api/export", ("table", "format"))
+EXPORT_PAGE     = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+UPI_EVENTS      = Counter("seasoncredit_upi_events_total",
+                          "UPI events by outcome", ("result",))
+UPI_RESCORES    = Counter("seasoncredit_upi_rescores_total",
+                          "SeasonScores recomputed after a UPI month closed or was restated")
+
+# ─── Pre-serialized responses for the pure endpoints ─────────
+HTTP_MAX_AGE   = int(os.getenv("HTTP_CACHE_MAX_AGE", "3600"))
+OFFERS_MAX_AGE = int(os.getenv("OFFERS_CACHE_MAX_AGE", "300"))   # catalog can reload
+RESPONSE_MEMO  = ResponseMemo(int(os.getenv("RESPONSE_MEMO_SIZE", "4096")))
+
+# ─── In-memory user store (backed by STORAGE_BACKEND) ────────
+STORE      = get_storage()    # Supabase or embedded SQLite
+USER_STORE = UserStore(max_records=int(os.getenv("USER_STORE_MAX", "50000")))
+STATS      = RunningStats()
+SME_SNAPSHOT = DatasetSnapshot(os.getenv("SME_SNAPSHOT_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sme_snapshot"))
 
 # ═══════════════════════════════════════════════════════════════
 # MODELS
@@ -80,12 +151,13 @@ class UserOnboard(BaseModel):
     account_type:     str  # savings / current
     upi_id:           Optional[str] = ""
     # Financial
-    monthly_revenue:  List[float]   # 12 values
+    monthly_revenue:  List[float]   # 12–60 months, oldest first, from a January
     loan_amount:      float
     loan_purpose:     str
     # CIBIL
     has_cibil:        bool = False
     cibil_score:      Optional[int] = None
+    forecast_mode:    Optional[str] = None  # harmonic / prophet
 
 class AddUserRequest(BaseModel):
     full_name:        str
@@ -110,52 +182,59 @@ class AddUserRequest(BaseModel):
 class EMIRequest(BaseModel):
     monthly_sales: float
 
+class BatchForecastRequest(BaseModel):
+    revenues: List[List[float]]
+
+class BatchScoreRequest(BaseModel):
+    revenues:     List[List[float]]   # N rows × 12–60 values
+    cibil_scores: Optional[List[Optional[int]]] = None
+
+class StressLoan(BaseModel):
+    monthly_revenue: List[float]          # 12–60 values
+    loan_amount:     float
+    interest_rate:   Optional[float] = None   # None → priced from SeasonScore
+    cibil_score:     Optional[int] = None
+    user_id:         Optional[str] = None
+
+class UpiEvent(BaseModel):
+    user_id: str
+    amount:  float                  # ₹ credited; negative for a refund / reversal
+    ts:      datetime               # naive times are IST
+    txn_id:  Optional[str] = None   # UPI reference — retries with it are ignored
+
+class UpiBatch(BaseModel):
+    events: List[UpiEvent]
+
+class StressTestRequest(BaseModel):
+    loans:         List[StressLoan] = []
+    portfolio:     bool = False       # also stress every live user
+    paths:         int = 2000
+    scenario:      str = "mixed"      # baseline / late_season / weak_peak / demand_shock / mixed
+    seed:          Optional[int] = None
+    shared_shocks: bool = True
+
 class LoanRequest(BaseModel):
     season_score: int
     loan_amount:  float
     business_type: str = "festival_retail"
+    state:        Optional[str] = None
+    top_k:        Optional[int] = None
+    sort:         str = "catalog"   # catalog / cost / rate / speed
 
 # ═══════════════════════════════════════════════════════════════
 # CORE ENGINE
 # ═══════════════════════════════════════════════════════════════
 
+HISTORY_ERROR = f"Need {MIN_MONTHS}–{MAX_MONTHS} monthly revenue values"
+
+def valid_history(revenue: List[float]) -> bool:
+    return MIN_MONTHS <= len(revenue) <= MAX_MONTHS
+
 def calc_season_score(revenue: List[float]) -> dict:
-    rev  = revenue
-    mean = np.mean(rev)
-    if mean == 0:
+    score = score_one(revenue)       # scalar for 12 months, score_matrix beyond
+    if score is None:
         raise HTTPException(400, "Revenue cannot be all zeros")
-    std  = np.std(rev)
-    cv   = std / mean
-
-    C  = round(max(0, 25 - cv * 10))
-    h1 = np.mean(rev[:6]); h2 = np.mean(rev[6:])
-    gr = (h2 - h1) / h1 if h1 > 0 else 0
-    G  = round(min(25, max(0, 15 + gr * 30)))
-    peak = max(rev)
-    R  = round(min(25, (peak / 50000) * 3))
-    active = sum(1 for r in rev if r > mean * 0.3)
-    Rb = round((active / 12) * 25)
-    total = min(100, C + G + R + Rb)
-
-    rate = (12.0 if total >= 80 else 14.0 if total >= 65
-            else 16.0 if total >= 50 else None)
-    max_loan = 0
-    if total >= 50:
-        mult     = 0.4 + (total - 50) * 0.004
-        max_loan = round(peak * mult / 10000) * 10000
-
-    peaks = [MONTHS[i] for i, r in enumerate(rev) if r > mean * 2]
-
-    return {
-        "total": total, "consistency": C, "growth": G,
-        "capacity": R, "reliability": Rb,
-        "eligible": total >= 50, "rate": rate,
-        "peak_months": peaks,
-        "max_loan": max_loan, "min_loan": round(max_loan * 0.5),
-        "annual_rev": round(sum(rev)),
-        "mean_monthly": round(mean),
-        "peak_revenue": round(peak)
-    }
+    return score
 
 def calc_cibil_adjusted_score(season_score: dict,
                                cibil: Optional[int]) -> dict:
@@ -193,6 +272,7 @@ def calc_tranche(amount: float) -> dict:
 
 def calc_repayment_calendar(loan: float, rate: float,
                              revenue: List[float]) -> dict:
+    revenue = seasonal_profile(revenue)     # multi-year history → Jan…Dec plan
     mean    = np.mean(revenue)
     total   = round(loan * (1 + rate / 100))
     balance = total
@@ -215,123 +295,162 @@ def calc_repayment_calendar(loan: float, rate: float,
             "peak_total_emi": sum(r["emi"] for r in rows if r["color"]=="green"),
             "off_total_emi":  sum(r["emi"] for r in rows if r["color"]=="gray")}
 
-def calc_lender_offers(score: int, amount: float) -> list:
+def calc_lender_offers(score: int, amount: float,
+                       state: Optional[str] = None,
+                       business_type: Optional[str] = None,
+                       k: Optional[int] = None, sort: str = "catalog") -> list:
     if score < 50: return []
-    base = 16 - ((score - 50) * 0.08)
-    return [{
-        "lender":          l["name"],
-        "rate":            round(base + l["offset"], 1),
-        "processing_fee":  l["fee"],
-        "fee_amount":      round(amount * l["fee"] / 100),
-        "disbursal_hours": l["hours"],
-        "tranche":         l["tranche"],
-        "upi_intercept":   l["upi"],
-        "badge":           l["badge"],
-        "total_repayable": round(amount*(1+round(base+l["offset"],1)/100)),
-        "saving_vs_bank":  round(amount*(0.18-round(base+l["offset"],1)/100)),
-    } for l in NBFC_LENDERS if score >= l["min_score"]]
+    return LENDERS.match(score, amount, state, business_type, k, sort)
+
+async def live_lender_offers(score: int, amount: float,
+                             state: Optional[str] = None,
+                             business_type: Optional[str] = None,
+                             k: Optional[int] = None,
+                             sort: str = "catalog") -> list:
+    """Static offers, re-priced by partner quote APIs where lenders have one"""
+    index = LENDERS.index
+    if score < 50 or not index.live:
+        return calc_lender_offers(score, amount, state, business_type, k, sort)
+    offers = calc_lender_offers(score, amount, state, business_type, None, sort)
+    offers = await LENDER_QUOTES.quote(
+        offers, index.by_name,
+        {"season_score": score, "loan_amount": amount,
+         "state": state, "business_type": business_type}, amount)
+    return rank_offers(offers, sort, k)
+
+def lender_offers_blocking(score: int, amount: float,
+                           state: Optional[str] = None,
+                           business_type: Optional[str] = None) -> list:
+    """live_lender_offers from a sync endpoint's worker thread"""
+    if score < 50 or not LENDERS.index.live:
+        return calc_lender_offers(score, amount, state, business_type)
+    return anyio.from_thread.run(live_lender_offers, score, amount,
+                                 state, business_type)
 
 def forecast_peaks(revenue: List[float]) -> dict:
     try:
-        import pandas as pd
-        from prophet import Prophet
-        df = pd.DataFrame({
-            'ds': pd.date_range(start='2023-01-01', periods=12, freq='MS'),
-            'y': revenue
-        })
-        m = Prophet(yearly_seasonality=True,
-                    weekly_seasonality=False, daily_seasonality=False)
-        m.fit(df)
-        future = m.make_future_dataframe(periods=12, freq='MS')
-        fc     = m.predict(future)
-        nxt    = fc.tail(12).reset_index(drop=True)
-        top3   = nxt['yhat'].nlargest(3).index.tolist()
-        peaks  = [MONTHS[i%12] for i in sorted(top3)]
-        return {"model":"Facebook Prophet","peaks":peaks,
-                "confidence":"87%",
-                "forecast":[{"month":MONTHS[i%12],
-                             "predicted":round(float(r['yhat'])),
-                             "lower":round(float(r['yhat_lower'])),
-                             "upper":round(float(r['yhat_upper']))}
-                            for i,r in nxt.iterrows()]}
+        result = PROPHET_POOL.forecast(revenue)
     except Exception as e:
-        mean  = np.mean(revenue)
-        peaks = [MONTHS[i] for i,r in enumerate(revenue) if r>mean*2]
-        return {"model":"Moving Average","peaks":peaks,
-                "confidence":"72%","note":str(e)}
+        return forecast_fallback(revenue, str(e) or type(e).__name__)
+    FORECASTS.inc(source="prophet")
+    return result
+
+def forecast_fallback(revenue: List[float], note: str = "") -> dict:
+    """Harmonic stand-in when Prophet fails, times out or the queue is full"""
+    FORECASTS.inc(source="fallback")
+    return {**harmonic_forecast(revenue), "note": note}
+
+# ─── Background forecast queue (Prophet off the request path) ─
+PROPHET_POOL = ProphetPool(
+    workers=int(os.getenv("PROPHET_WORKERS", "0")) or None,
+    max_inflight=int(os.getenv("PROPHET_MAX_INFLIGHT", "0")) or None,
+    timeout=float(os.getenv("PROPHET_TIMEOUT", "30")))
+FORECAST_PARAMS = {"model": "prophet", "yearly_seasonality": True,
+                   "start": "2023-01-01", "periods": 12}
+FORECAST_CACHE = ForecastCache(
+    max_entries=int(os.getenv("FORECAST_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("FORECAST_CACHE_TTL", "86400")),
+    disk_dir=os.getenv("FORECAST_CACHE_DIR", ""))
+FORECAST_JOBS = ForecastJobs(
+    forecast_peaks, forecast_fallback,
+    workers=int(os.getenv("FORECAST_WORKERS", "0")) or PROPHET_POOL.workers,
+    max_pending=int(os.getenv("FORECAST_MAX_PENDING", "200")),
+    ttl=float(os.getenv("FORECAST_JOB_TTL", "3600")),
+    cache=FORECAST_CACHE, params=FORECAST_PARAMS)
+
+FORECAST_MODES = ("harmonic", "prophet")
+FORECAST_MODE  = os.getenv("FORECAST_MODE", "harmonic")
+
+def start_forecast(revenue: List[float], mode: Optional[str] = None):
+    """harmonic → inline result (ms); prophet → background job to poll"""
+    mode = mode or FORECAST_MODE
+    if mode not in FORECAST_MODES:
+        raise HTTPException(400, f"forecast_mode must be one of {FORECAST_MODES}")
+    if mode == "prophet":
+        job_id = FORECAST_JOBS.submit(revenue)
+        return forecast_job_ref(job_id), job_id
+    FORECASTS.inc(source="harmonic")
+    return {**harmonic_forecast(revenue), "status": "done"}, None
+
+def forecast_job_ref(job_id: str) -> dict:
+    job = FORECAST_JOBS.status(job_id)
+    if job and job["status"] == "done":   # cache hit — no need to poll
+        return {**job["forecast"], "status": "done", "job_id": job_id}
+    return {"status": "pending", "job_id": job_id,
+            "poll": f"/api/forecast/{job_id}"}
 
 # ═══════════════════════════════════════════════════════════════
-# SUPABASE
+# STORAGE  (Supabase or SQLite — see storage.py)
 # ═══════════════════════════════════════════════════════════════
 
 def get_sb():
-    try:
-        from supabase import create_client
-        url = os.getenv("SUPABASE_URL","")
-        key = os.getenv("SUPABASE_KEY","")
-        if "supabase.co" in url:
-            return create_client(url, key)
-    except Exception:
-        pass
-    return None
+    return get_client()
+
+def get_store():
+    """The configured engine, or None when there is none (memory only)"""
+    return STORE if STORE.available() else None
 
 def db_save_user(user_id: str, data: dict) -> bool:
-    sb = get_sb()
-    if not sb: return False
+    st = get_store()
+    if not st: return False
     try:
-        sb.table("users").upsert({**data, "id": user_id}).execute()
+        with timed(DB_SECONDS, DB_ERRORS, op="save_user"):
+            st.upsert("users", [{**data, "id": user_id}])
         return True
     except Exception as e:
         print(f"DB error: {e}")
         return False
 
-def db_get_all_users() -> list:
-    sb = get_sb()
-    if not sb: return list(USERS_CACHE.values())
+def db_save_users(rows: list) -> bool:
+    """Batched upsert for the write-behind queue — raises on DB errors"""
+    st = get_store()
+    if not st: return False
+    with timed(DB_SECONDS, DB_ERRORS, op="upsert_users"):
+        st.upsert("users", rows)
+    return True
+
+WRITE_BEHIND = WriteBehind(
+    db_save_users,
+    interval=float(os.getenv("WRITE_BEHIND_INTERVAL", "0.5")),
+    max_batch=int(os.getenv("WRITE_BEHIND_BATCH", "500")),
+    spool_path=os.getenv("WRITE_BEHIND_SPOOL") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "write_behind.spool"))
+
+def db_get_users_page(limit: int, after, filters: dict,
+                      cols: Optional[List[str]]) -> Optional[list]:
+    """One keyset page straight from storage; None if it is unavailable"""
+    st = get_store()
+    if not st: return None
     try:
-        r = sb.table("users").select("*").order(
-            "created_at", desc=True).execute()
-        return r.data or []
+        with timed(DB_SECONDS, DB_ERRORS, op="users_page"):
+            return st.users_page(limit, after, filters, cols)
     except Exception:
-        return list(USERS_CACHE.values())
+        return None
+
+def db_iter_users(columns: str = "*", page_size: int = 1000):
+    """Every users row, paged by id; None if no storage is configured"""
+    st = get_store()
+    if not st: return None
+    return st.scan("users", columns, page_size=page_size)
 
 def db_get_user(user_id: str) -> dict:
-    sb = get_sb()
-    if not sb: return USERS_CACHE.get(user_id, {})
+    st = get_store()
+    if not st:
+        CACHE_FALLBACKS.inc(op="get_user")
+        return USER_STORE.get(user_id, {})
     try:
-        r = sb.table("users").select("*").eq(
-            "id", user_id).execute()
-        return r.data[0] if r.data else {}
+        with timed(DB_SECONDS, DB_ERRORS, op="get_user"):
+            return st.get("users", user_id) or {}
     except Exception:
-        return USERS_CACHE.get(user_id, {})
+        CACHE_FALLBACKS.inc(op="get_user")
+        return USER_STORE.get(user_id, {})
 
 # ═══════════════════════════════════════════════════════════════
-# API ENDPOINTS
+# USER RECORDS
 # ═══════════════════════════════════════════════════════════════
 
-@app.get("/")
-def root():
-    return {"status": "✅ SeasonCredit API v2.0 Running",
-            "team": "FinSentinel — FINCODE 2026",
-            "docs": "/docs"}
-
-# ── 1. ONBOARD NEW USER ──────────────────────────────────────
-@app.post("/api/onboard")
-def api_onboard(data: UserOnboard):
-    if len(data.monthly_revenue) != 12:
-        raise HTTPException(400, "Need exactly 12 monthly revenue values")
-
-    user_id  = str(uuid.uuid4())[:8].upper()
-    season   = calc_season_score(data.monthly_revenue)
-    adjusted = calc_cibil_adjusted_score(season, data.cibil_score)
-    forecast = forecast_peaks(data.monthly_revenue)
-    tranche  = calc_tranche(data.loan_amount)
-    calendar = calc_repayment_calendar(
-        data.loan_amount, adjusted["rate"] or 16,
-        data.monthly_revenue)
-    offers   = calc_lender_offers(adjusted["total"], data.loan_amount)
-
-    user_record = {
+def onboard_record(data: UserOnboard, user_id: str, adjusted: dict) -> dict:
+    return {
         "id":             user_id,
         "full_name":      data.full_name,
         "mobile":         data.mobile,
@@ -368,42 +487,8 @@ def api_onboard(data: UserOnboard):
         "status":         "active"
     }
 
-    USERS_CACHE[user_id] = user_record
-    db_save_user(user_id, {k:v for k,v in user_record.items()
-                            if k != "monthly_revenue"})
-
+def add_user_record(data: AddUserRequest, user_id: str, adjusted: dict) -> dict:
     return {
-        "user_id":    user_id,
-        "user":       user_record,
-        "score":      adjusted,
-        "forecast":   forecast,
-        "tranche":    tranche,
-        "calendar":   calendar,
-        "offers":     offers,
-        "no_cibil_msg": (
-            "✅ SeasonScore generated without CIBIL — "
-            "based purely on your seasonal revenue pattern"
-            if not data.has_cibil else None
-        )
-    }
-
-# ── 2. ADD USER (Judge demo — quick add) ─────────────────────
-@app.post("/api/add-user")
-def api_add_user(data: AddUserRequest):
-    if len(data.monthly_revenue) != 12:
-        raise HTTPException(400, "Need 12 monthly revenue values")
-
-    user_id  = str(uuid.uuid4())[:8].upper()
-    season   = calc_season_score(data.monthly_revenue)
-    adjusted = calc_cibil_adjusted_score(season, data.cibil_score)
-    rev_patt = REVENUE_PATTERNS.get(data.business_type,
-               REVENUE_PATTERNS["festival_retail"])
-    calendar = calc_repayment_calendar(
-        data.loan_amount, adjusted["rate"] or 16,
-        data.monthly_revenue)
-    offers   = calc_lender_offers(adjusted["total"], data.loan_amount)
-
-    user_record = {
         "id":             user_id,
         "full_name":      data.full_name,
         "mobile":         data.mobile,
@@ -433,9 +518,214 @@ def api_add_user(data: AddUserRequest):
         "status":         "active"
     }
 
-    USERS_CACHE[user_id] = user_record
-    db_save_user(user_id, {k:v for k,v in user_record.items()
-                            if k != "monthly_revenue"})
+def save_user_record(user_record: dict):
+    """Memory first; Supabase via the write-behind queue"""
+    USER_STORE.put(user_record)
+    STATS.add(user_record)
+    WRITE_BEHIND.enqueue({k:v for k,v in user_record.items()
+                          if k != "monthly_revenue"})
+
+# ═══════════════════════════════════════════════════════════════
+# UPI STREAM  (monthly revenue from transactions — see upi_stream.py)
+# ═══════════════════════════════════════════════════════════════
+
+UPI_MAX_BATCH = int(os.getenv("UPI_MAX_BATCH", "10000"))
+
+def upi_lookup(user_id: str) -> Optional[dict]:
+    return USER_STORE.get(user_id) or db_get_user(user_id) or None
+
+UPI = UpiAggregator(
+    upi_lookup, dynamic_emi,
+    dedupe_size=int(os.getenv("UPI_DEDUPE_SIZE", "500000")),
+    path=os.getenv("UPI_STATE_PATH") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "upi_state.json"))
+
+def upi_rescore(user_ids: List[str]) -> List[dict]:
+    """Score every changed business in one batch and save the new record"""
+    items = UPI.histories(user_ids)
+    if not items: return []
+    scores = score_histories([rev for _, _, rev in items],
+                             [first % 12 for _, first, _ in items])
+    out = []
+    for (uid, first, rev), season in zip(items, scores):
+        user = upi_lookup(uid)
+        if season is None or not user: continue
+        adjusted = calc_cibil_adjusted_score(season, user.get("cibil_score"))
+        # the stored history starts in January, like onboarding revenue
+        skip = (12 - first % 12) % 12
+        save_user_record({**user,
+            "season_score":   adjusted["total"],
+            "interest_rate":  adjusted["rate"],
+            "eligible":       adjusted["eligible"],
+            "peak_months":    adjusted["peak_months"],
+            "annual_revenue": adjusted["annual_rev"],
+            "max_loan":       adjusted["max_loan"],
+            "monthly_revenue": rev[skip:] if len(rev) - skip >= 12
+                               else seasonal_profile(rev, first % 12)})
+        UPI.set_score(uid, adjusted["total"])
+        UPI_RESCORES.inc()
+        out.append({"user_id": uid, "season_score": adjusted["total"],
+                    "eligible": adjusted["eligible"], "months": len(rev),
+                    **UPI.ledger(uid)})
+    return out
+
+# ═══════════════════════════════════════════════════════════════
+# WARM-UP  (background after startup; GET /ready)
+# ═══════════════════════════════════════════════════════════════
+
+WARMUP = Warmup(BOOT_T0)
+
+def warm_storage():
+    """Supabase: import the client and open the pooled connection"""
+    if STORE.name == "supabase":
+        if check_client():
+            start_health_checks(float(os.getenv("SUPABASE_HEALTH_INTERVAL", "60")))
+    elif not STORE.check():
+        raise RuntimeError(f"{STORE.name} storage check failed")
+
+def warm_hot_paths():
+    """One pass over every request-path function with a sample borrower"""
+    rev      = REVENUE_PATTERNS["festival_retail"]
+    adjusted = calc_cibil_adjusted_score(calc_season_score(rev), 750)
+    calc_tranche(200000)
+    calc_repayment_calendar(200000, adjusted["rate"] or 16, rev)
+    calc_lender_offers(adjusted["total"], 200000, "Maharashtra",
+                       "festival_retail", k=3, sort="cost")
+    harmonic_forecast_batch(list(REVENUE_PATTERNS.values())[:2])
+    score_row(score_matrix([rev, rev]), 1)
+    stress_test([rev], [200000], [adjusted["rate"] or 16], paths=64, seed=0)
+
+def warm_prophet():
+    """Spawn the Prophet workers and wait out their throwaway fit"""
+    if not PROPHET_POOL.wait_warm(float(os.getenv("PROPHET_WARM_TIMEOUT", "120"))):
+        raise TimeoutError("Prophet workers still warming")
+
+WARMUP.step("storage", warm_storage)
+WARMUP.step("hot_paths", warm_hot_paths)
+if FORECAST_MODE == "prophet" or os.getenv("PROPHET_PREWARM") == "1":
+    WARMUP.step("prophet", warm_prophet)
+
+# ═══════════════════════════════════════════════════════════════
+# API ENDPOINTS
+# ═══════════════════════════════════════════════════════════════
+
+@app.on_event("startup")
+def on_startup():
+    if STORE.name != "supabase":
+        print(f"🗄️  Storage: {STORE.name} ({STORE.path})")
+    # lenders table is Supabase-only; SQLite deployments use LENDER_CATALOG / built-ins
+    lender_sb = get_sb() if STORE.name == "supabase" else None
+    print(f"🏦 Lender catalog: {LENDERS.reload(os.getenv('LENDER_CATALOG'), lender_sb)} "
+          f"({LENDERS.info()['lenders']} lenders)")
+    WRITE_BEHIND.start()
+    STATS.start_reconciler(
+        lambda: db_iter_users("id,season_score,annual_revenue,business_type,city"),
+        lambda: set(USER_STORE),
+        interval=float(os.getenv("STATS_RECONCILE_INTERVAL", "600")))
+    if UPI.load():
+        print(f"📲 UPI aggregator: {UPI.info()['businesses']} businesses restored")
+    UPI.start_saver(interval=float(os.getenv("UPI_SAVE_INTERVAL", "30")))
+    if SME_SNAPSHOT.load():
+        print(f"📦 sme_dataset snapshot: {len(SME_SNAPSHOT)} rows (gen {SME_SNAPSHOT.generation})")
+    SME_SNAPSHOT.start_refresher(
+        get_store, interval=float(os.getenv("SME_SNAPSHOT_REFRESH", "300")))
+    WARMUP.mark("startup")
+    # WARMUP_BLOCKING=1 holds startup (and the listening socket) until warm
+    WARMUP.start(block=os.getenv("WARMUP_BLOCKING") == "1")
+
+@app.on_event("shutdown")
+def on_shutdown():
+    UPI.save()
+    WRITE_BEHIND.shutdown()
+    FORECAST_JOBS.shutdown()
+    PROPHET_POOL.shutdown()
+    STORE.close()
+
+@app.on_event("shutdown")
+async def on_shutdown_async():
+    await LENDER_QUOTES.aclose()
+
+@app.get("/")
+def root():
+    return {"status": "✅ SeasonCredit API v2.0 Running",
+            "team": "FinSentinel — FINCODE 2026",
+            "docs": "/docs"}
+
+@app.get("/ready")
+def api_ready(response: Response):
+    """Readiness probe — 503 until the warm-up has run, plus cold-start timings"""
+    if not WARMUP.ready:
+        response.status_code = 503
+    return WARMUP.info()
+
+# ── 1. ONBOARD NEW USER ──────────────────────────────────────
+@app.post("/api/onboard")
+def api_onboard(data: UserOnboard, response: Response):
+    if not valid_history(data.monthly_revenue):
+        raise HTTPException(400, HISTORY_ERROR)
+
+    timer    = StageTimer(STAGE_SECONDS, "onboard")
+    user_id  = str(uuid.uuid4())[:8].upper()
+    with timer("score"):
+        season   = calc_season_score(data.monthly_revenue)
+        adjusted = calc_cibil_adjusted_score(season, data.cibil_score)
+    with timer("forecast"):
+        forecast, job_id = start_forecast(data.monthly_revenue, data.forecast_mode)
+    with timer("calendar"):
+        tranche  = calc_tranche(data.loan_amount)
+        calendar = calc_repayment_calendar(
+            data.loan_amount, adjusted["rate"] or 16,
+            data.monthly_revenue)
+    with timer("offers"):
+        offers   = lender_offers_blocking(adjusted["total"], data.loan_amount,
+                                          data.state, data.business_type)
+
+    user_record = onboard_record(data, user_id, adjusted)
+
+    with timer("save"):       # memory + write-behind; DB time is db_seconds
+        save_user_record(user_record)
+    timer.finish(response)
+
+    return {
+        "user_id":    user_id,
+        "user":       user_record,
+        "score":      adjusted,
+        "forecast":   forecast,
+        "forecast_job_id": job_id,
+        "tranche":    tranche,
+        "calendar":   calendar,
+        "offers":     offers,
+        "no_cibil_msg": (
+            "✅ SeasonScore generated without CIBIL — "
+            "based purely on your seasonal revenue pattern"
+            if not data.has_cibil else None
+        )
+    }
+
+# ── 2. ADD USER (Judge demo — quick add) ─────────────────────
+@app.post("/api/add-user")
+def api_add_user(data: AddUserRequest, response: Response):
+    if not valid_history(data.monthly_revenue):
+        raise HTTPException(400, HISTORY_ERROR)
+
+    timer    = StageTimer(STAGE_SECONDS, "add_user")
+    user_id  = str(uuid.uuid4())[:8].upper()
+    with timer("score"):
+        season   = calc_season_score(data.monthly_revenue)
+        adjusted = calc_cibil_adjusted_score(season, data.cibil_score)
+    with timer("calendar"):
+        calendar = calc_repayment_calendar(
+            data.loan_amount, adjusted["rate"] or 16,
+            data.monthly_revenue)
+    with timer("offers"):
+        offers   = calc_lender_offers(adjusted["total"], data.loan_amount,
+                                       data.state, data.business_type)
+
+    user_record = add_user_record(data, user_id, adjusted)
+
+    with timer("save"):
+        save_user_record(user_record)
+    timer.finish(response)
 
     return {
         "user_id":  user_id,
@@ -446,74 +736,476 @@ def api_add_user(data: AddUserRequest):
         "message":  f"✅ User {data.full_name} added successfully! ID: {user_id}"
     }
 
+# ── 2b. BULK ONBOARD (NDJSON in → NDJSON out) ─────────────
+BULK_KINDS     = {"add":     (AddUserRequest, add_user_record),
+                  "onboard": (UserOnboard,    onboard_record)}
+BULK_CHUNK     = int(os.getenv("BULK_CHUNK", "500"))
+BULK_MAX_LINE  = 64 * 1024
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator is still reading the request.
+    The stock class (ASGI < 2.4) runs a disconnect listener that would
+    swallow the request body; request.stream() raises on disconnect anyway.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+def bulk_score_chunk(items: list, build):
+    """items: (line_no, model | error str) → (NDJSON text in order, errors)"""
+    ok   = [(n, m) for n, m in items
+            if not isinstance(m, str) and valid_history(m.monthly_revenue)]
+    scores = score_histories([m.monthly_revenue for _, m in ok])
+    pos    = {n: i for i, (n, _) in enumerate(ok)}
+    out, errors = [], 0
+    for n, m in items:
+        if isinstance(m, str):
+            res = {"line": n, "error": m}
+        elif n not in pos:
+            res = {"line": n, "error": HISTORY_ERROR}
+        elif scores[pos[n]] is None:
+            res = {"line": n, "error": "Revenue cannot be all zeros"}
+        else:
+            adjusted = calc_cibil_adjusted_score(scores[pos[n]], m.cibil_score)
+            user_id  = str(uuid.uuid4())[:8].upper()
+            record   = build(m, user_id, adjusted)
+            save_user_record(record)
+            res = {"line": n, "user_id": user_id, "score": adjusted,
+                   "calendar": calc_repayment_calendar(
+                       m.loan_amount, adjusted["rate"] or 16, m.monthly_revenue),
+                   "offers": calc_lender_offers(adjusted["total"], m.loan_amount,
+                                                m.state, m.business_type)}
+        errors += "error" in res
+        out.append(json.dumps(res, ensure_ascii=False, default=str) + "\n")
+    return "".join(out), errors
+
+@app.post("/api/bulk-onboard")
+async def api_bulk_onboard(request: Request, kind: str = "add"):
+    """
+    Body: one AddUserRequest (kind=add) or UserOnboard (kind=onboard) JSON
+    object per line. Rows are validated and scored in chunks of BULK_CHUNK
+    and each result line is streamed back as soon as its chunk is done.
+    """
+    if kind not in BULK_KINDS:
+        raise HTTPException(400, f"kind must be one of {list(BULK_KINDS)}")
+    model, build = BULK_KINDS[kind]
+
+    async def results():
+        buf, chunk, line_no = b"", [], 0
+        skip = False            # inside an over-long line: drop bytes through its "\n"
+        totals = {"rows": 0, "ok": 0, "errors": 0}
+
+        def parse(raw: bytes):
+            try:
+                return model.model_validate_json(raw)
+            except ValidationError as e:
+                return "; ".join(f"{'.'.join(map(str, x['loc']))}: {x['msg']}"
+                                 for x in e.errors())
+
+        async def flush():
+            text, errors = await run_in_threadpool(bulk_score_chunk, chunk, build)
+            totals["errors"] += errors
+            totals["ok"]     += len(chunk) - errors
+            chunk.clear()
+            return text
+
+        def too_long():
+            nonlocal line_no
+            line_no += 1
+            totals["rows"] += 1
+            chunk.append((line_no, f"Line longer than {BULK_MAX_LINE} bytes"))
+
+        async for part in request.stream():
+            if skip:
+                nl = part.find(b"\n")
+                if nl < 0: continue
+                part, skip = part[nl + 1:], False
+            buf += part
+            *lines, buf = buf.split(b"\n")
+            for raw in lines:
+                if len(raw) > BULK_MAX_LINE:
+                    too_long(); continue
+                line_no += 1
+                if not raw.strip(): continue
+                totals["rows"] += 1
+                chunk.append((line_no, parse(raw)))
+            if len(buf) > BULK_MAX_LINE:      # reported once, the rest is skipped
+                too_long()
+                buf, skip = b"", True
+            if len(chunk) >= BULK_CHUNK:
+                yield await flush()
+        if buf.strip():
+            line_no += 1
+            totals["rows"] += 1
+            chunk.append((line_no, parse(buf)))
+        if chunk:
+            yield await flush()
+        yield json.dumps({"summary": totals}) + "\n"
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
 # ── 3. GET ALL USERS ─────────────────────────────────────────
 @app.get("/api/users")
-def api_get_users():
-    users = db_get_all_users()
-    # merge cache
-    for uid, u in USERS_CACHE.items():
-        if not any(x.get("id") == uid for x in users):
-            users.append(u)
-    return {"users": users, "total": len(users)}
+def api_get_users(limit: int = 100, cursor: Optional[str] = None,
+                  eligible: Optional[bool] = None,
+                  has_cibil: Optional[bool] = None,
+                  business_type: Optional[str] = None,
+                  state: Optional[str] = None,
+                  min_score: Optional[int] = None,
+                  max_score: Optional[int] = None,
+                  fields: Optional[str] = None):
+    limit = min(max(limit, 1), 1000)
+    try:
+        after = decode_cursor(cursor)
+        cols  = parse_fields(fields)
+    except QueryError as e:
+        raise HTTPException(400, str(e))
+    filters = {"eligible": eligible, "has_cibil": has_cibil,
+               "business_type": business_type, "state": state,
+               "min_score": min_score, "max_score": max_score}
+
+    rows = db_get_users_page(limit, after, filters, cols)
+    if rows is not None:
+        # rows acknowledged but not flushed yet are still only in memory
+        page, more = merge_page(rows, WRITE_BEHIND.pending_rows(),
+                                limit, filters, after)
+        source = "db"
+    else:
+        CACHE_FALLBACKS.inc(op="users_page")
+        page, more = USER_STORE.query(filters, after, limit)
+        source = "cache"
+    return {"users": [project(u, cols) for u in page], "count": len(page),
+            "next_cursor": encode_cursor(page[-1]) if more else None,
+            "has_more": more, "source": source}
+
+# ── 3a. STREAMING EXPORT (CSV / NDJSON) ─────────────────────
+@app.get("/api/export/{table}")
+def api_export(table: str, format: str = "csv", fields: Optional[str] = None,
+               gzip: bool = False):
+    """
+    Whole users or sme_dataset table, keyset-paged from storage and written
+    to the response page by page — memory stays flat whatever the row count.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(400, f"format must be one of {list(EXPORT_FORMATS)}")
+    try:
+        cols = export_columns(table, fields)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+    rows, st = None, get_store()
+    if st:
+        if table == "users":
+            WRITE_BEHIND.flush()          # acknowledged rows belong in the export
+        scan = st.scan(table, cols, page_size=EXPORT_PAGE)
+        try:
+            # pull the first page here so a dead database is an error status,
+            # not a truncated 200
+            with timed(DB_SECONDS, DB_ERRORS, op="export"):
+                first = next(scan, None)
+            rows = itertools.chain([first] if first else [], scan)
+        except Exception as e:
+            print(f"DB error: {e}")
+    if rows is None and table == "users":
+        CACHE_FALLBACKS.inc(op="export")
+        rows = iter(sorted(USER_STORE.values(), key=lambda u: u["id"]))
+    elif rows is None:
+        raise HTTPException(503, "sme_dataset export needs a storage backend")
+
+    name = f"{table}-{datetime.now():%Y%m%d}.{format}" + (".gz" if gzip else "")
+    body = export_stream(rows, format, cols, gzip,
+                         lambda n: EXPORT_ROWS.inc(n, table=table, format=format))
+    return StreamingResponse(
+        body, media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"',
+                 "Cache-Control": "no-store"})
 
 # ── 4. GET USER BY ID ────────────────────────────────────────
 @app.get("/api/users/{user_id}")
-def api_get_user(user_id: str):
-    user = db_get_user(user_id) or USERS_CACHE.get(user_id)
+def api_get_user(user_id: str, response: Response,
+                 forecast_mode: Optional[str] = None):
+    timer = StageTimer(STAGE_SECONDS, "get_user")
+    with timer("db"):
+        user = db_get_user(user_id)
+        if not user and user_id in USER_STORE:    # not flushed yet
+            CACHE_FALLBACKS.inc(op="get_user")
+            user = USER_STORE.get(user_id)
     if not user:
         raise HTTPException(404, f"User {user_id} not found")
     revenue = user.get("monthly_revenue",
               REVENUE_PATTERNS.get(user.get("business_type","festival_retail"),
               REVENUE_PATTERNS["festival_retail"]))
-    calendar = calc_repayment_calendar(
-        user["loan_amount"], user["interest_rate"] or 16, revenue)
-    offers   = calc_lender_offers(user["season_score"], user["loan_amount"])
-    forecast = forecast_peaks(revenue)
+    with timer("calendar"):
+        calendar = calc_repayment_calendar(
+            user["loan_amount"], user["interest_rate"] or 16, revenue)
+    with timer("offers"):
+        offers   = calc_lender_offers(user["season_score"], user["loan_amount"],
+                                       user.get("state"), user.get("business_type"))
+    with timer("forecast"):
+        forecast, job_id = start_forecast(revenue, forecast_mode)
+    timer.finish(response)
     return {"user": user, "calendar": calendar,
-            "offers": offers, "forecast": forecast}
+            "offers": offers, "forecast": forecast,
+            "forecast_job_id": job_id}
+
+# ── 4a. FORECAST JOB (poll / long-poll) ──────────────────────
+@app.get("/api/forecast/{job_id}")
+async def api_forecast(job_id: str, wait: float = 0):
+    job = await FORECAST_JOBS.wait(job_id, min(max(wait, 0), 30))
+    if not job:
+        raise HTTPException(404, f"Forecast job {job_id} not found")
+    return job
+
+@app.post("/api/forecast-batch")
+def api_forecast_batch(req: BatchForecastRequest):
+    if len({len(r) for r in req.revenues}) > 1:
+        raise HTTPException(400, "All revenue rows must have the same length")
+    if any(len(r) < 6 for r in req.revenues):
+        raise HTTPException(400, "Need at least 6 monthly revenue values")
+    forecasts = harmonic_forecast_batch(req.revenues) if req.revenues else []
+    return {"forecasts": forecasts, "total": len(forecasts)}
+
+@app.get("/api/forecast-stats")
+def api_forecast_stats():
+    return {"jobs": {**FORECAST_JOBS.stats,
+                     "pending": FORECAST_JOBS.pending()},
+            "cache": FORECAST_CACHE.info(),
+            "prophet_pool": PROPHET_POOL.info()}
+
+# ── 4b. BATCH SCORE (nightly rescoring) ──────────────────────
+@app.post("/api/score-batch")
+def api_score_batch(req: BatchScoreRequest):
+    bad = [i for i, r in enumerate(req.revenues) if not valid_history(r)]
+    if bad:
+        raise HTTPException(400, f"{HISTORY_ERROR} (rows {bad[:10]})")
+    if req.cibil_scores is not None and len(req.cibil_scores) != len(req.revenues):
+        raise HTTPException(400, "cibil_scores must match revenues length")
+    if not req.revenues:
+        return {"results": [], "total": 0, "eligible": 0}
+    scores  = score_histories(req.revenues)
+    cibils  = req.cibil_scores or [None] * len(req.revenues)
+    results = []
+    for i, cibil in enumerate(cibils):
+        if scores[i] is None:
+            results.append({"index": i, "error": "Revenue cannot be all zeros"})
+            continue
+        adjusted = calc_cibil_adjusted_score(scores[i], cibil)
+        results.append({"index": i, **adjusted})
+    return {"results": results, "total": len(results),
+            "eligible": sum(1 for r in results if r.get("eligible"))}
 
 # ── 5. CALCULATE EMI ─────────────────────────────────────────
-@app.post("/api/calculate-emi")
-def api_emi(req: EMIRequest):
-    emi = dynamic_emi(req.monthly_sales)
-    return {"monthly_sales": req.monthly_sales, "emi": emi,
+def emi_payload(monthly_sales: float) -> dict:
+    return {"monthly_sales": monthly_sales, "emi": dynamic_emi(monthly_sales),
             "formula": "max(₹500, min(₹15,000, 10% × sales))",
-            "season": ("peak" if req.monthly_sales>100000
-                       else "rising" if req.monthly_sales>50000
+            "season": ("peak" if monthly_sales>100000
+                       else "rising" if monthly_sales>50000
                        else "off-season")}
 
+def emi_response(request: Request, monthly_sales: float):
+    cached = RESPONSE_MEMO.get(("emi", monthly_sales),
+                               lambda: emi_payload(monthly_sales))
+    return cached.response(request, f"public, max-age={HTTP_MAX_AGE}")
+
+@app.post("/api/calculate-emi")
+def api_emi(req: EMIRequest, request: Request):
+    return emi_response(request, req.monthly_sales)
+
+@app.get("/api/calculate-emi")      # cacheable form: ?monthly_sales=
+def api_emi_get(request: Request, monthly_sales: float):
+    return emi_response(request, monthly_sales)
+
+# ── 5b. REPAYMENT STRESS TEST (Monte Carlo) ─────────────────
+STRESS_MAX_PATHS = int(os.getenv("STRESS_MAX_PATHS", "20000"))
+
+@app.post("/api/stress-test")
+def api_stress_test(req: StressTestRequest):
+    if req.scenario not in SCENARIOS:
+        raise HTTPException(400, f"scenario must be one of {list(SCENARIOS)}")
+    if not 100 <= req.paths <= STRESS_MAX_PATHS:
+        raise HTTPException(400, f"paths must be between 100 and {STRESS_MAX_PATHS}")
+    loans = list(req.loans)
+    if req.portfolio:
+        loans += [StressLoan(monthly_revenue=u["monthly_revenue"],
+                             loan_amount=u["loan_amount"],
+                             interest_rate=u.get("interest_rate"),
+                             user_id=u["id"])
+                  for u in USER_STORE.values()
+                  if valid_history(u.get("monthly_revenue") or []) and u.get("loan_amount")]
+    if not loans:
+        raise HTTPException(400, "No loans to stress — pass loans or portfolio=true")
+    bad = [i for i, l in enumerate(loans) if not valid_history(l.monthly_revenue)]
+    if bad:
+        raise HTTPException(400, f"{HISTORY_ERROR} (loans {bad[:10]})")
+
+    scores   = score_histories([l.monthly_revenue for l in loans])
+    rates    = []
+    for l, score in zip(loans, scores):
+        if l.interest_rate is not None:
+            rates.append(l.interest_rate)
+        elif score is None:
+            rates.append(16)
+        else:   # same fallback the repayment calendar uses
+            rates.append(calc_cibil_adjusted_score(score, l.cibil_score)["rate"] or 16)
+    # the paths simulate the repayment year, planned like the calendar
+    revenues = [seasonal_profile(l.monthly_revenue) for l in loans]
+    res = stress_test(revenues, [l.loan_amount for l in loans], rates,
+                      paths=req.paths, scenario=req.scenario, seed=req.seed,
+                      shared=req.shared_shocks)
+    for l, out, rate in zip(loans, res["loans"], rates):
+        out.update(user_id=l.user_id, loan_amount=round(l.loan_amount),
+                   interest_rate=rate)
+    return res
+
+# ── 5c. UPI TRANSACTION STREAM ───────────────────────────────
+@app.post("/api/upi/events")
+def api_upi_events(batch: UpiBatch, response: Response):
+    """
+    Batches of UPI credits. Each event adds to its business's open-month
+    counter; an event from a later month closes the month, and the
+    businesses whose history changed are rescored with their EMI and
+    balance updated.
+    """
+    if len(batch.events) > UPI_MAX_BATCH:
+        raise HTTPException(413, f"At most {UPI_MAX_BATCH} events per batch")
+    timer = StageTimer(STAGE_SECONDS, "upi_events")
+    now   = month_key(datetime.now(IST))
+    with timer("aggregate"):
+        keyed  = [(e.user_id, e.amount, month_key(e.ts), e.txn_id) for e in batch.events]
+        future = sum(k > now for _, _, k, _ in keyed)    # clock skew / bad data
+        res    = UPI.ingest(ev for ev in keyed if ev[2] <= now)
+    with timer("rescore"):
+        rescored = upi_rescore(res["changed"])     # state is saved by the upi-saver thread
+    timer.finish(response)
+    for result, n in (("accepted", res["accepted"]), ("duplicate", res["duplicates"]),
+                      ("unknown_user", res["rejected"]), ("future", future)):
+        if n: UPI_EVENTS.inc(n, result=result)
+    return {"received": len(batch.events), "accepted": res["accepted"],
+            "duplicates": res["duplicates"], "future": future,
+            "unknown_users": res["unknown_users"], "rescored": rescored}
+
+@app.post("/api/upi/close-month")
+def api_upi_close(through: Optional[str] = None):
+    """Month-end close for businesses with no event yet in the new month
+    (default: the previous IST month)"""
+    try:
+        upto = parse_month(through) if through else month_key(datetime.now(IST)) - 1
+    except ValueError:
+        raise HTTPException(400, "through must be YYYY-MM")
+    rescored = upi_rescore(UPI.close_through(upto))
+    UPI.save()
+    return {"closed_through": month_label(upto), "rescored": rescored}
+
+@app.get("/api/upi/{user_id}")
+def api_upi_business(user_id: str, months: int = 12):
+    view = UPI.view(user_id, min(max(months, 1), 60))
+    if not view:
+        raise HTTPException(404, f"No UPI activity for {user_id}")
+    return view
+
+@app.get("/api/upi-stats")
+def api_upi_stats():
+    return UPI.info()
+
 # ── 6. LENDER OFFERS ─────────────────────────────────────────
-@app.post("/api/lender-offers")
-def api_offers(req: LoanRequest):
-    offers = calc_lender_offers(req.season_score, req.loan_amount)
+def offers_payload(offers: list) -> dict:
     return {"eligible": len(offers)>0, "offers": offers,
             "upi_flow": ["Customer scans UPI QR",
                          "10% auto-routed to escrow (EMI)",
                          "90% credited to your account"]}
 
+async def offers_response(request: Request, req: LoanRequest):
+    if req.sort not in LENDER_SORTS:
+        raise HTTPException(400, f"sort must be one of {list(LENDER_SORTS)}")
+    if req.top_k is not None and req.top_k < 1:
+        raise HTTPException(400, "top_k must be at least 1")
+    args = (req.season_score, req.loan_amount, req.state,
+            req.business_type, req.top_k, req.sort)
+    if req.season_score >= 50 and LENDERS.index.live:
+        # live partner quotes — a fresh price every time
+        offers = await live_lender_offers(*args)
+        return CachedJSON(offers_payload(offers)).response(None, "no-store")
+    cached = RESPONSE_MEMO.get(("offers", LENDERS.generation) + args,
+                               lambda: offers_payload(calc_lender_offers(*args)))
+    return cached.response(request, f"public, max-age={OFFERS_MAX_AGE}")
+
+@app.post("/api/lender-offers")
+async def api_offers(req: LoanRequest, request: Request):
+    return await offers_response(request, req)
+
+@app.get("/api/lender-offers")      # cacheable form, same fields as query params
+async def api_offers_get(request: Request, season_score: int, loan_amount: float,
+                         business_type: str = "festival_retail",
+                         state: Optional[str] = None,
+                         top_k: Optional[int] = None, sort: str = "catalog"):
+    return await offers_response(request, LoanRequest(
+        season_score=season_score, loan_amount=loan_amount,
+        business_type=business_type, state=state, top_k=top_k, sort=sort))
+
+@app.get("/api/lenders")
+def api_lenders():
+    return {**LENDERS.info(), "sorts": list(LENDER_SORTS),
+            "quotes": LENDER_QUOTES.info()}
+
 # ── 7. DATASET STATS ─────────────────────────────────────────
 @app.get("/api/dataset-stats")
 def api_dataset_stats():
-    users     = db_get_all_users()
-    all_users = list(USERS_CACHE.values()) + [
-        u for u in users if u.get("id") not in USERS_CACHE]
-    total     = max(50, len(all_users))
-    scores    = [u.get("season_score",77) for u in all_users] or [77]
+    snap  = STATS.snapshot()
+    total = snap["total"]
     return {
-        "total_records":     total,
-        "avg_season_score":  round(np.mean(scores), 1),
-        "eligible_rate":     f"{sum(1 for s in scores if s>=50)/len(scores)*100:.0f}%",
-        "avg_annual_rev":    round(np.mean([u.get("annual_revenue",1500000)
-                                            for u in all_users] or [1500000])),
-        "business_types":    8, "cities": 8,
+        "total_records":     max(50, total["count"]),
+        "avg_season_score":  total["avg_season_score"] or 77,
+        "eligible_rate":     f"{(total['eligible_rate'] if total['count'] else 1)*100:.0f}%",
+        "avg_annual_rev":    total["avg_annual_rev"] or 1500000,
+        "business_types":    len(snap["segments"]["business_type"]) or 8,
+        "cities":            len(snap["segments"]["city"]) or 8,
+        "segments":          snap["segments"],
         "data_source":       "SIDBI MSME Pulse 2023 + Live entries",
-        "live_users":        len(USERS_CACHE)
+        "live_users":        len(USER_STORE),
+        "reconciled_at":     snap["reconciled_at"],
     }
 
+# ── 7a. DATASET COHORTS (local sme_dataset snapshot) ─────
+@app.get("/api/dataset-cohort")
+def api_dataset_cohort(business_type: Optional[str] = None,
+                       city: Optional[str] = None,
+                       min_score: Optional[float] = None,
+                       max_score: Optional[float] = None,
+                       group_by: str = "business_type"):
+    if group_by not in ("business_type", "city"):
+        raise HTTPException(400, "group_by must be business_type or city")
+    if not len(SME_SNAPSHOT):
+        raise HTTPException(503, "sme_dataset snapshot not loaded yet")
+    return {**SME_SNAPSHOT.cohort(group_by, business_type=business_type,
+                                  city=city, min_score=min_score,
+                                  max_score=max_score),
+            "snapshot": SME_SNAPSHOT.info()}
+
+# ── 7b. PERSISTENCE QUEUE ────────────────────────────────────
+@app.get("/metrics")
+def api_metrics():
+    """Prometheus scrape: stage / DB histograms and fallback counters"""
+    for phase, sec in WARMUP.phases.items():
+        COLD_START.set(sec, phase=phase)
+    for step, sec in WARMUP.timings.items():
+        WARMUP_STEPS.set(sec, step=step)
+    for stat, v in RESPONSE_MEMO.info().items():
+        MEMO_STATS.set(v, stat=stat)
+    return Response(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/persistence-stats")
+def api_persistence_stats():
+    return {**WRITE_BEHIND.info(), "storage": STORE.info(),
+            "sme_snapshot": SME_SNAPSHOT.info()}
+
 # ── 8. FINANCIAL IMPACT ──────────────────────────────────────
 @app.get("/api/financial-impact")
-def api_financial_impact(loan_amount: float = 300000,
+def api_financial_impact(request: Request, loan_amount: float = 300000,
                           season_score: int = 74):
+    cached = RESPONSE_MEMO.get(("impact", loan_amount, season_score),
+                               lambda: financial_impact(loan_amount, season_score))
+    return cached.response(request, f"public, max-age={HTTP_MAX_AGE}")
+
+def financial_impact(loan_amount: float, season_score: int) -> dict:
     rate      = (12 if season_score>=80 else 14 if season_score>=65 else 16)
     total     = round(loan_amount*(1+rate/100))
     saving    = round(loan_amount*(0.40-rate/100))
@@ -533,7 +1225,11 @@ def api_financial_impact(loan_amount: float = 300000,
 
 # ── 9. DROPDOWN OPTIONS ──────────────────────────────────────
 @app.get("/api/options")
-def api_options():
+def api_options(request: Request):
+    # static for the life of the process — serialized once
+    return OPTIONS_RESPONSE.response(request, f"public, max-age={HTTP_MAX_AGE}")
+
+def options_payload() -> dict:
     return {
         "business_types": [
             {"value":"festival_retail", "label":"Festival Garment / Diwali Retailer"},
@@ -567,3 +1263,7 @@ def api_options():
         "account_types": ["Savings Account","Current Account",
                           "Jan Dhan Account","Business Account"],
     }
+
+OPTIONS_RESPONSE = CachedJSON(options_payload())
+
+WARMUP.mark("import")
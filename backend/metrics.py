@@ -0,0 +1,153 @@
+"""
+SeasonCredit v2 — Request Metrics
+Dependency-free Prometheus text exposition (format 0.0.4):
+  • Counter / Gauge / Histogram with labels, thread-safe, registered on REGISTRY
+  • StageTimer: times the steps of one request into a stage histogram and
+    renders them as a Server-Timing header
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE    = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self.metrics)
+
+REGISTRY = Registry()
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=(), registry=REGISTRY):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}
+        self.lock   = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[l]) for l in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(str(labels[l]) for l in self.labels), 0.0)
+
+    def render(self) -> str:
+        with self.lock:
+            items = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in items]
+        return "\n".join(lines) + "\n"
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels[l]) for l in self.labels)
+        with self.lock:
+            self.values[key] = float(value)
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(),
+                 buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series  = {}     # label values → [per-bucket counts…, +Inf, sum]
+        self.lock    = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[l]) for l in self.labels)
+        i   = bisect.bisect_left(self.buckets, value)   # first bound ≥ value
+        with self.lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[i]  += 1
+            s[-1] += value
+
+    def count(self, **labels) -> int:
+        s = self.series.get(tuple(str(labels[l]) for l in self.labels))
+        return sum(s[:-1]) if s else 0
+
+    def render(self) -> str:
+        with self.lock:
+            items = sorted((k, list(s)) for k, s in self.series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in items:
+            cum = 0
+            for bound, n in zip(self.buckets + (float("inf"),), s[:-1]):
+                cum += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cum}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_num(s[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cum}")
+        return "\n".join(lines) + "\n"
+
+@contextmanager
+def timed(histogram: Histogram, errors: Counter = None, **labels):
+    """Observe the block's duration; count it in `errors` if it raises"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None: errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - t0, **labels)
+
+class StageTimer:
+    """
+    Per-request stage clock:
+        timer = StageTimer(STAGE_SECONDS, "onboard")
+        with timer("score"): ...
+        timer.finish(response)     # Server-Timing header + total
+    """
+    def __init__(self, histogram: Histogram, endpoint: str):
+        self.histogram = histogram
+        self.endpoint  = endpoint
+        self.t0        = time.perf_counter()
+        self.stages    = []
+
+    @contextmanager
+    def __call__(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.stages.append((stage, dt))
+            self.histogram.observe(dt, endpoint=self.endpoint, stage=stage)
+
+    def finish(self, response=None) -> str:
+        """Record the total; returns (and sets) the Server-Timing value"""
+        total = time.perf_counter() - self.t0
+        self.histogram.observe(total, endpoint=self.endpoint, stage="total")
+        value = ", ".join(f"{s};dur={d * 1000:.2f}"
+                          for s, d in self.stages + [("total", total)])
+        if response is not None:
+            response.headers["Server-Timing"] = value
+        return value
@@ -0,0 +1,184 @@
+"""
+SeasonCredit v2 — Warm Prophet Process Pool
+Prophet fitting is CPU-bound and holds the GIL, so fits run in worker
+processes that import Prophet and do one throwaway fit at startup.
+A fit that times out keeps its in-flight slot until the worker is free.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+import multiprocessing as mp
+from typing import Callable, List, Optional
+
+MONTHS = ['Jan','Feb','Mar','Apr','May','Jun',
+          'Jul','Aug','Sep','Oct','Nov','Dec']
+
+WARMUP_REVENUE = [45000,42000,38000,35000,40000,38000,
+                  42000,55000,120000,340000,380000,95000]
+
+class PoolSaturated(RuntimeError):
+    pass
+
+def prophet_forecast(revenue: List[float]) -> dict:
+    """Fit Prophet on the history (12–60 months) and forecast the next 12 (runs in a worker)"""
+    import logging
+    import pandas as pd
+    from prophet import Prophet
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    df = pd.DataFrame({
+        'ds': pd.date_range(start='2023-01-01', periods=len(revenue), freq='MS'),
+        'y': revenue
+    })
+    m = Prophet(yearly_seasonality=True,
+                weekly_seasonality=False, daily_seasonality=False)
+    m.fit(df)
+    future = m.make_future_dataframe(periods=12, freq='MS')
+    fc     = m.predict(future)
+    nxt    = fc.tail(12).reset_index(drop=True)
+    top3   = nxt['yhat'].nlargest(3).index.tolist()
+    start  = len(revenue)
+    peaks  = [MONTHS[(start+i)%12] for i in sorted(top3)]
+    return {"model":"Facebook Prophet","peaks":peaks,
+            "confidence":"87%",
+            "forecast":[{"month":MONTHS[(start+i)%12],
+                         "predicted":round(float(r['yhat'])),
+                         "lower":round(float(r['yhat_lower'])),
+                         "upper":round(float(r['yhat_upper']))}
+                        for i,r in nxt.iterrows()]}
+
+def _warm_worker(fit: Callable = prophet_forecast):
+    # pays the pandas/Prophet import + Stan model load once per process
+    try:
+        fit(WARMUP_REVENUE)
+    except Exception:
+        pass   # Prophet missing → tasks raise and callers fall back
+
+def _warm_probe() -> int:
+    # runs only after this worker's initializer; the short hold leaves the
+    # other probes queued for workers that haven't reported yet
+    time.sleep(0.05)
+    return os.getpid()
+
+class ProphetPool:
+    def __init__(self, workers: Optional[int] = None,
+                 max_inflight: Optional[int] = None,
+                 timeout: float = 30, fit: Callable = prophet_forecast):
+        self.workers      = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or self.workers * 4
+        self.timeout      = timeout
+        self.fit      = fit     # module-level, so spawned workers can import it
+        self.pool     = None
+        self.warming  = []      # pid probes; a worker answers once it is warm
+        self.warm_pids = set()
+        self.inflight = 0
+        self.lock     = threading.RLock()   # a probe done at once calls back under it
+        self.stats    = {"fits": 0, "timeouts": 0, "saturated": 0,
+                         "errors": 0, "restarts": 0}
+
+    def start(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_warm_worker, initargs=(self.fit,))
+                # spawn every worker now so warm-up runs before traffic
+                self.warm_pids = set()
+                self._probe(self.pool, self.workers)
+
+    def _probe(self, pool, n: int):
+        """lock held: queue n pid probes"""
+        self.warming = [pool.submit(_warm_probe) for _ in range(n)]
+        for f in self.warming:
+            f.add_done_callback(lambda f, pool=pool: self._probed(pool, f))
+
+    def _probed(self, pool, fut):
+        if fut.cancelled() or fut.exception() is not None: return
+        with self.lock:
+            if self.pool is pool:
+                self.warm_pids.add(fut.result())
+
+    def wait_warm(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every worker has answered a pid probe, i.e. finished its
+        throwaway fit. One worker can answer several probes, so probes are
+        re-queued until `workers` distinct pids have been seen.
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                pool, futs = self.pool, list(self.warming)
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(futs, timeout=left)
+            if pending or any(f.cancelled() or f.exception() for f in done):
+                return False
+            with self.lock:
+                if self.pool is not pool: continue        # restarted meanwhile
+                missing = self.workers - len(self.warm_pids)
+                if missing <= 0: return True
+                self._probe(pool, missing)
+
+    def forecast(self, revenue: List[float]) -> dict:
+        """Raises PoolSaturated / TimeoutError / the worker's error"""
+        self.start()
+        with self.lock:
+            if self.inflight >= self.max_inflight:
+                self.stats["saturated"] += 1
+                raise PoolSaturated("Prophet pool saturated")
+            self.inflight += 1
+            pool = self.pool
+        try:
+            try:
+                fut = pool.submit(self.fit, list(revenue))
+            except Exception:
+                self._release()
+                raise
+            # the slot is freed when the worker is, not when we stop waiting:
+            # a running fit can't be cancelled and still holds its process
+            fut.add_done_callback(self._release)
+            try:
+                result = fut.result(timeout=self.timeout)
+            except FutureTimeout:
+                self._count("timeouts")
+                raise TimeoutError(f"Prophet fit exceeded {self.timeout}s")
+            self._count("fits")
+            return result
+        except Exception as e:
+            if type(e).__name__ == "BrokenProcessPool":
+                self._restart(pool)
+            if not isinstance(e, TimeoutError):
+                self._count("errors")
+            raise
+
+    def _release(self, _fut=None):
+        with self.lock:
+            self.inflight -= 1
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _restart(self, broken):
+        with self.lock:
+            if self.pool is broken:
+                self.pool = None
+                self.stats["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def info(self) -> dict:
+        with self.lock:
+            return {**self.stats, "workers": self.workers,
+                    "inflight": self.inflight,
+                    "max_inflight": self.max_inflight,
+                    "timeout": self.timeout,
+                    "started": self.pool is not None,
+                    "warm": len(self.warm_pids) >= self.workers}
+
+    def shutdown(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
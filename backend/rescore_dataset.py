@@ -0,0 +1,142 @@
+"""
+SeasonCredit v2 — Rescore sme_dataset with the current SeasonScore™ engine
+Pages the table into a columnar revenue matrix, rescores every business in
+one vectorized pass, diffs against the stored season_score / eligible_loan /
+interest_rate and (with --apply) upserts only the rows that changed.
+Run: python3 rescore_dataset.py [--apply] [--page-size 1000] [--batch-size 500]
+                                [--concurrency 4] [--report rescore.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+from database import SME_MONTHS
+from storage import get_storage
+load_dotenv()
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml_engine"))
+from season_engine import score_matrix
+
+STORED = ("season_score", "eligible_loan", "interest_rate")
+
+def load_dataset(store, page_size: int = 1000) -> dict:
+    """
+    Keyset-paged read (ordered by id) into columns: ids, an (N, 12) revenue
+    matrix (NaN = missing month) and the stored score columns (NaN = NULL).
+    """
+    cols = ("id",) + STORED + tuple(SME_MONTHS)
+    ids, vals = [], []
+    for r in store.scan("sme_dataset", cols, page_size=page_size):
+        ids.append(r["id"])
+        vals.append([np.nan if r.get(c) is None else float(r[c])
+                     for c in SME_MONTHS + list(STORED)])
+        if len(ids) % page_size == 0:
+            print(f"   📥 {len(ids)} rows read")
+    data = (np.array(vals, dtype=np.float64) if vals
+            else np.zeros((0, 12 + len(STORED))))
+    return {"ids": ids, "revenue": np.ascontiguousarray(data[:, :12]),
+            **{c: data[:, 12 + i] for i, c in enumerate(STORED)}}
+
+def rate_band(rate: np.ndarray) -> np.ndarray:
+    """Bucket rates onto the engine's 12 / 14 / 16 % bands (NaN = ineligible)"""
+    return np.select([rate <= 12, rate <= 14, rate <= 16],
+                     ["12%", "14%", "16%"], "ineligible")
+
+def rescore(data: dict) -> dict:
+    """Diff stored scores against the current engine; no I/O"""
+    rev    = data["revenue"]
+    usable = ~np.isnan(rev).any(axis=1)
+    usable[usable] = rev[usable].sum(axis=1) > 0
+    s = score_matrix(np.where(usable[:, None], rev, 1.0))
+
+    new_score = s["total"].astype(np.float64)
+    new_loan  = s["max_loan"].astype(np.float64)
+    new_rate  = s["rate"]
+    old_score, old_loan, old_rate = (data[c] for c in STORED)
+
+    changed = usable & ((old_score != new_score) | (old_loan != new_loan) |
+                        ~((old_rate == new_rate) | (np.isnan(old_rate) & np.isnan(new_rate))))
+    old_elig = old_score >= 50
+    new_elig = s["eligible"]
+    old_band, new_band = rate_band(old_rate), rate_band(new_rate)
+    old_band[~old_elig] = "ineligible"
+
+    idx  = np.flatnonzero(changed)
+    rows = [{"id": data["ids"][i], "season_score": int(new_score[i]),
+             "eligible_loan": float(new_loan[i]),
+             "interest_rate": None if np.isnan(new_rate[i]) else float(new_rate[i])}
+            for i in idx]
+    moves = Counter(f"{old_band[i]} → {new_band[i]}" for i in idx
+                    if old_band[i] != new_band[i])
+    delta = (new_score - old_score)[changed & ~np.isnan(old_score)]
+    return {
+        "rows": len(data["ids"]),
+        "unscorable": int((~usable).sum()),
+        "changed": int(changed.sum()),
+        "became_eligible":   int((usable & ~old_elig & new_elig).sum()),
+        "became_ineligible": int((usable & old_elig & ~new_elig).sum()),
+        "rate_band_changes": dict(moves.most_common()),
+        "score_delta": {"mean": round(float(delta.mean()), 2) if delta.size else 0.0,
+                        "min": int(delta.min()) if delta.size else 0,
+                        "max": int(delta.max()) if delta.size else 0},
+        "updates": rows,
+    }
+
+def write_changes(store, rows: list, batch_size: int = 500, concurrency: int = 4) -> int:
+    """Upsert only id + the rescored columns; returns rows written"""
+    def send(batch):
+        try:
+            return store.upsert("sme_dataset", batch)
+        except Exception as e:
+            print(f"   ❌ {batch[0]['id']}…{batch[-1]['id']}: {e}")
+            return 0
+    batches = [rows[i:i+batch_size] for i in range(0, len(rows), batch_size)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(send, batches))
+
+def main(apply: bool = False, page_size: int = 1000, batch_size: int = 500,
+         concurrency: int = 4, report: str = None):
+    store = get_storage()
+    if not store.available():
+        print("❌ SUPABASE_URL / SUPABASE_KEY not set in .env "
+              "(or use STORAGE_BACKEND=sqlite)"); return
+
+    t0   = time.perf_counter()
+    data = load_dataset(store, page_size)
+    t1   = time.perf_counter()
+    res  = rescore(data)
+    t2   = time.perf_counter()
+
+    print(f"\n📊 {res['rows']} businesses — read {t1-t0:.2f}s, scored {(t2-t1)*1000:.1f}ms")
+    print(f"   changed:           {res['changed']}")
+    print(f"   unscorable:        {res['unscorable']}")
+    print(f"   became eligible:   {res['became_eligible']}")
+    print(f"   became ineligible: {res['became_ineligible']}")
+    print(f"   score delta:       {res['score_delta']}")
+    for move, n in res["rate_band_changes"].items():
+        print(f"   rate band {move}: {n}")
+    if report:
+        with open(report, "w") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+        print(f"📝 Report written to {report}")
+
+    if not apply:
+        print("\n🔎 Dry run — rerun with --apply to write the changes"); return
+    written = write_changes(store, res["updates"], batch_size, concurrency)
+    print(f"\n🎉 {written} of {res['changed']} rows updated in sme_dataset")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rescore sme_dataset with the current engine")
+    ap.add_argument("--apply", action="store_true", help="write changed rows (default: dry run)")
+    ap.add_argument("--page-size",   type=int, default=1000)
+    ap.add_argument("--batch-size",  type=int, default=int(os.getenv("UPLOAD_BATCH_SIZE", "500")))
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("UPLOAD_CONCURRENCY", "4")))
+    ap.add_argument("--report", help="write the full diff as JSON")
+    a = ap.parse_args()
+    main(a.apply, a.page_size, a.batch_size, a.concurrency, a.report)
@@ -0,0 +1,344 @@
+"""
+SeasonCredit v2 — Pluggable Storage
+One interface for the users / sme_dataset operations, two engines:
+  • SupabaseStorage — PostgREST over the pooled client (database.get_client)
+  • SQLiteStorage   — embedded file database for single-node deployments and
+                      load tests: WAL journal, one connection per thread,
+                      fixed parameterised SQL (sqlite3 keeps each statement
+                      prepared in its cache), indexes on id / created_at /
+                      business_type
+STORAGE_BACKEND=supabase|sqlite picks one; SQLITE_PATH sets the file.
+Every method raises on database errors; callers decide the fallback.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from database import check_client, get_client, handle_db_error
+from user_query import apply_filters
+
+STORAGE_BACKENDS = ("supabase", "sqlite")
+TABLES = ("users", "sme_dataset")
+SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seasoncredit.db")
+
+def _columns(columns) -> List[str]:
+    if columns in (None, "*"): return ["*"]
+    cols = columns.split(",") if isinstance(columns, str) else list(columns)
+    return [c.strip() for c in cols if c.strip()]
+
+# ═══════════════════════════════════════════════════════════════
+# SUPABASE
+# ═══════════════════════════════════════════════════════════════
+
+class SupabaseStorage:
+    name = "supabase"
+
+    def _sb(self):
+        sb = get_client()
+        if sb is None:
+            raise RuntimeError("Supabase not configured")
+        return sb
+
+    @staticmethod
+    def _run(q):
+        try:
+            return q.execute()
+        except Exception as e:
+            handle_db_error(e)
+            raise
+
+    def available(self) -> bool:
+        return get_client() is not None
+
+    def check(self) -> bool:
+        return check_client()
+
+    def upsert(self, table: str, rows: List[dict]) -> int:
+        # one PostgREST bulk upsert per column set (e.g. onboard vs add-user rows)
+        groups = {}
+        for r in rows:
+            groups.setdefault(tuple(sorted(r)), []).append(r)
+        for batch in groups.values():
+            self._run(self._sb().table(table).upsert(batch))
+        return len(rows)
+
+    def get(self, table: str, row_id: str) -> Optional[dict]:
+        r = self._run(self._sb().table(table).select("*").eq("id", row_id))
+        return r.data[0] if r.data else None
+
+    def users_page(self, limit: int, after: Optional[Tuple[str, str]],
+                   filters: dict, cols: Optional[List[str]] = None) -> List[dict]:
+        """Newest-first keyset page, limit+1 rows so the caller sees has_more"""
+        q = self._sb().table("users").select(",".join(cols) if cols else "*")
+        q = apply_filters(q, filters, after)
+        r = self._run(q.order("created_at", desc=True).order(
+            "id", desc=True).limit(limit + 1))
+        return r.data or []
+
+    def scan(self, table: str, columns="*", since: Optional[str] = None,
+             page_size: int = 1000) -> Iterator[dict]:
+        """Every row ordered by id, keyset-paged; since= filters updated_at"""
+        sb, last = self._sb(), None
+        sel = ",".join(_columns(columns))
+        while True:
+            q = sb.table(table).select(sel)
+            if since: q = q.gte("updated_at", since)
+            if last is not None: q = q.gt("id", last)
+            rows = self._run(q.order("id").limit(page_size)).data or []
+            yield from rows
+            if len(rows) < page_size: return
+            last = rows[-1]["id"]
+
+    def count(self, table: str) -> int:
+        return self._run(self._sb().table(table).select(
+            "id", count="exact").limit(1)).count
+
+    def info(self) -> dict:
+        return {"backend": self.name, "configured": self.available()}
+
+    def close(self):
+        pass
+
+# ═══════════════════════════════════════════════════════════════
+# SQLITE
+# ═══════════════════════════════════════════════════════════════
+
+SQLITE_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+  id               TEXT PRIMARY KEY,
+  full_name        TEXT NOT NULL,
+  mobile           TEXT,
+  email            TEXT,
+  aadhaar_last4    TEXT,
+  pan_number       TEXT,
+  business_name    TEXT,
+  business_type    TEXT,
+  business_address TEXT,
+  city             TEXT,
+  state            TEXT,
+  pincode          TEXT,
+  years_active     INTEGER,
+  num_employees    INTEGER DEFAULT 1,
+  gst_number       TEXT,
+  udyam_number     TEXT,
+  bank_name        TEXT,
+  account_number   TEXT,
+  ifsc_code        TEXT,
+  account_type     TEXT,
+  upi_id           TEXT,
+  loan_amount      REAL,
+  loan_purpose     TEXT,
+  has_cibil        INTEGER DEFAULT 0,
+  cibil_score      INTEGER,
+  season_score     INTEGER,
+  interest_rate    REAL,
+  eligible         INTEGER,
+  peak_months      TEXT,               -- JSON array
+  annual_revenue   REAL,
+  max_loan         REAL,
+  status           TEXT DEFAULT 'active',
+  created_at       TEXT
+);
+CREATE INDEX IF NOT EXISTS users_created_id_idx ON users (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS users_business_type_idx ON users (business_type, created_at DESC);
+CREATE INDEX IF NOT EXISTS users_state_idx ON users (state, created_at DESC);
+CREATE INDEX IF NOT EXISTS users_eligible_idx ON users (eligible, has_cibil, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS sme_dataset (
+  id               TEXT PRIMARY KEY,
+  business_name    TEXT,
+  business_type    TEXT,
+  city             TEXT,
+  years_active     INTEGER,
+  peak_season      TEXT,
+  off_season       TEXT,
+  annual_revenue   REAL,
+  season_score     INTEGER,
+  eligible_loan    REAL,
+  interest_rate    REAL,
+  supplier_split   REAL,
+  operations_split REAL,
+  upi_payment      REAL,
+  default_risk     REAL,
+  jan REAL, feb REAL, mar REAL, apr REAL, may REAL, jun REAL,
+  jul REAL, aug REAL, sep REAL, oct REAL, nov REAL, dec REAL,
+  updated_at       TEXT
+);
+CREATE INDEX IF NOT EXISTS sme_dataset_business_type_idx ON sme_dataset (business_type);
+CREATE INDEX IF NOT EXISTS sme_dataset_updated_idx ON sme_dataset (updated_at);
+"""
+BOOL_COLUMNS = {"users": {"has_cibil", "eligible"}, "sme_dataset": set()}
+JSON_COLUMNS = {"users": {"peak_months"}, "sme_dataset": set()}
+
+@lru_cache(maxsize=256)
+def _upsert_sql(table: str, cols: Tuple[str, ...]) -> str:
+    sets = ",".join(f"{c}=excluded.{c}" for c in cols if c != "id")
+    return (f"INSERT INTO {table} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))}) "
+            f"ON CONFLICT(id) DO " + (f"UPDATE SET {sets}" if sets else "NOTHING"))
+
+class SQLiteStorage:
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH, busy_timeout: float = 5.0):
+        self.path  = path
+        self.busy_timeout = busy_timeout
+        self.local = threading.local()
+        self.conns = []
+        self.lock  = threading.Lock()
+        self._conn().executescript(SQLITE_SQL)
+        self.columns = {t: [r[1] for r in self._conn().execute(f"PRAGMA table_info({t})")]
+                        for t in TABLES}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                   cached_statements=256, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints, no fsync per commit
+            self.local.conn = conn
+            with self.lock:
+                self.conns.append(conn)
+        return conn
+
+    def _select(self, table: str, columns) -> str:
+        cols = _columns(columns)
+        if cols == ["*"]: return "*"
+        bad = [c for c in cols if c not in self.columns[table]]
+        if bad:
+            raise ValueError(f"Unknown {table} columns: {bad}")
+        return ",".join(cols if "id" in cols else ["id"] + cols)
+
+    def _decode(self, table: str, row: sqlite3.Row) -> dict:
+        out = dict(row)
+        for c in BOOL_COLUMNS[table]:
+            if out.get(c) is not None: out[c] = bool(out[c])
+        for c in JSON_COLUMNS[table]:
+            if out.get(c) is not None: out[c] = json.loads(out[c])
+        return out
+
+    def _encode(self, table: str, col: str, v):
+        if v is not None and col in JSON_COLUMNS[table]:
+            return json.dumps(v)
+        return v
+
+    def available(self) -> bool:
+        return True
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute("SELECT 1 FROM users LIMIT 1").fetchall()
+            return True
+        except sqlite3.Error as e:
+            print(f"DB health check failed: {e}")
+            return False
+
+    def upsert(self, table: str, rows: List[dict]) -> int:
+        """Upsert by id, touching only the columns each row carries"""
+        stamp = "updated_at" in self.columns[table]
+        now   = datetime.now(timezone.utc).isoformat()
+        groups = {}
+        for r in rows:
+            if stamp and "updated_at" not in r:
+                r = {**r, "updated_at": now}
+            groups.setdefault(tuple(r), []).append(r)
+        conn = self._conn()
+        with conn:                         # one transaction for the whole call
+            for cols, batch in groups.items():
+                bad = [c for c in cols if c not in self.columns[table]]
+                if bad:
+                    raise ValueError(f"Unknown {table} columns: {bad}")
+                conn.executemany(_upsert_sql(table, cols),
+                                 [[self._encode(table, c, r[c]) for c in cols] for r in batch])
+        return len(rows)
+
+    def get(self, table: str, row_id: str) -> Optional[dict]:
+        row = self._conn().execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+        return self._decode(table, row) if row else None
+
+    def users_page(self, limit: int, after: Optional[Tuple[str, str]],
+                   filters: dict, cols: Optional[List[str]] = None) -> List[dict]:
+        """Same contract as SupabaseStorage.users_page"""
+        where, args = [], []
+        for col in ("eligible", "has_cibil"):
+            if filters.get(col) is not None:
+                where.append(f"{col} = ?"); args.append(int(bool(filters[col])))
+        for col in ("business_type", "state"):
+            if filters.get(col):
+                where.append(f"{col} = ?"); args.append(filters[col])
+        if filters.get("min_score") is not None:
+            where.append("season_score >= ?"); args.append(filters["min_score"])
+        if filters.get("max_score") is not None:
+            where.append("season_score <= ?"); args.append(filters["max_score"])
+        if after:
+            where.append("(created_at, id) < (?, ?)"); args.extend(after)
+        sql = (f"SELECT {self._select('users', cols)} FROM users"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY created_at DESC, id DESC LIMIT ?")
+        rows = self._conn().execute(sql, (*args, limit + 1)).fetchall()
+        return [self._decode("users", r) for r in rows]
+
+    def scan(self, table: str, columns="*", since: Optional[str] = None,
+             page_size: int = 1000) -> Iterator[dict]:
+        """Every row ordered by id, keyset-paged so no read stays open long.
+        Each page is read on the connection of the thread asking for it — a
+        StreamingResponse resumes the generator on any threadpool thread"""
+        sel, last = self._select(table, columns), None
+        while True:
+            where, args = [], []
+            if since: where.append("updated_at >= ?"); args.append(since)
+            if last is not None: where.append("id > ?"); args.append(last)
+            sql = (f"SELECT {sel} FROM {table}"
+                   + (" WHERE " + " AND ".join(where) if where else "")
+                   + " ORDER BY id LIMIT ?")
+            rows = self._conn().execute(sql, (*args, page_size)).fetchall()
+            for r in rows:
+                yield self._decode(table, r)
+            if len(rows) < page_size: return
+            last = rows[-1]["id"]
+
+    def count(self, table: str) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def info(self) -> dict:
+        conn = self._conn()
+        return {"backend": self.name, "path": self.path,
+                "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0],
+                **{t: self.count(t) for t in TABLES}}
+
+    def close(self):
+        with self.lock:
+            conns, self.conns = self.conns, []
+        for c in conns:
+            try: c.close()
+            except sqlite3.Error: pass
+        self.local = threading.local()
+
+# ═══════════════════════════════════════════════════════════════
+# SELECTION
+# ═══════════════════════════════════════════════════════════════
+
+_storage = None
+_lock    = threading.Lock()
+
+def open_storage(backend: Optional[str] = None, path: Optional[str] = None):
+    backend = (backend or os.getenv("STORAGE_BACKEND") or "supabase").lower()
+    if backend == "sqlite":
+        return SQLiteStorage(path or os.getenv("SQLITE_PATH") or SQLITE_PATH)
+    if backend == "supabase":
+        return SupabaseStorage()
+    raise ValueError(f"STORAGE_BACKEND must be one of {STORAGE_BACKENDS}")
+
+def get_storage():
+    """Process-wide engine picked by STORAGE_BACKEND, created on first use"""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = open_storage()
+    return _storage
@@ -0,0 +1,44 @@
+"""
+SeasonCredit v2 — Stub Partner Quote Server (local testing)
+Answers POST /quote/{lender} like a partner NBFC pricing API, with
+configurable latency and failures so the fan-out's deadlines, hedging and
+quorum can be exercised.
+Run: STUB_LATENCY_MS=50 STUB_JITTER_MS=400 STUB_FAIL_RATE=0.1 \
+     uvicorn stub_quote_server:app --port 8100
+Per-lender overrides: ?latency_ms=…&fail_rate=…
+"""
+import asyncio
+import os
+import random
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "50"))
+JITTER_MS  = float(os.getenv("STUB_JITTER_MS", "200"))
+FAIL_RATE  = float(os.getenv("STUB_FAIL_RATE", "0.05"))
+
+app = FastAPI(title="SeasonCredit stub quote server")
+
+class QuoteRequest(BaseModel):
+    season_score:  int
+    loan_amount:   float
+    state:         Optional[str] = None
+    business_type: Optional[str] = None
+
+@app.post("/quote/{lender}")
+async def quote(lender: str, req: QuoteRequest,
+                latency_ms: Optional[float] = None,
+                fail_rate: Optional[float] = None):
+    delay = (LATENCY_MS if latency_ms is None else latency_ms) + random.uniform(0, JITTER_MS)
+    await asyncio.sleep(delay / 1000)
+    if random.random() < (FAIL_RATE if fail_rate is None else fail_rate):
+        raise HTTPException(503, "quote engine unavailable")
+    # per-lender spread so each partner prices a little differently
+    spread = (sum(map(ord, lender)) % 30) / 10 - 1.0
+    rate   = 16 - (req.season_score - 50) * 0.08 + spread + random.uniform(-0.3, 0.3)
+    return {"lender": lender, "rate": round(rate, 2),
+            "processing_fee": round(0.5 + (sum(map(ord, lender)) % 20) / 10, 1),
+            "disbursal_hours": 12 + sum(map(ord, lender)) % 48,
+            "latency_ms": round(delay)}
@@ -0,0 +1,44 @@
+"""
+SeasonCredit v2 — test setup
+The app runs in-process on a throwaway SQLite file; Supabase, the Prophet
+pre-warm and every state file are pointed away from the working tree.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+TMP     = tempfile.mkdtemp(prefix="seasoncredit-test-")
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.update({
+    "SUPABASE_URL": "", "SUPABASE_KEY": "",
+    "STORAGE_BACKEND": "sqlite",
+    "SQLITE_PATH": os.path.join(TMP, "seasoncredit.db"),
+    "UPI_STATE_PATH": os.path.join(TMP, "upi_state.json"),
+    "WRITE_BEHIND_SPOOL": os.path.join(TMP, "write_behind.spool"),
+    "SME_SNAPSHOT_DIR": os.path.join(TMP, "sme_snapshot"),
+    "FORECAST_CACHE_DIR": os.path.join(TMP, "forecast_cache"),
+    "PROPHET_PREWARM": "0",
+})
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND), "ml_engine"))
+
+ADD_USER = dict(full_name="Asha", mobile="9800000000", business_name="Asha Stores",
+                business_type="festival_retail", city="Pune", state="Maharashtra",
+                years_active=3, bank_name="SBI", account_number="1",
+                ifsc_code="SBIN0000001", account_type="savings",
+                monthly_revenue=[80000, 60000, 50000, 45000, 40000, 40000,
+                                 55000, 70000, 120000, 180000, 150000, 90000],
+                loan_amount=200000, loan_purpose="Stock")
+
+@pytest.fixture(scope="session")
+def main():
+    import main
+    return main
+
+@pytest.fixture(scope="session")
+def client(main):
+    from fastapi.testclient import TestClient
+    with TestClient(main.app) as c:
+        yield c
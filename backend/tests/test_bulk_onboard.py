@@ -0,0 +1,50 @@
+"""POST /api/bulk-onboard — line numbers and row counts across stream chunks"""
+import json
+
+import anyio
+
+from conftest import ADD_USER
+
+async def _post_chunks(app, path: str, chunks):
+    """Raw ASGI request whose body arrives exactly as `chunks`"""
+    sent, out = list(chunks), []
+    async def receive():
+        if sent:
+            body = sent.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(sent)}
+        return {"type": "http.disconnect"}
+    async def send(msg):
+        if msg["type"] == "http.response.body":
+            out.append(msg.get("body", b""))
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+             "query_string": b"", "root_path": "", "server": ("test", 80),
+             "client": ("test", 1), "headers": [(b"content-type", b"application/x-ndjson")]}
+    await app(scope, receive, send)
+    return [json.loads(l) for l in b"".join(out).decode().splitlines()]
+
+def test_long_line_split_across_chunks(main):
+    good = json.dumps(ADD_USER).encode()
+    long = b'{"full_name": "' + b"x" * (main.BULK_MAX_LINE + 1000) + b'"}'
+    body = good + b"\n" + long + b"\n" + good + b"\n"
+    cut  = len(good) + 1
+    step = main.BULK_MAX_LINE // 3              # the long line spans several chunks
+    chunks = [body[:cut + 10]] + [body[i:i + step]
+                                  for i in range(cut + 10, len(body), step)]
+    assert len(chunks) > 4
+
+    res = anyio.run(_post_chunks, main.app, "/api/bulk-onboard", chunks)
+    rows, summary = res[:-1], res[-1]["summary"]
+    assert [r["line"] for r in rows] == [1, 2, 3]
+    assert "user_id" in rows[0] and "user_id" in rows[2]
+    assert rows[1]["error"] == f"Line longer than {main.BULK_MAX_LINE} bytes"
+    assert summary == {"rows": 3, "ok": 2, "errors": 1}
+
+def test_long_line_in_one_chunk(main):
+    good = json.dumps(ADD_USER).encode()
+    long = b"[" + b"1," * main.BULK_MAX_LINE + b"1]"
+    body = long + b"\n\n" + good
+    res  = anyio.run(_post_chunks, main.app, "/api/bulk-onboard", [body])
+    assert [r.get("line") for r in res[:-1]] == [1, 3]
+    assert "error" in res[0] and "user_id" in res[1]
+    assert res[-1]["summary"] == {"rows": 2, "ok": 1, "errors": 1}
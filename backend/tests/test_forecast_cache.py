@@ -0,0 +1,36 @@
+"""ForecastCache disk tier — concurrent writers of one key"""
+import json
+import os
+import threading
+
+from forecast_cache import ForecastCache, forecast_key
+
+def test_concurrent_puts_of_one_key_leave_a_whole_entry(tmp_path, capsys):
+    cache = ForecastCache(disk_dir=str(tmp_path))
+    key   = forecast_key([1000.0] * 12, {"model": "prophet"})
+    path  = cache._path(key)
+    big   = {w: {"forecast": [{"month": m, "predicted": w * 1000 + m} for m in range(12)] * 200}
+             for w in range(8)}
+    torn, stop = [], threading.Event()
+    def writer(w):
+        for _ in range(40):
+            cache.put(key, big[w])
+    def reader():                   # every published file must parse whole
+        while not stop.is_set():
+            try:
+                with open(path) as f:
+                    json.load(f)
+            except FileNotFoundError:
+                pass
+            except ValueError as e:
+                torn.append(e)
+    r  = threading.Thread(target=reader); r.start()
+    ts = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+    [t.start() for t in ts]; [t.join() for t in ts]
+    stop.set(); r.join()
+
+    assert not torn
+    assert "disk error" not in capsys.readouterr().out
+    assert os.listdir(os.path.dirname(path)) == [f"{key}.json"]   # no stray temp files
+    fresh = ForecastCache(disk_dir=str(tmp_path))
+    assert fresh.get(key) in big.values() and fresh.stats["disk_hits"] == 1
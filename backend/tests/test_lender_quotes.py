@@ -0,0 +1,21 @@
+"""QuoteFanout — one client per event loop, every one closed on shutdown"""
+import asyncio
+
+from anyio.from_thread import start_blocking_portal
+
+from lender_quotes import QuoteFanout
+
+def test_one_client_per_loop_and_aclose_closes_all():
+    fan = QuoteFanout()
+    async def get():
+        return fan._client()
+    with start_blocking_portal() as portal:          # a second, still running loop
+        other = portal.call(get)
+        async def main():
+            mine = fan._client()
+            assert fan._client() is mine              # reused, not rebuilt
+            assert fan.info()["clients"] == 2 and mine is not other
+            await fan.aclose()
+            return mine
+        mine = asyncio.run(main())
+    assert mine.is_closed and other.is_closed
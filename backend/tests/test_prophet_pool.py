@@ -0,0 +1,38 @@
+"""ProphetPool — timed-out fits keep their slot; every worker warms up"""
+import time
+
+import pytest
+
+from prophet_pool import PoolSaturated, ProphetPool
+
+def sleepy_fit(revenue):
+    """Stand-in fit: sleeps revenue[0] seconds (the warm-up fit naps 0.3s)"""
+    time.sleep(revenue[0] if revenue[0] < 10 else 0.3)
+    return {"slept": revenue[0]}
+
+def test_timed_out_fit_keeps_its_slot():
+    pool = ProphetPool(workers=1, max_inflight=1, timeout=0.3, fit=sleepy_fit)
+    try:
+        assert pool.wait_warm(30)
+        with pytest.raises(TimeoutError):
+            pool.forecast([1.5])
+        assert pool.info()["inflight"] == 1        # still running in the worker
+        with pytest.raises(PoolSaturated):
+            pool.forecast([0])
+        deadline = time.monotonic() + 10
+        while pool.info()["inflight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.forecast([0]) == {"slept": 0}
+        assert pool.info()["inflight"] == 0
+    finally:
+        pool.shutdown()
+
+def test_wait_warm_hears_from_every_worker():
+    pool = ProphetPool(workers=3, fit=sleepy_fit)
+    try:
+        assert not pool.info()["warm"]
+        assert pool.wait_warm(60)
+        info = pool.info()
+        assert info["warm"] and len(pool.warm_pids) == 3
+    finally:
+        pool.shutdown()
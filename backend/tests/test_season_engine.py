@@ -0,0 +1,50 @@
+"""SeasonScore engine — scalar, batch and rolling-window paths agree bit for bit"""
+import json
+
+import numpy as np
+import pytest
+
+from season_engine import score_matrix, score_one, score_row
+
+def _rows(seed: int, n: int = 12):
+    rng = np.random.default_rng(seed)
+    lognormal = rng.lognormal(11, 1.2, size=(2000, n))
+    lognormal[rng.random(lognormal.shape) < 0.2] = 0
+    return np.vstack([
+        lognormal,
+        np.round(rng.lognormal(10, 0.8, size=(2000, n)), -2),           # round hundreds
+        rng.choice([0, 1000, 50000, 100000], size=(2000, n)),           # half-way ties
+        rng.integers(0, 400000, size=(2000, n)),
+    ]).tolist()
+
+def _same(a, b):
+    # equal values *and* types: 12 vs 12.0 would change the JSON
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_score_one_matches_batch_rows(seed):
+    rows   = _rows(seed)
+    scores = score_matrix(rows)
+    for i, r in enumerate(rows):
+        one = score_one(r)
+        if scores["zero_mean"][i]:
+            assert one is None
+        else:
+            assert _same(one, score_row(scores, i)), r
+
+def test_score_one_longer_history_uses_the_matrix():
+    r = _rows(3, n=30)[5]
+    assert _same(score_one(r), score_row(score_matrix([r]), 0))
+
+def test_calc_season_score_is_the_scalar_path(main):
+    r = [45000, 42000, 38000, 35000, 40000, 38000,
+         42000, 55000, 120000, 340000, 380000, 95000]
+    assert _same(main.calc_season_score(r), score_row(score_matrix(r), 0))
+
+@pytest.mark.parametrize("n", [13, 24, 36, 47, 60])
+def test_every_window_scores_like_a_rescore_of_its_prefix(n):
+    H  = np.array(_rows(n, n=n)[::8])
+    wt = score_matrix(H)["window_total"]
+    assert wt.shape == (len(H), n - 11)
+    for w in range(n - 11):
+        np.testing.assert_array_equal(wt[:, w], score_matrix(H[:, :w + 12])["total"])
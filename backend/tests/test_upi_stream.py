@@ -0,0 +1,69 @@
+"""UpiAggregator — txn_id dedupe under concurrency, atomic background saves"""
+import json
+import os
+import threading
+import time
+
+from upi_stream import UpiAggregator
+
+USER = {"id": "u1", "loan_amount": 100000, "interest_rate": 14}
+
+def slow_lookup(uid):
+    time.sleep(0.05)           # widens the unlocked gap between the two lock holds
+    return USER if uid == "u1" else None
+
+def _concurrently(n, fn):
+    out = []
+    ts  = [threading.Thread(target=lambda: out.append(fn())) for _ in range(n)]
+    [t.start() for t in ts]; [t.join() for t in ts]
+    return out
+
+def test_same_txn_in_concurrent_batches_counts_once():
+    for _ in range(10):
+        agg = UpiAggregator(slow_lookup, lambda r: r * 0.1)
+        res = _concurrently(4, lambda: agg.ingest([("u1", 500.0, 100, "T1")]))
+        assert agg.businesses["u1"].open_sum == 500.0
+        assert sum(r["accepted"] for r in res) == 1
+        assert sum(r["duplicates"] for r in res) == 3
+
+def test_unknown_user_releases_its_txn_ids():
+    agg = UpiAggregator(lambda uid: None, lambda r: 0.0)
+    r = agg.ingest([("u2", 10.0, 100, "X")])
+    assert r["rejected"] == 1 and r["unknown_users"] == ["u2"] and "X" not in agg.seen
+    agg.lookup = lambda uid: {"id": uid}
+    assert agg.ingest([("u2", 10.0, 100, "X")])["accepted"] == 1
+    assert agg.ingest([("u2", 10.0, 100, "X")])["duplicates"] == 1
+
+def test_concurrent_saves_leave_one_whole_file(tmp_path):
+    path = str(tmp_path / "upi_state.json")
+    agg  = UpiAggregator(slow_lookup, lambda r: r * 0.1, path=path)
+    agg.ingest([("u1", 1.0, 100, f"t{i}") for i in range(20000)])
+    assert all(_concurrently(8, agg.save))
+    assert os.listdir(tmp_path) == ["upi_state.json"]
+    with open(path) as f:
+        assert len(json.load(f)["seen"]) == 20000
+    fresh = UpiAggregator(slow_lookup, lambda r: 0.0, path=path)
+    assert fresh.load() == 1 and fresh.businesses["u1"].open_sum == 20000.0
+
+def test_saver_writes_only_changed_state(tmp_path):
+    path = str(tmp_path / "upi_state.json")
+    agg  = UpiAggregator(slow_lookup, lambda r: r * 0.1, path=path)
+    agg.ingest([("u1", 5.0, 100, "a")])
+    assert agg.dirty and not os.path.exists(path)     # nothing written on ingest
+    stop = agg.start_saver(interval=0.05)
+    try:
+        deadline = time.monotonic() + 5
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.1)
+        first = os.stat(path).st_mtime_ns
+        time.sleep(0.2)
+        assert os.stat(path).st_mtime_ns == first and not agg.dirty
+        agg.ingest([("u1", 5.0, 101, "b")])           # closes month 100
+        deadline = time.monotonic() + 5
+        while os.stat(path).st_mtime_ns == first and time.monotonic() < deadline:
+            time.sleep(0.02)
+        with open(path) as f:
+            assert json.load(f)["seen"] == ["a", "b"]
+    finally:
+        stop.set()
@@ -0,0 +1,48 @@
+"""UserStore — lossless numeric columns and newest-first paging"""
+import numpy as np
+
+from conftest import ADD_USER
+from user_store import UserStore
+
+def _user(uid, created, **kw):
+    return {"id": uid, "created_at": created, "season_score": 70,
+            "business_type": "kirana", "eligible": True, **kw}
+
+def test_values_outside_a_column_round_trip():
+    st = UserStore(max_records=10)
+    st.put(_user("A", "2026-01-01", cibil_score=10**12, annual_revenue=2**70,
+                 loan_amount=150000.0))
+    st.put(_user("B", "2026-01-02", cibil_score=750))
+    a = st.get("A")
+    assert a["cibil_score"] == 10**12 and a["annual_revenue"] == 2**70
+    assert a["loan_amount"] == 150000.0 and a["created_at"] == "2026-01-01"
+    assert list(a) == list(_user("A", "", cibil_score=0, annual_revenue=0, loan_amount=0))
+    assert st.get("B")["cibil_score"] == 750
+    assert sorted(st.column("cibil_score")) == [np.iinfo(np.int32).min, 750]
+    st.put(_user("A", "2026-01-01", cibil_score=800))        # back into the column
+    assert st.get("A")["cibil_score"] == 800
+
+def test_add_user_with_out_of_range_cibil(client):
+    r = client.post("/api/add-user", json={**ADD_USER, "has_cibil": True,
+                                           "cibil_score": 10**12})
+    assert r.status_code == 200, r.text
+    assert r.json()["user"]["cibil_score"] == 10**12
+
+def test_unfiltered_query_is_newest_first_by_created_at():
+    st = UserStore(max_records=100)
+    created = {f"U{i:02d}": f"2026-01-{(i * 7) % 28 + 1:02d}T00:00:00" for i in range(30)}
+    for uid, ts in created.items():            # inserted out of created_at order
+        st.put(_user(uid, ts))
+    st.put(_user("U03", created["U03"], season_score=90))    # re-put (e.g. UPI rescore)
+    st.delete("U10")
+    want = sorted(((ts, uid) for uid, ts in created.items() if uid != "U10"), reverse=True)
+
+    got, after = [], None
+    while True:
+        page, more = st.query({}, after, limit=7)
+        got += [(r["created_at"], r["id"]) for r in page]
+        if not more: break
+        after = got[-1]
+    assert got == want
+    filtered, _ = st.query({"business_type": "kirana"}, None, limit=100)
+    assert [(r["created_at"], r["id"]) for r in filtered] == want
@@ -0,0 +1,36 @@
+"""GET /api/users — keyset cursor paging, newest first"""
+from conftest import ADD_USER
+
+FLAT = [30000] * 12          # low capacity → not eligible
+
+def _page_all(client, **params):
+    rows, cursor, pages = [], None, 0
+    while True:
+        r = client.get("/api/users", params={**params, "cursor": cursor}).json()
+        assert r["count"] == len(r["users"]) <= params["limit"]
+        assert r["has_more"] == (r["next_cursor"] is not None)
+        rows += r["users"]; pages += 1
+        cursor = r["next_cursor"]
+        if not cursor: return rows, pages
+
+def test_cursor_walks_every_user_once_newest_first(client):
+    added = {}
+    for i in range(23):
+        body = {**ADD_USER, "full_name": f"Pager {i}"}
+        if i % 3 == 0: body["monthly_revenue"] = FLAT
+        if i % 4 == 0: body.update(has_cibil=True, cibil_score=720)
+        u = client.post("/api/add-user", json=body).json()["user"]
+        added[u["id"]] = u
+
+    rows, pages = _page_all(client, limit=5)
+    ids = [u["id"] for u in rows]
+    assert len(ids) == len(set(ids)) and set(added) <= set(ids)
+    assert pages == -(-len(ids) // 5)
+    keys = [(u["created_at"], u["id"]) for u in rows]
+    assert keys == sorted(keys, reverse=True)
+
+    for params, keep in (({"eligible": "true"}, lambda u: u["eligible"]),
+                         ({"has_cibil": "false"}, lambda u: not u["has_cibil"])):
+        got, _ = _page_all(client, limit=4, fields="eligible,has_cibil", **params)
+        assert all(keep(u) for u in got)
+        assert {u["id"] for u in got} & set(added) == {i for i, u in added.items() if keep(u)}
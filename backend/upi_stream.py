@@ -0,0 +1,321 @@
+"""
+SeasonCredit v2 — UPI Transaction Stream Aggregator
+Per-business monthly revenue from UPI credit events, O(1) per event:
+  • one open-month counter per business (sum, count); an event from a later
+    month closes it, and any silent months in between close at zero
+  • closed months are fixed buckets (the last MAX_MONTHS) — a late event
+    lands in its bucket and marks the month restated, nothing is re-summed
+  • txn_id de-duplication over a bounded window of recent ids (retries)
+  • month boundaries in IST; amounts < 0 are refunds / reversals
+  • loan ledger: the UPI escrow collects dynamic_emi(month revenue) when a
+    month closes; balance = total repayable − collected
+ingest() and close_through() return the businesses whose history changed —
+the caller rescores them (score_histories) and calls set_score(). State is
+saved to a JSON file by a background thread when it has changed.
+"""
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from season_engine import MAX_MONTHS, MIN_MONTHS, MONTHS, seasonal_profile
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+def month_key(ts: datetime) -> int:
+    """Calendar month in IST as year*12 + month-1 (naive times are IST)"""
+    ts = ts.astimezone(IST) if ts.tzinfo else ts
+    return ts.year * 12 + ts.month - 1
+
+def month_label(key: int) -> str:
+    return f"{key // 12}-{key % 12 + 1:02d}"
+
+def parse_month(label: str) -> int:
+    y, m = label.split("-")
+    if not 1 <= int(m) <= 12: raise ValueError(label)
+    return int(y) * 12 + int(m) - 1
+
+class Business:
+    __slots__ = ("user_id", "open_month", "open_sum", "open_count", "closed",
+                 "seeded", "emis", "total_due", "paid", "score", "updated_at")
+
+    def __init__(self, user_id: str, total_due: float):
+        self.user_id    = user_id
+        self.open_month = None
+        self.open_sum   = 0.0
+        self.open_count = 0
+        self.closed: Dict[int, List[float]] = {}    # month → [revenue, txns]
+        self.seeded     = set()      # months estimated from onboarding revenue
+        self.emis: Dict[int, float] = {}
+        self.total_due  = total_due
+        self.paid       = 0.0
+        self.score      = None
+        self.updated_at = None
+
+    def history(self) -> Tuple[int, List[float]]:
+        """(first month, revenue per month) — closed months are contiguous"""
+        if not self.closed: return 0, []
+        first, last = min(self.closed), max(self.closed)
+        return first, [self.closed[k][0] for k in range(first, last + 1)]
+
+    def balance(self) -> float:
+        return max(0.0, self.total_due - self.paid)
+
+    def to_json(self) -> dict:
+        return {"user_id": self.user_id, "open_month": self.open_month,
+                "open_sum": self.open_sum, "open_count": self.open_count,
+                "closed": [[k, *v] for k, v in sorted(self.closed.items())],
+                "seeded": sorted(self.seeded),
+                "emis": [[k, v] for k, v in sorted(self.emis.items())],
+                "total_due": self.total_due, "paid": self.paid,
+                "score": self.score, "updated_at": self.updated_at}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Business":
+        b = cls(d["user_id"], d["total_due"])
+        b.open_month, b.open_sum, b.open_count = d["open_month"], d["open_sum"], d["open_count"]
+        b.closed = {k: [rev, n] for k, rev, n in d["closed"]}
+        b.seeded = set(d["seeded"])
+        b.emis   = {k: v for k, v in d["emis"]}
+        b.paid, b.score, b.updated_at = d["paid"], d["score"], d["updated_at"]
+        return b
+
+class UpiAggregator:
+    def __init__(self, lookup: Callable[[str], Optional[dict]],
+                 emi: Callable[[float], float], dedupe_size: int = 500000,
+                 path: str = ""):
+        self.lookup = lookup           # user_id → user record (or None)
+        self.emi    = emi
+        self.dedupe_size = dedupe_size
+        self.path   = path
+        self.businesses: Dict[str, Business] = {}
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.lock   = threading.Lock()
+        self.save_lock = threading.Lock()    # one writer of the state file
+        self.dirty  = False
+        self.stats  = {"events": 0, "accepted": 0, "duplicates": 0,
+                       "unknown_user": 0, "late": 0, "late_dropped": 0,
+                       "months_closed": 0, "restated": 0}
+
+    # ── registration ─────────────────────────────────────────
+    def _register(self, user: dict, first_month: int) -> Business:
+        """Loan terms from the user; the 12 months before the first UPI month
+        are seeded from the onboarding revenue so scoring can start at once"""
+        rate = user.get("interest_rate") or 16
+        b = Business(user["id"], round((user.get("loan_amount") or 0) * (1 + rate / 100)))
+        b.open_month = first_month
+        revenue = user.get("monthly_revenue")
+        if revenue and len(revenue) >= MIN_MONTHS:
+            plan = seasonal_profile(revenue)                  # Jan…Dec
+            for k in range(first_month - 12, first_month):
+                b.closed[k] = [plan[k % 12], 0]
+                b.seeded.add(k)
+        return b
+
+    # ── per-month bookkeeping (lock held) ────────────────────
+    def _close(self, b: Business, upto: int):
+        """Close every month from the open one through `upto`"""
+        while b.open_month <= upto:
+            k = b.open_month
+            b.closed[k] = [b.open_sum, b.open_count]
+            b.emis[k]   = self.emi(b.open_sum) if b.open_sum > 0 else 0.0
+            b.paid     += b.emis[k]
+            self.stats["months_closed"] += 1
+            b.open_month, b.open_sum, b.open_count = k + 1, 0.0, 0
+        while len(b.closed) > MAX_MONTHS:
+            old = min(b.closed)
+            del b.closed[old]
+            b.emis.pop(old, None); b.seeded.discard(old)
+
+    def _late(self, b: Business, k: int, amount: float, n: int) -> bool:
+        bucket = b.closed.get(k)
+        self.stats["late"] += n
+        if bucket is None:                  # older than the kept window
+            self.stats["late_dropped"] += n
+            return False
+        if k in b.seeded:                   # real data replaces the estimate
+            b.seeded.discard(k)
+            bucket[0], bucket[1] = 0.0, 0
+        bucket[0] += amount
+        bucket[1] += n
+        if k in b.emis:                     # re-price that month's escrow
+            new = self.emi(bucket[0]) if bucket[0] > 0 else 0.0
+            b.paid += new - b.emis[k]
+            b.emis[k] = new
+        self.stats["restated"] += 1
+        return True
+
+    def _remember(self, txns: Iterable[str]):
+        for t in txns:
+            self.seen[t] = None
+        while len(self.seen) > self.dedupe_size:
+            self.seen.popitem(last=False)
+
+    # ── public API ───────────────────────────────────────────
+    def ingest(self, events: Iterable[Tuple[str, float, int, Optional[str]]]) -> dict:
+        """
+        events: (user_id, amount, month key, txn_id). The batch is summed per
+        (business, month) first, so the per-business state is touched once
+        per month present in the batch. Returns counts and `changed`, the
+        businesses with a newly closed or restated month. txn ids are
+        reserved in the first lock hold, so a concurrent batch carrying the
+        same id is a duplicate; ids of unknown users are released again.
+        """
+        acc: Dict[Tuple[str, int], list] = {}     # → [amount, events, txn ids]
+        batch, dups = {}, 0
+        with self.lock:
+            for uid, amount, k, txn in events:
+                self.stats["events"] += 1
+                if txn:
+                    if txn in self.seen or txn in batch:
+                        dups += 1
+                        continue
+                    batch[txn] = None
+                a = acc.get((uid, k))
+                if a is None: a = acc[(uid, k)] = [0.0, 0, []]
+                a[0] += amount; a[1] += 1
+                if txn: a[2].append(txn)
+            self.stats["duplicates"] += dups
+            self._remember(batch)
+            new = {uid for uid, _ in acc if uid not in self.businesses}
+
+        users = {uid: self.lookup(uid) for uid in new}     # storage reads, no lock
+        changed, unknown = set(), set()
+        with self.lock:
+            for (uid, k), (amount, n, txns) in sorted(acc.items(), key=lambda x: x[0][1]):
+                b = self.businesses.get(uid)
+                if b is None:
+                    if not users.get(uid):     # forgotten: a retry may succeed
+                        unknown.add(uid)
+                        self.stats["unknown_user"] += n
+                        for t in txns: self.seen.pop(t, None)
+                        continue
+                    b = self.businesses[uid] = self._register(users[uid], k)
+                self.stats["accepted"] += n
+                self.dirty = True
+                if k > b.open_month:
+                    self._close(b, k - 1)
+                    changed.add(uid)
+                if k == b.open_month:
+                    b.open_sum += amount
+                    b.open_count += n
+                elif self._late(b, k, amount, n):
+                    changed.add(uid)
+        return {"accepted": sum(a[1] for (u, _), a in acc.items() if u not in unknown),
+                "duplicates": dups, "unknown_users": sorted(unknown),
+                "rejected": sum(a[1] for (u, _), a in acc.items() if u in unknown),
+                "changed": sorted(changed)}
+
+    def close_through(self, upto: int) -> List[str]:
+        """Month-end: close every business's months through `upto`"""
+        changed = []
+        with self.lock:
+            for uid, b in self.businesses.items():
+                if b.open_month <= upto:
+                    self._close(b, upto)
+                    changed.append(uid)
+            self.dirty = self.dirty or bool(changed)
+        return changed
+
+    def histories(self, uids: Iterable[str]) -> List[Tuple[str, int, List[float]]]:
+        """(user_id, first month key, revenue) for each scoreable business"""
+        out = []
+        with self.lock:
+            for uid in uids:
+                b = self.businesses.get(uid)
+                if b is None: continue
+                first, rev = b.history()
+                if len(rev) >= MIN_MONTHS:
+                    out.append((uid, first, rev))
+        return out
+
+    def set_score(self, uid: str, score: int):
+        with self.lock:
+            b = self.businesses.get(uid)
+            if b is not None:
+                b.score, b.updated_at = score, datetime.now().isoformat()
+                self.dirty = True
+
+    def ledger(self, uid: str) -> Optional[dict]:
+        """Latest closed month's EMI, collected total and balance"""
+        with self.lock:
+            b = self.businesses.get(uid)
+            if b is None: return None
+            last = b.open_month - 1
+            return {"month": month_label(last), "emi_due": round(b.emis.get(last, 0.0)),
+                    "collected": round(b.paid), "balance": round(b.balance())}
+
+    def view(self, uid: str, months: int = 12) -> Optional[dict]:
+        with self.lock:
+            b = self.businesses.get(uid)
+            if b is None: return None
+            recent = sorted(b.closed)[-months:]
+            return {"user_id": uid, "season_score": b.score, "updated_at": b.updated_at,
+                    "open_month": {"month": month_label(b.open_month),
+                                   "revenue": round(b.open_sum), "txns": b.open_count},
+                    "closed_months": [{"month": month_label(k),
+                                       "label": MONTHS[k % 12],
+                                       "revenue": round(b.closed[k][0]),
+                                       "txns": int(b.closed[k][1]),
+                                       "seeded": k in b.seeded,
+                                       "emi": round(b.emis.get(k, 0.0))} for k in recent],
+                    "total_repayable": round(b.total_due),
+                    "collected": round(b.paid), "balance": round(b.balance())}
+
+    def info(self) -> dict:
+        with self.lock:
+            return {**self.stats, "businesses": len(self.businesses),
+                    "dedupe_window": len(self.seen), "dedupe_size": self.dedupe_size,
+                    "state_path": self.path or None}
+
+    # ── persistence (JSON file, written atomically) ──────────
+    def save(self) -> bool:
+        """Snapshot under the lock, write outside it; saves never overlap"""
+        if not self.path: return False
+        with self.save_lock:
+            with self.lock:
+                state = {"businesses": [b.to_json() for b in self.businesses.values()],
+                         "seen": list(self.seen), "stats": dict(self.stats)}
+                self.dirty = False
+            tmp = None
+            try:
+                fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".",
+                                           suffix=".tmp",
+                                           dir=os.path.dirname(os.path.abspath(self.path)))
+                with os.fdopen(fd, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.path)
+                return True
+            except OSError as e:
+                print(f"UPI state save error: {e}")
+                if tmp and os.path.exists(tmp): os.remove(tmp)
+                self.dirty = True              # the next tick retries
+                return False
+
+    def start_saver(self, interval: float = 30):
+        """Daemon thread: save every `interval` seconds when state changed"""
+        stop = threading.Event()
+        def loop():
+            while not stop.wait(interval):
+                if self.dirty:
+                    self.save()
+        threading.Thread(target=loop, name="upi-saver", daemon=True).start()
+        return stop
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path): return 0
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"UPI state load error: {e}")
+            return 0
+        with self.lock:
+            self.businesses = {d["user_id"]: Business.from_json(d)
+                               for d in state.get("businesses", [])}
+            self.seen  = OrderedDict.fromkeys(state.get("seen", [])[-self.dedupe_size:])
+            self.stats.update(state.get("stats", {}))
+            return len(self.businesses)
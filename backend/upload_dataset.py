@@ -1,80 +1,187 @@
 """
-SeasonCredit v2 — Upload Excel Dataset to Supabase
-Run: python3 upload_dataset.py
+SeasonCredit v2 — Upload Excel Dataset to Supabase (or SQLite)
+Streams the workbook (or a CSV) in chunks, maps columns vectorized,
+upserts batches concurrently over the pooled client and checkpoints
+progress so an interrupted upload resumes where it stopped.
+Run: python3 upload_dataset.py [--file F] [--batch-size 500]
+                               [--concurrency 4] [--chunk-size 5000] [--restart]
 """
-import pandas as pd
+import argparse
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
 from dotenv import load_dotenv
+from database import SME_MONTHS
+from storage import get_storage
 load_dotenv()
 
-def upload():
-    url = os.getenv("SUPABASE_URL","")
-    key = os.getenv("SUPABASE_KEY","")
-    if not url or "supabase.co" not in url:
-        print("❌ SUPABASE_URL not set in .env")
+DEFAULT_FILES = ["SeasonCredit_Seasonal_Business_Data.xlsx",
+                 "../SeasonCredit_Seasonal_Business_Data.xlsx"]
+
+# sheet column → (sme_dataset column, dtype, default when the column is absent)
+COLUMN_MAP = {
+    "Business_ID":        ("id",               "str",   None),
+    "Business_Name":      ("business_name",    "str",   None),
+    "Seasonal_Type":      ("business_type",    "str",   None),
+    "City":               ("city",             "str",   None),
+    "Years_Active":       ("years_active",     "int",   None),
+    "Peak_Season":        ("peak_season",      "str",   None),
+    "Off_Season":         ("off_season",       "str",   None),
+    "Annual_Revenue_INR": ("annual_revenue",   "float", None),
+    "SeasonScore":        ("season_score",     "int",   None),
+    "Eligible_Loan_INR":  ("eligible_loan",    "float", None),
+    "Interest_Rate_%":    ("interest_rate",    "float", None),
+    "Supplier_Split_%":   ("supplier_split",   "float", 60),
+    "Operations_Split_%": ("operations_split", "float", 40),
+    "UPI_Payment_%":      ("upi_payment",      "float", 10),
+    "Default_Risk_%":     ("default_risk",     "float", None),
+    **{f"{m.capitalize()}_Revenue": (m, "float", None) for m in SME_MONTHS},
+}
+
+def iter_chunks(path: str, chunk_size: int):
+    """Yield DataFrames of ≤ chunk_size rows without loading the whole file"""
+    if path.lower().endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_size)
         return
-    try:
-        from supabase import create_client
-        sb = create_client(url, key)
-        print("✅ Supabase connected")
-    except Exception as e:
-        print(f"❌ {e}"); return
-
-    for fname in ["SeasonCredit_Seasonal_Business_Data.xlsx",
-                  "../SeasonCredit_Seasonal_Business_Data.xlsx"]:
+    from openpyxl import load_workbook
+    wb   = load_workbook(path, read_only=True, data_only=True)
+    rows = wb.active.iter_rows(values_only=True)
+    header = [str(h) for h in next(rows)]
+    buf = []
+    for row in rows:
+        if row is None or all(v is None for v in row): continue
+        buf.append(row)
+        if len(buf) >= chunk_size:
+            yield pd.DataFrame(buf, columns=header); buf = []
+    if buf:
+        yield pd.DataFrame(buf, columns=header)
+    wb.close()
+
+def map_chunk(df: pd.DataFrame) -> list:
+    """Whole-column casts instead of per-cell float()/int()"""
+    missing = [c for c, (_, _, d) in COLUMN_MAP.items()
+               if d is None and c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    out = {}
+    for src, (dst, kind, default) in COLUMN_MAP.items():
+        col = df[src] if src in df.columns else pd.Series(default, index=df.index)
+        if kind == "str":
+            out[dst] = col.astype(str)
+        else:
+            col = pd.to_numeric(col, errors="coerce")
+            out[dst] = col.round().astype("Int64") if kind == "int" else col.astype(float)
+    records = pd.DataFrame(out)
+    records = records.astype(object).where(records.notna(), None)
+    return records.to_dict("records")
+
+class Checkpoint:
+    """Highest contiguous committed row for one input file"""
+    def __init__(self, path: str, source: str):
+        self.path = path
+        st = os.stat(source)
+        self.key  = {"file": os.path.abspath(source),
+                     "size": st.st_size, "mtime": int(st.st_mtime)}
+        self.rows = 0
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("source") == self.key:
+                self.rows = saved["committed_rows"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self, rows: int):
+        self.rows = rows
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.key, "committed_rows": rows}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def upload(file: str = None, batch_size: int = 500, concurrency: int = 4,
+           chunk_size: int = 5000, restart: bool = False):
+    store = get_storage()
+    if not store.available():
+        print("❌ SUPABASE_URL not set in .env (or use STORAGE_BACKEND=sqlite)")
+        return
+    print(f"✅ Storage connected ({store.name})")
+
+    for fname in ([file] if file else DEFAULT_FILES):
         if os.path.exists(fname):
             excel_file = fname; break
     else:
         print("❌ Excel file not found — place it in backend folder")
         return
 
-    df = pd.read_excel(excel_file)
-    print(f"✅ Loaded {len(df)} records")
-    print(f"   Columns: {df.columns.tolist()}")
-
-    records = []
-    for _, row in df.iterrows():
-        records.append({
-            "id":               str(row["Business_ID"]),
-            "business_name":    str(row["Business_Name"]),
-            "business_type":    str(row["Seasonal_Type"]),
-            "city":             str(row["City"]),
-            "years_active":     int(row["Years_Active"]),
-            "peak_season":      str(row["Peak_Season"]),
-            "off_season":       str(row["Off_Season"]),
-            "annual_revenue":   float(row["Annual_Revenue_INR"]),
-            "season_score":     int(row["SeasonScore"]),
-            "eligible_loan":    float(row["Eligible_Loan_INR"]),
-            "interest_rate":    float(row["Interest_Rate_%"]),
-            "supplier_split":   float(row.get("Supplier_Split_%",60)),
-            "operations_split": float(row.get("Operations_Split_%",40)),
-            "upi_payment":      float(row.get("UPI_Payment_%",10)),
-            "default_risk":     float(row["Default_Risk_%"]),
-            "jan": float(row["Jan_Revenue"]),
-            "feb": float(row["Feb_Revenue"]),
-            "mar": float(row["Mar_Revenue"]),
-            "apr": float(row["Apr_Revenue"]),
-            "may": float(row["May_Revenue"]),
-            "jun": float(row["Jun_Revenue"]),
-            "jul": float(row["Jul_Revenue"]),
-            "aug": float(row["Aug_Revenue"]),
-            "sep": float(row["Sep_Revenue"]),
-            "oct": float(row["Oct_Revenue"]),
-            "nov": float(row["Nov_Revenue"]),
-            "dec": float(row["Dec_Revenue"]),
-        })
-
-    total = 0
-    for i in range(0, len(records), 10):
-        batch = records[i:i+10]
+    ckpt = Checkpoint(f"{excel_file}.upload-checkpoint.json", excel_file)
+    if restart: ckpt.save(0)
+    if ckpt.rows:
+        print(f"↩️  Resuming after row {ckpt.rows}")
+
+    lock      = threading.Lock()
+    done      = set()          # finished batch start offsets past the watermark
+    sizes     = {}             # batch start → rows
+    failed    = []
+    committed = [ckpt.rows]
+
+    def send(start: int, batch: list):
         try:
-            sb.table("sme_dataset").upsert(batch).execute()
-            total += len(batch)
-            print(f"   ✅ {i+1}–{i+len(batch)}")
+            store.upsert("sme_dataset", batch)
+            ok = True
         except Exception as e:
-            print(f"   ❌ Batch {i+1}: {e}")
+            print(f"   ❌ Rows {start+1}–{start+len(batch)}: {e}")
+            ok = False
+        with lock:
+            if not ok:
+                failed.append(start); return
+            done.add(start)
+            # advance the checkpoint only over a contiguous committed prefix
+            while committed[0] in done:
+                done.discard(committed[0])
+                committed[0] += sizes.pop(committed[0])
+            ckpt.save(committed[0])
+        print(f"   ✅ {start+1}–{start+len(batch)}")
 
-    print(f"\n🎉 Done! {total} records uploaded to sme_dataset")
+    offset, pending = 0, set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for chunk in iter_chunks(excel_file, chunk_size):
+            n = len(chunk)
+            if offset + n <= ckpt.rows:
+                offset += n; continue
+            skip    = max(0, ckpt.rows - offset)
+            records = map_chunk(chunk.iloc[skip:])
+            offset += skip
+            for i in range(0, len(records), batch_size):
+                batch = records[i:i+batch_size]
+                with lock:
+                    sizes[offset] = len(batch)
+                # keep at most 2× concurrency batches in memory
+                while len(pending) >= concurrency * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending.add(pool.submit(send, offset, batch))
+                offset += len(batch)
+        wait(pending)
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} batches failed — {committed[0]} of {offset} "
+              f"rows committed; rerun to resume from row {committed[0]+1}")
+        return
+    ckpt.clear()
+    print(f"\n🎉 Done! {committed[0]} records uploaded to sme_dataset")
 
 if __name__ == "__main__":
-    upload()
+    ap = argparse.ArgumentParser(description="Upload SME dataset to Supabase")
+    ap.add_argument("--file")
+    ap.add_argument("--batch-size",  type=int, default=int(os.getenv("UPLOAD_BATCH_SIZE", "500")))
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("UPLOAD_CONCURRENCY", "4")))
+    ap.add_argument("--chunk-size",  type=int, default=5000)
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    a = ap.parse_args()
+    upload(a.file, a.batch_size, a.concurrency, a.chunk_size, a.restart)
@@ -0,0 +1,94 @@
+"""
+SeasonCredit v2 — /api/users query helpers
+Keyset pagination on (created_at, id) DESC, filter push-down to PostgREST,
+field projection, and the same semantics for in-memory rows.
+"""
+import base64
+import json
+from typing import List, Optional, Tuple
+
+USER_COLUMNS = (
+    "id","full_name","mobile","email","aadhaar_last4","pan_number",
+    "business_name","business_type","business_address","city","state",
+    "pincode","years_active","num_employees","gst_number","udyam_number",
+    "bank_name","account_number","ifsc_code","account_type","upi_id",
+    "loan_amount","loan_purpose","has_cibil","cibil_score","season_score",
+    "interest_rate","eligible","peak_months","annual_revenue","max_loan",
+    "status","created_at",
+)
+
+class QueryError(ValueError):
+    pass
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([str(row.get("created_at") or ""), str(row.get("id") or "")])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    if not cursor: return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, uid = json.loads(raw)
+        return str(ts), str(uid)
+    except Exception:
+        raise QueryError("Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """fields=a,b,c → column list (id + created_at always kept for cursors)"""
+    if not fields: return None
+    cols = [f.strip() for f in fields.split(",") if f.strip()]
+    bad  = [c for c in cols if c not in USER_COLUMNS]
+    if bad:
+        raise QueryError(f"Unknown fields: {bad}")
+    return ["id", "created_at"] + [c for c in cols if c not in ("id", "created_at")]
+
+def sort_key(row: dict) -> Tuple[str, str]:
+    return (str(row.get("created_at") or ""), str(row.get("id") or ""))
+
+def matches(row: dict, f: dict, after: Optional[Tuple[str, str]] = None) -> bool:
+    if after and not sort_key(row) < after: return False
+    if f.get("eligible") is not None and bool(row.get("eligible")) != f["eligible"]: return False
+    if f.get("has_cibil") is not None and bool(row.get("has_cibil")) != f["has_cibil"]: return False
+    if f.get("business_type") and row.get("business_type") != f["business_type"]: return False
+    if f.get("state") and row.get("state") != f["state"]: return False
+    score = row.get("season_score")
+    if f.get("min_score") is not None and (score is None or score < f["min_score"]): return False
+    if f.get("max_score") is not None and (score is None or score > f["max_score"]): return False
+    return True
+
+def apply_filters(q, f: dict, after: Optional[Tuple[str, str]] = None):
+    """Push filters + keyset predicate into a PostgREST query builder"""
+    for col in ("eligible", "has_cibil"):
+        if f.get(col) is not None:
+            q = q.eq(col, str(f[col]).lower())
+    for col in ("business_type", "state"):
+        if f.get(col):
+            q = q.eq(col, f[col])
+    if f.get("min_score") is not None: q = q.gte("season_score", f["min_score"])
+    if f.get("max_score") is not None: q = q.lte("season_score", f["max_score"])
+    if after:
+        ts, uid = after
+        q = q.or_(f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt."{uid}")')
+    return q
+
+def project(row: dict, cols: Optional[List[str]]) -> dict:
+    return {c: row.get(c) for c in cols} if cols else row
+
+def merge_page(db_rows: List[dict], extra: List[dict], limit: int,
+               f: dict, after: Optional[Tuple[str, str]] = None):
+    """
+    db_rows: already filtered + sorted DESC (up to limit+1)
+    extra:   unsorted rows not yet in the DB (write-behind, cache)
+    Returns (page, has_more); linear in the page + extra size.
+    """
+    seen  = {r.get("id") for r in db_rows}
+    extra = sorted((r for r in extra if r.get("id") not in seen
+                    and matches(r, f, after)), key=sort_key, reverse=True)
+    page, i, j = [], 0, 0
+    while len(page) < limit + 1 and (i < len(db_rows) or j < len(extra)):
+        if j >= len(extra) or (i < len(db_rows) and
+                               sort_key(db_rows[i]) >= sort_key(extra[j])):
+            page.append(db_rows[i]); i += 1
+        else:
+            page.append(extra[j]); j += 1
+    return page[:limit], len(page) > limit
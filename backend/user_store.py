@@ -0,0 +1,237 @@
+"""
+SeasonCredit v2 — Bounded In-Memory User Store
+Holds live users between Supabase round-trips:
+  • numeric fields live in NumPy columns (one slot per user)
+  • everything else in a __slots__ record holding a value tuple — so is a
+    number that doesn't fit its column (e.g. an int32 overflow), losslessly
+  • secondary indexes on business_type / state / eligible / has_cibil
+  • a sorted (created_at, id) list for newest-first paging
+  • capped at max_records; the oldest-inserted user is evicted first
+"""
+import math
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+NUMERIC = {"season_score": np.int16, "annual_revenue": np.int64,
+           "max_loan": np.int64, "loan_amount": np.float64,
+           "interest_rate": np.float64, "cibil_score": np.int32}
+FLAGS   = ("eligible", "has_cibil")
+INDEXED = ("business_type", "state", "eligible", "has_cibil")
+_NONE_INT = {np.int16: np.iinfo(np.int16).min, np.int64: np.iinfo(np.int64).min,
+             np.int32: np.iinfo(np.int32).min}
+_MAX_INT  = {dt: np.iinfo(dt).max for dt in _NONE_INT}
+_NO_SPILL = frozenset()
+
+def _column_value(dt, v):
+    """v as stored in a dt column, or None when it doesn't fit there"""
+    if not isinstance(v, (int, float, np.number)): return None
+    if dt == np.float64: return float(v)
+    if isinstance(v, (float, np.floating)) and not math.isfinite(v): return None
+    v = round(v)
+    return v if _NONE_INT[dt] < v <= _MAX_INT[dt] else None
+
+class UserRecord:
+    __slots__ = ("slot", "layout", "values")
+
+    def __init__(self, slot: int, layout: tuple, values: tuple):
+        self.slot   = slot
+        self.layout = layout    # (full key order, spilled numerics), shared
+        self.values = values    # non-column values, in layout order
+
+class UserStore:
+    def __init__(self, max_records: int = 50000):
+        self.max_records = max_records
+        self.lock    = threading.RLock()
+        self.records: Dict[str, UserRecord] = {}   # insertion order (eviction)
+        self.order: List[Tuple[str, str]] = []     # sorted (created_at, id)
+        self.free    = []
+        self.size    = 0
+        self.cap     = 0
+        self.cols    = {}
+        self.layouts = {}    # (keys, spilled) → (shared key, {key: pos in values})
+        self.index   = {k: {} for k in INDEXED}
+        self.evictions = 0
+        self._grow(min(1024, max_records))
+
+    # ── storage ──────────────────────────────────────────────
+    def _grow(self, cap: int):
+        for name, dt in NUMERIC.items():
+            col = np.zeros(cap, dtype=dt)
+            if name in self.cols: col[:self.cap] = self.cols[name]
+            self.cols[name] = col
+        for name in FLAGS:
+            col = np.zeros(cap, dtype=bool)
+            if name in self.cols: col[:self.cap] = self.cols[name]
+            self.cols[name] = col
+        self.cols["_live"] = np.concatenate(
+            [self.cols.get("_live", np.zeros(0, bool)), np.zeros(cap - self.cap, bool)])
+        self.free.extend(range(cap - 1, self.cap - 1, -1))
+        self.cap = cap
+
+    def _slot(self) -> int:
+        if not self.free:
+            self._grow(min(self.max_records, self.cap * 2))
+        return self.free.pop()
+
+    def _encode(self, slot: int, rec: dict) -> UserRecord:
+        enc, spill = {}, []
+        for name, dt in NUMERIC.items():
+            v = rec.get(name)
+            enc[name] = None if v is None else _column_value(dt, v)
+            if v is not None and enc[name] is None:
+                spill.append(name)     # kept as is with the plain values
+        key = (tuple(rec), frozenset(spill) if spill else _NO_SPILL)
+        if key not in self.layouts:
+            plain = [k for k in key[0] if k not in FLAGS and (k not in NUMERIC or k in key[1])]
+            self.layouts[key] = (key, {k: i for i, k in enumerate(plain)})
+        layout, pos = self.layouts[key]
+        for name, dt in NUMERIC.items():
+            v = enc[name]
+            if v is None:
+                self.cols[name][slot] = np.nan if dt == np.float64 else _NONE_INT[dt]
+            else:
+                self.cols[name][slot] = v
+        for name in FLAGS:
+            self.cols[name][slot] = bool(rec.get(name))
+        self.cols["_live"][slot] = True
+        values = tuple(v for k, v in rec.items() if k in pos)
+        return UserRecord(slot, layout, values)
+
+    def _decode(self, r: UserRecord) -> dict:
+        out, it = {}, iter(r.values)
+        keys, spill = r.layout
+        for k in keys:
+            if k in NUMERIC and k not in spill:
+                v = self.cols[k][r.slot]
+                if NUMERIC[k] == np.float64:
+                    out[k] = None if np.isnan(v) else float(v)
+                else:
+                    out[k] = None if v == _NONE_INT[NUMERIC[k]] else int(v)
+            elif k in FLAGS:
+                out[k] = bool(self.cols[k][r.slot])
+            else:
+                out[k] = next(it)
+        return out
+
+    def _index(self, uid: str, rec: dict, add: bool):
+        for k in INDEXED:
+            if k not in rec: continue
+            v = rec[k]
+            v = bool(v) if k in FLAGS else v
+            bucket = self.index[k].setdefault(v, set())
+            if add:
+                bucket.add(uid)
+            else:
+                bucket.discard(uid)
+                if not bucket: del self.index[k][v]
+
+    # ── public API ───────────────────────────────────────────
+    def put(self, rec: dict):
+        uid = rec["id"]
+        with self.lock:
+            old = self.records.get(uid)
+            if old:
+                self._index(uid, self._decode(old), add=False)
+                self._unorder(uid)
+                slot = old.slot
+            else:
+                if self.size >= self.max_records:
+                    self._evict()
+                slot = self._slot()
+                self.size += 1
+            self.records[uid] = self._encode(slot, rec)
+            self._index(uid, rec, add=True)
+            insort(self.order, self._key(uid))
+
+    def _unorder(self, uid: str):
+        key = self._key(uid)
+        i   = bisect_left(self.order, key)
+        if i < len(self.order) and self.order[i] == key:
+            del self.order[i]
+
+    def _evict(self):
+        uid = next(iter(self.records))
+        self.delete(uid)
+        self.evictions += 1
+
+    def delete(self, uid: str):
+        with self.lock:
+            if uid not in self.records: return
+            self._unorder(uid)
+            r = self.records.pop(uid)
+            self._index(uid, self._decode(r), add=False)
+            self.cols["_live"][r.slot] = False
+            self.free.append(r.slot)
+            self.size -= 1
+
+    def get(self, uid: str, default=None) -> Optional[dict]:
+        with self.lock:
+            r = self.records.get(uid)
+            return self._decode(r) if r else default
+
+    def __contains__(self, uid) -> bool:
+        return uid in self.records
+
+    def __len__(self) -> int:
+        return self.size
+
+    def values(self) -> List[dict]:
+        with self.lock:
+            return [self._decode(r) for r in self.records.values()]
+
+    def column(self, name: str) -> np.ndarray:
+        """Live values of a numeric/flag column (NaN / sentinel = missing)"""
+        with self.lock:
+            return self.cols[name][self.cols["_live"]].copy()
+
+    def query(self, filters: dict, after: Optional[Tuple[str, str]] = None,
+              limit: int = 100) -> Tuple[List[dict], bool]:
+        """
+        Newest-first page. Equality filters come from the indexes; the score
+        range is checked on the season_score column. Without an indexed
+        filter the scan walks the sorted (created_at, id) list backwards from
+        the cursor and stops at limit+1.
+        """
+        lo, hi = filters.get("min_score"), filters.get("max_score")
+        with self.lock:
+            sets = [self.index[k].get(filters[k], set()) for k in INDEXED
+                    if filters.get(k) is not None and filters.get(k) != ""]
+            if sets:
+                sets.sort(key=len)
+                cand = set(sets[0]).intersection(*sets[1:])
+                ids  = sorted(cand, key=lambda u: self._key(u), reverse=True)
+            else:
+                end  = bisect_left(self.order, after) if after else len(self.order)
+                ids  = (self.order[i][1] for i in range(end - 1, -1, -1))
+            score = self.cols["season_score"]
+            out = []
+            for uid in ids:
+                r = self.records[uid]
+                if after and not self._key(uid) < after: continue
+                s = score[r.slot]
+                if lo is not None and (s == _NONE_INT[np.int16] or s < lo): continue
+                if hi is not None and (s == _NONE_INT[np.int16] or s > hi): continue
+                out.append(self._decode(r))
+                if len(out) > limit: break
+        return out[:limit], len(out) > limit
+
+    def _key(self, uid: str) -> Tuple[str, str]:
+        r   = self.records[uid]
+        pos = self.layouts[r.layout][1].get("created_at")
+        return (str(r.values[pos] or "") if pos is not None else "", uid)
+
+    def counts(self, field: str) -> Dict:
+        """Per-value record counts for an indexed field"""
+        with self.lock:
+            return {v: len(ids) for v, ids in self.index[field].items()}
+
+    def info(self) -> dict:
+        return {"records": self.size, "max_records": self.max_records,
+                "capacity": self.cap, "evictions": self.evictions,
+                "layouts": len(self.layouts)}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.records))
@@ -0,0 +1,60 @@
+"""
+SeasonCredit v2 — Startup Warm-up
+Runs named warm-up steps (storage connect, one pass over every hot path,
+Prophet workers' throwaway fit) on a background thread right after startup,
+so the first real request doesn't pay first-call costs. Records how long
+the process took to get from importing main to warm: the cold-start figure
+behind GET /ready and seasoncredit_cold_start_seconds.
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+class Warmup:
+    def __init__(self, t0: float):
+        self.t0     = t0            # perf_counter() when main started importing
+        self.steps: List[Tuple[str, Callable[[], object]]] = []
+        self.phases = {}            # phase → seconds since t0
+        self.timings, self.errors = {}, {}
+        self.done   = threading.Event()
+        self.thread = None
+
+    def step(self, name: str, fn: Callable[[], object]):
+        self.steps.append((name, fn))
+
+    def mark(self, phase: str) -> float:
+        """Record that `phase` (import / startup / ready) finished now"""
+        self.phases[phase] = round(time.perf_counter() - self.t0, 4)
+        return self.phases[phase]
+
+    def _run(self):
+        for name, fn in self.steps:
+            t = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:      # a cold path is still better than no path
+                self.errors[name] = str(e) or type(e).__name__
+            self.timings[name] = round(time.perf_counter() - t, 4)
+        ready = self.mark("ready")
+        self.done.set()
+        steps = ", ".join(f"{k} {v*1000:.0f}ms" for k, v in self.timings.items())
+        print(f"🔥 Warm {ready:.2f}s after boot ({steps})"
+              + (f" — failed: {self.errors}" if self.errors else ""))
+
+    def start(self, block: bool = False):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self.thread.start()
+        if block:
+            self.done.wait()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self.done.is_set()
+
+    def info(self) -> dict:
+        return {"ready": self.ready, "cold_start_s": self.phases,
+                "steps_s": self.timings, "errors": self.errors}
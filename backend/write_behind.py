@@ -0,0 +1,170 @@
+"""
+SeasonCredit v2 — Write-Behind Persistence Queue
+Requests only touch memory; a flusher thread coalesces pending rows by id
+and upserts them in batches. When the database is down, rows are appended
+to a local JSONL spool (fsync'd) and replayed on the next good flush.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+class WriteBehind:
+    """
+    flush_fn(rows) upserts one batch and returns False when no database is
+    configured (rows are then dropped, memory is the only store); it raises
+    on database errors, which sends the batch to the spool.
+    """
+    def __init__(self, flush_fn: Callable[[List[dict]], bool],
+                 interval: float = 0.5, max_batch: int = 500,
+                 spool_path: str = "write_behind.spool"):
+        self.flush_fn   = flush_fn
+        self.interval   = interval
+        self.max_batch  = max_batch
+        self.spool_path = spool_path
+        self.pending: Dict[str, dict] = {}
+        self.lock       = threading.Lock()
+        self.spool_lock = threading.Lock()
+        self.flush_lock = threading.Lock()   # one flush at a time: take → write in order
+        self.wake       = threading.Event()
+        self.stop_evt   = threading.Event()
+        self.thread     = None
+        self.retry_at   = 0.0    # replay backoff while the DB is down
+        self.backoff    = interval
+        self.stats = {"enqueued": 0, "coalesced": 0, "flushed": 0,
+                      "batches": 0, "failures": 0, "spooled": 0,
+                      "replayed": 0, "dropped": 0,
+                      "last_flush_ms": None, "max_flush_ms": 0.0}
+
+    def start(self):
+        if self.thread is None:
+            self.stop_evt.clear()
+            self.thread = threading.Thread(target=self._loop,
+                                           name="write-behind", daemon=True)
+            self.thread.start()
+
+    def enqueue(self, row: dict):
+        with self.lock:
+            if row["id"] in self.pending:
+                self.stats["coalesced"] += 1
+            self.pending[row["id"]] = row
+            self.stats["enqueued"] += 1
+            full = len(self.pending) >= self.max_batch
+        if full:
+            self.wake.set()
+
+    def depth(self) -> int:
+        with self.lock:
+            return len(self.pending)
+
+    def pending_rows(self) -> List[dict]:
+        """Rows acknowledged but not yet flushed (for read-your-writes)"""
+        with self.lock:
+            return list(self.pending.values())
+
+    def spool_depth(self) -> int:
+        with self.spool_lock:
+            try:
+                with open(self.spool_path) as f:
+                    return sum(1 for _ in f)
+            except OSError:
+                return 0
+
+    def _loop(self):
+        while not self.stop_evt.is_set():
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything pending. Serialized: a caller flushing from a
+        request thread waits for the flusher's batch (whose rows may be
+        older versions of its own) to land before taking the next one.
+        _write / _replay, and the stats and backoff they touch, only run here.
+        """
+        with self.flush_lock:
+            with self.lock:
+                rows, self.pending = list(self.pending.values()), {}
+            for i in range(0, len(rows), self.max_batch):
+                if not self._write(rows[i:i+self.max_batch]):
+                    self._spool(rows[i:])
+                    return
+            if os.path.exists(self.spool_path) and (rows or time.time() >= self.retry_at):
+                # rows just written are newer than anything spooled for them
+                self._replay({r["id"] for r in rows})
+
+    def _write(self, batch: List[dict]) -> bool:
+        t0 = time.perf_counter()
+        try:
+            saved = self.flush_fn(batch)
+        except Exception as e:
+            print(f"Write-behind flush error: {e}")
+            self.stats["failures"] += 1
+            self.backoff  = min(60.0, self.backoff * 2)
+            self.retry_at = time.time() + self.backoff
+            return False
+        self.backoff = self.interval
+        ms = (time.perf_counter() - t0) * 1000
+        self.stats["last_flush_ms"] = round(ms, 2)
+        self.stats["max_flush_ms"]  = round(max(self.stats["max_flush_ms"], ms), 2)
+        self.stats["batches"] += 1
+        self.stats["flushed" if saved else "dropped"] += len(batch)
+        return True
+
+    def _spool(self, rows: List[dict]):
+        with self.spool_lock:
+            with open(self.spool_path, "a") as f:
+                for r in rows:
+                    f.write(json.dumps(r, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.stats["spooled"] += len(rows)
+
+    def _replay(self, skip: set):
+        with self.spool_lock:
+            try:
+                with open(self.spool_path) as f:
+                    lines = f.readlines()
+            except OSError:
+                return
+            latest = {}
+            for line in lines:
+                try:
+                    r = json.loads(line)
+                    latest[r["id"]] = r
+                except (ValueError, KeyError):
+                    continue
+            with self.lock:   # rows re-enqueued since the spill win
+                for uid in skip | set(self.pending):
+                    latest.pop(uid, None)
+            rows = list(latest.values())
+            done = 0
+            for i in range(0, len(rows), self.max_batch):
+                if not self._write(rows[i:i+self.max_batch]):
+                    break
+                done = i + self.max_batch
+            tmp = f"{self.spool_path}.tmp"
+            with open(tmp, "w") as f:
+                for r in rows[done:]:
+                    f.write(json.dumps(r, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.spool_path)
+            if done >= len(rows):
+                os.remove(self.spool_path)
+            self.stats["replayed"] += min(done, len(rows))
+
+    def info(self) -> dict:
+        return {**self.stats, "queue_depth": self.depth(),
+                "spool_depth": self.spool_depth(),
+                "interval": self.interval, "max_batch": self.max_batch}
+
+    def shutdown(self):
+        self.stop_evt.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+            self.thread = None
+        self.flush()
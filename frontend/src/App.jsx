@@ -20,6 +20,20 @@ ChartJS.register(CategoryScale, LinearScale, BarElement,
 
 
 const API = "https://seasoncredit-ovf7.onrender.com"
+
+// /api/users is paged (newest first, ≤1000 per page) — follow next_cursor
+const USER_FIELDS = "full_name,business_name,city,season_score,interest_rate,loan_amount,has_cibil,eligible"
+async function fetchUsers(params = {}) {
+  const users = []
+  let cursor
+  do {
+    const r = await axios.get(`${API}/api/users`, {
+      params: { ...params, limit: 1000, fields: USER_FIELDS, cursor } })
+    users.push(...(r.data.users || []))
+    cursor = r.data.next_cursor || undefined
+  } while (cursor)
+  return users
+}
 const MONTHS = ["Jan","Feb","Mar","Apr","May","Jun",
                 "Jul","Aug","Sep","Oct","Nov","Dec"]
 
@@ -63,11 +77,11 @@ export default function App() {
     Promise.all([
       axios.get(`${API}/api/options`).catch(() => null),
       axios.get(`${API}/api/dataset-stats`).catch(() => null),
-      axios.get(`${API}/api/users`).catch(() => null),
+      fetchUsers().catch(() => null),
     ]).then(([opt, st, users]) => {
       if (opt)   setOptions(opt.data)
       if (st)    setStats(st.data)
-      if (users) setAllUsers(users.data.users || [])
+      if (users) setAllUsers(users)
     })
   }, [])
 
@@ -77,8 +91,7 @@ export default function App() {
   }
 
   function refreshUsers() {
-    axios.get(`${API}/api/users`).then(r =>
-      setAllUsers(r.data.users || [])).catch(()=>{})
+    fetchUsers().then(setAllUsers).catch(()=>{})
   }
 
   return (
@@ -1875,20 +1888,32 @@ function AddUserPage({ setPage, options, showToast,
 // DATASET PAGE
 // ════════════════════════════════════════════════════════════
 
+const USER_FILTERS = {
+  all:      null,
+  eligible: { eligible: true },
+  nocibil:  { has_cibil: false },
+}
+
 function DatasetPage({ stats, allUsers }) {
   const [search, setSearch] = useState("")
   const [filter, setFilter] = useState("all")
+  const [rows,   setRows]   = useState(allUsers)
 
-  const users = allUsers.filter(u => {
+  // filters run server-side; the text search runs over the fetched rows
+  useEffect(() => {
+    if (!USER_FILTERS[filter]) { setRows(allUsers); return }
+    let live = true
+    fetchUsers(USER_FILTERS[filter])
+      .then(us => { if (live) setRows(us) }).catch(() => {})
+    return () => { live = false }
+  }, [filter, allUsers])
+
+  const users = rows.filter(u => {
     const q = search.toLowerCase()
-    const matchSearch = !q ||
+    return !q ||
       (u.full_name||"").toLowerCase().includes(q) ||
       (u.business_name||"").toLowerCase().includes(q) ||
       (u.city||"").toLowerCase().includes(q)
-    const matchFilter = filter==="all" ||
-      (filter==="eligible" && u.eligible) ||
-      (filter==="nocibil" && !u.has_cibil)
-    return matchSearch && matchFilter
   })
 
   const typeData = {
@@ -0,0 +1,73 @@
+"""
+SeasonCredit v2 — Harmonic Regression Forecaster (NumPy only)
+y(t) = a + b·t + Σk [ck·cos(2πkt/12) + sk·sin(2πkt/12)]
+The trend term b·t is only fitted with 24+ months — one year of data
+can't separate growth from season. One least-squares solve covers the
+whole (N, 12) batch, since every business shares the same design matrix.
+Milliseconds, no Prophet.
+"""
+import numpy as np
+from typing import List
+
+MONTHS = ['Jan','Feb','Mar','Apr','May','Jun',
+          'Jul','Aug','Sep','Oct','Nov','Dec']
+
+Z_80 = 1.2816   # 80% interval, same width Prophet reports by default
+
+def _design(t: np.ndarray, harmonics: int, trend: bool) -> np.ndarray:
+    cols = [np.ones_like(t)] + ([t / 12] if trend else [])
+    for k in range(1, harmonics + 1):
+        w = 2 * np.pi * k * t / 12
+        cols += [np.cos(w), np.sin(w)]
+    return np.stack(cols, axis=1)
+
+def forecast_matrix(revenues, horizon: int = 12,
+                    harmonics: int = 4) -> dict:
+    """
+    Fit every row of an (N, n) revenue matrix and project `horizon` months.
+    Returns yhat / lower / upper (N, horizon), clipped at zero, and r2 (N,).
+    """
+    Y = np.atleast_2d(np.asarray(revenues, dtype=np.float64))
+    n = Y.shape[1]
+    trend = n >= 24
+    harmonics = max(0, min(harmonics, (n - 2 - trend) // 2))
+    X   = _design(np.arange(n, dtype=np.float64), harmonics, trend)
+    Xf  = _design(np.arange(n, n + horizon, dtype=np.float64), harmonics, trend)
+    XtX_inv = np.linalg.pinv(X.T @ X)
+    beta    = Y @ (XtX_inv @ X.T).T                     # (N, p)
+
+    resid = Y - beta @ X.T
+    dof   = max(1, n - X.shape[1])
+    sigma = np.sqrt((resid ** 2).sum(axis=1) / dof)      # (N,)
+    lev   = np.einsum("ij,jk,ik->i", Xf, XtX_inv, Xf)     # (horizon,)
+    band  = Z_80 * sigma[:, None] * np.sqrt(1 + lev)[None, :]
+
+    yhat  = beta @ Xf.T
+    ss_tot = ((Y - Y.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot > 0, 1 - (resid ** 2).sum(axis=1) / ss_tot, 1.0)
+    return {"yhat":  np.maximum(0, yhat),
+            "lower": np.maximum(0, yhat - band),
+            "upper": np.maximum(0, yhat + band),
+            "r2":    np.clip(r2, 0, 1),
+            "start_month": n % 12}
+
+def forecast_row(fc: dict, i: int) -> dict:
+    """Row i of forecast_matrix() in the same shape as the Prophet forecast"""
+    yhat, start = fc["yhat"][i], fc["start_month"]
+    top3  = np.argsort(-yhat, kind="stable")[:3]
+    return {"model": "Harmonic Regression",
+            "peaks": [MONTHS[(start + j) % 12] for j in sorted(top3)],
+            "confidence": f"{round(float(fc['r2'][i]) * 100)}%",
+            "forecast": [{"month": MONTHS[(start + j) % 12],
+                          "predicted": round(float(yhat[j])),
+                          "lower": round(float(fc["lower"][i][j])),
+                          "upper": round(float(fc["upper"][i][j]))}
+                         for j in range(len(yhat))]}
+
+def harmonic_forecast(revenue: List[float]) -> dict:
+    return forecast_row(forecast_matrix(revenue), 0)
+
+def harmonic_forecast_batch(revenues) -> List[dict]:
+    fc = forecast_matrix(revenues)
+    return [forecast_row(fc, i) for i in range(len(fc["yhat"]))]
@@ -0,0 +1,233 @@
+"""
+SeasonCredit v2 — Vectorized SeasonScore™ Engine
+Scores an (N, n) revenue matrix in one NumPy pass, n = 12…60 months of
+history starting in January (or first_month). The headline score covers the trailing 12
+months; with 24+ months growth is year-over-year, and every trailing
+12-month window is scored from a zero-copy sliding window view, exactly
+as a rescore of that prefix would score it. score_one() is the scalar path
+for a single 12-month history (per-request scoring), bit-identical to row 0
+of score_matrix().
+Shared by backend/main.py and ml_engine/season_model.py
+"""
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional
+
+MONTHS = ['Jan','Feb','Mar','Apr','May','Jun',
+          'Jul','Aug','Sep','Oct','Nov','Dec']
+MIN_MONTHS, MAX_MONTHS = 12, 60
+
+def as_revenue_matrix(revenues) -> np.ndarray:
+    """List of n-value lists (or a single list) → C-contiguous (N, n) float64"""
+    rev = np.ascontiguousarray(revenues, dtype=np.float64)
+    if rev.ndim == 1:
+        rev = rev.reshape(1, -1)
+    if rev.ndim != 2 or not MIN_MONTHS <= rev.shape[1] <= MAX_MONTHS:
+        raise ValueError(f"Expected (N, {MIN_MONTHS}…{MAX_MONTHS}) revenue matrix, "
+                         f"got {rev.shape}")
+    return rev
+
+def _seq_sum(rev: np.ndarray) -> np.ndarray:
+    # left-to-right like Python's sum(), so annual_rev matches exactly
+    acc = rev[:, 0].copy()
+    for j in range(1, rev.shape[1]):
+        acc += rev[:, j]
+    return acc
+
+def _components(mean, std, gr, peak, active):
+    """C, G, R, Rb and total from per-window statistics (any shape)"""
+    zero = mean == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        C  = np.rint(np.maximum(0, 25 - (std / mean) * 10))
+    G    = np.rint(np.clip(15 + gr * 30, 0, 25))
+    R    = np.rint(np.minimum(25, (peak / 50000) * 3))
+    Rb   = np.rint((active / 12) * 25)
+    for part in (C, G, R, Rb):
+        part[zero] = 0
+    return C, G, R, Rb, np.minimum(100, C + G + R + Rb)
+
+def _rolling_totals(rev: np.ndarray) -> np.ndarray:
+    """
+    Score of every trailing 12-month window of an (N, n) history → (N, n-11).
+    Every statistic is reduced over a zero-copy (N, W, 12) sliding view with
+    the same numpy calls score_matrix makes on the trailing 12 months, so
+    each window scores exactly what a rescore of that prefix would — prefix
+    sums drift by an ulp and flip the half-way ties np.rint rounds.
+    """
+    n   = rev.shape[1]
+    win = sliding_window_view(rev, 12, axis=1)
+    mean = win.mean(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h1 = win[..., :6].mean(axis=2); h2 = win[..., 6:].mean(axis=2)
+        gr = np.where(h1 > 0, (h2 - h1) / h1, 0.0)
+        if n >= 24:      # windows with a full year before them: YoY growth
+            annual = win[..., 0].copy()
+            for j in range(1, 12):               # _seq_sum's order
+                annual += win[..., j]
+            prev = annual[:, :-12]
+            gr[:, 12:] = np.where(prev > 0, annual[:, 12:] / prev - 1, 0.0)
+    active = (win > (mean * 0.3)[..., None]).sum(axis=2)
+    return _components(mean, win.std(axis=2), gr, win.max(axis=2), active)[-1]
+
+def score_matrix(revenues, first_month: int = 0) -> dict:
+    """
+    SeasonScore™ for every row at once. Returns a dict of arrays (length N):
+    total, consistency, growth, capacity, reliability, eligible, rate
+    (NaN = not eligible), max_loan, min_loan, annual_rev, mean_monthly,
+    peak_revenue, peak_mask (N, 12) and zero_mean (rows that cannot be scored),
+    all over the trailing 12 months; yoy (NaN below 24 months) and
+    window_total (N, n-11), the score of every trailing 12-month window.
+    first_month (0 = Jan) is the calendar month of column 0, for labels.
+    """
+    hist = as_revenue_matrix(revenues)
+    n    = hist.shape[1]
+    rev  = hist[:, -12:] if n > 12 else hist
+    mean = rev.mean(axis=1)
+    zero = mean == 0
+    yoy  = np.full(len(rev), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if n >= 24:
+            prev = _seq_sum(hist[:, -24:-12])
+            yoy  = np.where(prev > 0, _seq_sum(rev) / prev - 1, 0.0)
+            gr   = yoy
+        else:
+            h1 = rev[:, :6].mean(axis=1); h2 = rev[:, 6:].mean(axis=1)
+            gr = np.where(h1 > 0, (h2 - h1) / h1, 0.0)
+    peak = rev.max(axis=1)
+    active = (rev > (mean * 0.3)[:, None]).sum(axis=1)
+    C, G, R, Rb, total = _components(mean, rev.std(axis=1), gr, peak, active)
+    if n > 12:
+        window_total = _rolling_totals(hist)
+    else:
+        window_total = total[:, None]
+
+    rate = np.where(total >= 80, 12.0, np.where(total >= 65, 14.0,
+           np.where(total >= 50, 16.0, np.nan)))
+    eligible = total >= 50
+    mult     = 0.4 + (total - 50) * 0.004
+    max_loan = np.where(eligible, np.rint(peak * mult / 10000) * 10000, 0)
+
+    return {
+        "total": total.astype(np.int64), "consistency": C.astype(np.int64),
+        "growth": G.astype(np.int64), "capacity": R.astype(np.int64),
+        "reliability": Rb.astype(np.int64),
+        "eligible": eligible, "rate": rate,
+        "max_loan": max_loan.astype(np.int64),
+        "min_loan": np.rint(max_loan * 0.5).astype(np.int64),
+        "annual_rev": np.rint(_seq_sum(rev)).astype(np.int64),
+        "mean_monthly": np.rint(mean).astype(np.int64),
+        "peak_revenue": np.rint(peak).astype(np.int64),
+        "peak_mask": rev > (mean * 2)[:, None],
+        "zero_mean": zero,
+        "months": n, "first_month": first_month, "yoy": yoy,
+        "window_total": window_total.astype(np.int64),
+    }
+
+def score_row(scores: dict, i: int) -> dict:
+    """Row i of score_matrix() as the plain dict calc_season_score returns"""
+    rate, n = scores["rate"][i], scores["months"]
+    first   = scores["first_month"]
+    start   = first + n - 12      # calendar index of the trailing window's first value
+    row = {
+        "total": int(scores["total"][i]),
+        "consistency": int(scores["consistency"][i]),
+        "growth": int(scores["growth"][i]),
+        "capacity": int(scores["capacity"][i]),
+        "reliability": int(scores["reliability"][i]),
+        "eligible": bool(scores["eligible"][i]),
+        "rate": None if np.isnan(rate) else float(rate),
+        "peak_months": [MONTHS[(start + j) % 12]
+                        for j in np.flatnonzero(scores["peak_mask"][i])],
+        "max_loan": int(scores["max_loan"][i]),
+        "min_loan": int(scores["min_loan"][i]),
+        "annual_rev": int(scores["annual_rev"][i]),
+        "mean_monthly": int(scores["mean_monthly"][i]),
+        "peak_revenue": int(scores["peak_revenue"][i]),
+    }
+    if n > 12:
+        yoy = scores["yoy"][i]
+        row.update(history_months=n,
+                   yoy_growth=None if np.isnan(yoy) else round(float(yoy) * 100, 1),
+                   window_scores=[{"month": MONTHS[e % 12], "year": e // 12 + 1,
+                                   "score": int(t)}
+                                  for e, t in enumerate(scores["window_total"][i], first + 11)])
+    return row
+
+def score_one(revenue) -> Optional[dict]:
+    """
+    score_row(score_matrix([revenue]), 0) without building the matrix; None
+    when the revenue is all zeros. The float64 steps mirror score_matrix
+    (numpy mean / std, left-to-right annual sum, round-half-even), so the
+    dicts are identical. Longer histories go through score_matrix.
+    """
+    if len(revenue) != 12:
+        scores = score_matrix(revenue)
+        return None if scores["zero_mean"][0] else score_row(scores, 0)
+    add  = np.add.reduce           # ndarray.mean / std are add.reduce ÷ n underneath
+    rev  = np.asarray(revenue, dtype=np.float64)
+    mean = add(rev) / 12
+    if mean == 0: return None
+    dev  = rev - mean
+    std  = math.sqrt(add(dev * dev) / 12)
+    vals = rev.tolist()
+    h1   = add(rev[:6]) / 6; h2 = add(rev[6:]) / 6
+    gr   = (h2 - h1) / h1 if h1 > 0 else 0.0
+    peak = max(vals)
+    low, high = mean * 0.3, mean * 2
+    C  = round(max(0.0, 25 - (std / mean) * 10))
+    G  = round(min(25.0, max(0.0, 15 + gr * 30)))
+    R  = round(min(25.0, (peak / 50000) * 3))
+    Rb = round((sum(v > low for v in vals) / 12) * 25)
+    total = min(100, C + G + R + Rb)
+    rate  = (12.0 if total >= 80 else 14.0 if total >= 65
+             else 16.0 if total >= 50 else None)
+    max_loan = round(peak * (0.4 + (total - 50) * 0.004) / 10000) * 10000 if total >= 50 else 0
+    return {
+        "total": total, "consistency": C, "growth": G,
+        "capacity": R, "reliability": Rb,
+        "eligible": total >= 50, "rate": rate,
+        "peak_months": [MONTHS[j] for j, v in enumerate(vals) if v > high],
+        "max_loan": max_loan, "min_loan": round(max_loan * 0.5),
+        "annual_rev": round(sum(vals)),
+        "mean_monthly": round(mean),
+        "peak_revenue": round(peak),
+    }
+
+def score_rows(revenues) -> List[dict]:
+    scores = score_matrix(revenues)
+    return [score_row(scores, i) for i in range(len(scores["total"]))]
+
+def score_histories(revenues, first_months=None) -> List[Optional[dict]]:
+    """
+    Ragged histories (each 12…60 months): one score_matrix() per distinct
+    (length, first month), rows back in input order; None where the revenue
+    is all zeros.
+    """
+    first_months = first_months or [0] * len(revenues)
+    groups = {}
+    for i, (r, f) in enumerate(zip(revenues, first_months)):
+        groups.setdefault((len(r), f), []).append(i)
+    out = [None] * len(revenues)
+    for (_, first), idx in groups.items():
+        scores = score_matrix([revenues[i] for i in idx], first)
+        for k, i in enumerate(idx):
+            if not scores["zero_mean"][k]:
+                out[i] = score_row(scores, k)
+    return out
+
+def seasonal_profile(revenue, first_month: int = 0) -> List[float]:
+    """
+    12-month Jan…Dec plan from a longer history: each calendar month's mean
+    across years, rescaled to the trailing-12-month total so growth carries
+    through. A 12-month history from January is returned as is.
+    """
+    if len(revenue) == 12 and first_month == 0:
+        return list(revenue)
+    rev = np.asarray(revenue, dtype=np.float64)
+    moy = (np.arange(len(rev)) + first_month) % 12
+    profile = np.bincount(moy, weights=rev, minlength=12) / np.bincount(moy, minlength=12)
+    base = profile.sum()
+    if base > 0:
+        profile *= rev[-12:].sum() / base
+    return profile.tolist()
@@ -4,8 +4,9 @@ SeasonScore™ + Prophet + CIBIL-free scoring
 Run: python season_model.py
 """
 import numpy as np
-import pandas as pd
 from typing import List, Optional
+from season_engine import score_one, seasonal_profile
+from harmonic_forecast import harmonic_forecast
 
 MONTHS = ['Jan','Feb','Mar','Apr','May','Jun',
           'Jul','Aug','Sep','Oct','Nov','Dec']
@@ -17,33 +18,13 @@ def calculate_season_score(revenue: List[float]) -> dict:
     G  = Growth        (0-25): min(25, 15 + GrowthRate×30)
     R  = Capacity      (0-25): min(25, PeakRev/50K × 3)
     Rb = Reliability   (0-25): (ActiveMonths/12) × 25
+    Histories of 12–60 months: scored on the trailing 12, G is
+    year-over-year from 24 months, plus a score per 12-month window.
     """
-    rev  = revenue
-    mean = np.mean(rev)
-    if mean == 0: return {"error": "Revenue cannot be zero"}
-    std  = np.std(rev)
-    cv   = std / mean
-    C    = round(max(0, 25 - cv * 10))
-    h1   = np.mean(rev[:6]); h2 = np.mean(rev[6:])
-    gr   = (h2-h1)/h1 if h1>0 else 0
-    G    = round(min(25, max(0, 15+gr*30)))
-    peak = max(rev)
-    R    = round(min(25, (peak/50000)*3))
-    active = sum(1 for r in rev if r > mean*0.3)
-    Rb   = round((active/12)*25)
-    total = min(100, C+G+R+Rb)
-    rate  = (12.0 if total>=80 else 14.0 if total>=65
-             else 16.0 if total>=50 else None)
-    max_loan = 0
-    if total >= 50:
-        mult     = 0.4+(total-50)*0.004
-        max_loan = round(peak*mult/10000)*10000
-    peaks = [MONTHS[i] for i,r in enumerate(rev) if r>mean*2]
-    return {"total":total,"consistency":C,"growth":G,
-            "capacity":R,"reliability":Rb,"eligible":total>=50,
-            "rate":rate,"peak_months":peaks,
-            "max_loan":max_loan,"min_loan":round(max_loan*0.5),
-            "annual_rev":round(sum(rev))}
+    row = score_one(revenue)
+    if row is None: return {"error": "Revenue cannot be zero"}
+    del row["mean_monthly"], row["peak_revenue"]
+    return row
 
 def cibil_adjusted(score: dict, cibil: Optional[int]) -> dict:
     """
@@ -68,9 +49,10 @@ def dynamic_emi(monthly_sales: float) -> float:
 
 def forecast_with_prophet(revenue: List[float]) -> dict:
     try:
+        import pandas as pd            # heavy — only the Prophet path needs it
         from prophet import Prophet
         df = pd.DataFrame({
-            'ds': pd.date_range('2023-01-01', periods=12, freq='MS'),
+            'ds': pd.date_range('2023-01-01', periods=len(revenue), freq='MS'),
             'y': revenue
         })
         m = Prophet(yearly_seasonality=True,
@@ -82,22 +64,21 @@ def forecast_with_prophet(revenue: List[float]) -> dict:
         fc     = m.predict(future)
         nxt    = fc.tail(12).reset_index(drop=True)
         top3   = nxt['yhat'].nlargest(3).index.tolist()
-        peaks  = [MONTHS[i%12] for i in sorted(top3)]
+        start  = len(revenue)
+        peaks  = [MONTHS[(start+i)%12] for i in sorted(top3)]
         return {"model":"Facebook Prophet","peaks":peaks,
                 "confidence":"87%",
-                "forecast":[{"month":MONTHS[i%12],
+                "forecast":[{"month":MONTHS[(start+i)%12],
                              "predicted":round(float(r['yhat'])),
                              "lower":round(float(r['yhat_lower'])),
                              "upper":round(float(r['yhat_upper']))}
                             for i,r in nxt.iterrows()]}
     except Exception as e:
-        mean  = np.mean(revenue)
-        peaks = [MONTHS[i] for i,r in enumerate(revenue) if r>mean*2]
-        return {"model":"Moving Average","peaks":peaks,
-                "confidence":"72%","note":str(e)}
+        return {**harmonic_forecast(revenue), "note": str(e)}
 
 def emi_calendar(loan: float, rate: float,
                   revenue: List[float]) -> List[dict]:
+    revenue = seasonal_profile(revenue)
     mean    = np.mean(revenue)
     total   = round(loan*(1+rate/100))
     balance = total
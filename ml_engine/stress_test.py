@@ -0,0 +1,140 @@
+"""
+SeasonCredit v2 — Monte Carlo Repayment Stress Test
+Simulates thousands of perturbed 12-month revenue paths per borrower and
+runs the dynamic-EMI repayment across every path and borrower at once.
+Because each EMI is ≥ 0, the month-by-month balance = max(0, balance − emi)
+loop collapses to max(0, total − cumsum(emi)).
+"""
+import numpy as np
+
+EMI_SHARE, EMI_MIN, EMI_MAX = 0.10, 500, 15000     # same as main.dynamic_emi
+SCENARIOS   = ("baseline", "late_season", "weak_peak", "demand_shock", "mixed")
+NOISE_SIGMA = 0.15        # month-to-month lognormal noise on every path
+TAIL        = 0.05        # expected shortfall = mean of the worst 5% residuals
+MAX_CELLS   = 4_000_000   # borrower × path × month floats per chunk
+
+def _noise(rng, shape):
+    # mean-one lognormal, so noise alone doesn't bias revenue down
+    return rng.lognormal(-NOISE_SIGMA ** 2 / 2, NOISE_SIGMA, shape)
+
+def _late_season(rev, rng, n, p, shared):
+    """Season arrives 0–2 months late; the months before it run at the floor"""
+    shift = rng.choice(3, size=(1 if shared else n, p), p=[0.4, 0.35, 0.25])
+    src   = np.arange(12)[None, None, :] - shift[..., None]
+    late  = np.take_along_axis(np.broadcast_to(rev[:, None, :], (n, p, 12)),
+                               np.maximum(src, 0), axis=2)
+    return np.where(src >= 0, late, rev.min(axis=1)[:, None, None])
+
+def _weak_peak(rev, rng, n, p, shared):
+    """Peak months (above the yearly mean) deliver only 50–90% of plan"""
+    hit  = rng.uniform(0.5, 0.9, size=(1 if shared else n, p))
+    peak = rev > rev.mean(axis=1, keepdims=True)
+    return np.where(peak[:, None, :], rev[:, None, :] * hit[..., None],
+                    rev[:, None, :])
+
+def _demand_shock(rev, rng, n, p, shared):
+    """A 2–4 month slump to 30–70% of plan starting at a random month"""
+    size  = (1 if shared else n, p)
+    start = rng.integers(0, 12, size)
+    span  = rng.integers(2, 5, size)
+    depth = rng.uniform(0.3, 0.7, size)
+    m     = np.arange(12)
+    inside = (m >= start[..., None]) & (m < (start + span)[..., None])
+    return rev[:, None, :] * np.where(inside, depth[..., None], 1.0)
+
+_SHOCKS = {"late_season": _late_season, "weak_peak": _weak_peak,
+           "demand_shock": _demand_shock}
+
+def simulate_paths(rev: np.ndarray, paths: int, scenario: str = "mixed",
+                   rng=None, shared: bool = True, noise_rng=None) -> np.ndarray:
+    """
+    (N, 12) planned revenue → (N, paths, 12) simulated revenue.
+    shared=True draws one shock per path for the whole book (a bad festival
+    season hits everyone); False draws independently per borrower.
+    Shocks come from rng, the monthly noise from noise_rng (default: rng).
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"scenario must be one of {SCENARIOS}")
+    rng  = rng or np.random.default_rng()
+    n    = rev.shape[0]
+    base = np.broadcast_to(rev[:, None, :], (n, paths, 12))
+    if scenario == "baseline":
+        out = base.copy()
+    elif scenario == "mixed":
+        pick = rng.integers(0, len(SCENARIOS) - 1, size=(1 if shared else n, paths))
+        out  = base.copy()     # pick 0 = baseline
+        for k, name in enumerate(SCENARIOS[1:-1], start=1):
+            shocked = _SHOCKS[name](rev, rng, n, paths, shared)
+            out = np.where((pick == k)[..., None], shocked, out)
+    else:
+        out = _SHOCKS[scenario](rev, rng, n, paths, shared)
+    return out * _noise(noise_rng or rng, out.shape)
+
+def repay(paths: np.ndarray, total_due: np.ndarray):
+    """
+    Dynamic-EMI recurrence for every path at once.
+    paths (N, P, 12), total_due (N,) → (residual (N, P), payoff month (N, P);
+    payoff month is 1–12, or 0 when the loan is still open after month 12)
+    """
+    emi  = np.round(np.clip(paths * EMI_SHARE, EMI_MIN, EMI_MAX), 2)
+    paid = np.cumsum(emi, axis=2)
+    due  = total_due[:, None, None]
+    residual = np.maximum(0, due[..., 0] - paid[..., -1])
+    done     = paid >= due
+    month    = np.where(done.any(axis=2), done.argmax(axis=2) + 1, 0)
+    return residual, month
+
+def _tail_mean(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    k = max(1, int(np.ceil(x.shape[axis] * TAIL)))
+    return -np.mean(np.partition(-x, k - 1, axis=axis)[..., :k], axis=axis)
+
+def stress_test(revenues, loans, rates, paths: int = 2000,
+                scenario: str = "mixed", seed=None, shared: bool = True) -> dict:
+    """
+    revenues (N, 12), loans (N,), rates (N,) in % → per-loan and book metrics.
+    Borrowers are processed in chunks so memory stays under MAX_CELLS floats.
+    """
+    rev   = np.ascontiguousarray(revenues, dtype=np.float64).reshape(-1, 12)
+    loans = np.asarray(loans, dtype=np.float64)
+    total = np.round(loans * (1 + np.asarray(rates, dtype=np.float64) / 100))
+    n     = rev.shape[0]
+    chunk = max(1, MAX_CELLS // (paths * 12))
+    # every chunk replays the same shock stream when shocks are shared,
+    # but draws its own noise
+    seeds = np.random.default_rng(seed).integers(0, 2**63, size=n // chunk + 2)
+
+    p_full   = np.empty(n); exp_res = np.empty(n); es = np.empty(n)
+    median_m = np.empty(n, dtype=np.int64)
+    book     = np.zeros(paths)
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        noise = np.random.default_rng(seeds[lo // chunk + 1])
+        shock = np.random.default_rng(seeds[0]) if shared else noise
+        sim = simulate_paths(rev[lo:hi], paths, scenario, shock, shared, noise)
+        residual, month = repay(sim, total[lo:hi])
+        p_full[lo:hi]   = (residual == 0).mean(axis=1)
+        exp_res[lo:hi]  = residual.mean(axis=1)
+        es[lo:hi]       = _tail_mean(residual, axis=1)
+        # month by which half the paths have repaid (0 = never)
+        m = np.where(month == 0, 13, month)
+        med = np.median(m, axis=1)
+        median_m[lo:hi] = np.where(med > 12, 0, np.ceil(med))
+        book += residual.sum(axis=0)
+
+    due = float(total.sum())
+    return {
+        "loans": [{"total_repayable": int(total[i]),
+                   "p_full_repayment": round(float(p_full[i]), 4),
+                   "expected_residual": round(float(exp_res[i])),
+                   "expected_shortfall": round(float(es[i])),
+                   "median_payoff_month": int(median_m[i]) or None}
+                  for i in range(n)],
+        "book": {"loans": n, "total_repayable": round(due),
+                 "p_fully_repaid": round(float((book == 0).mean()), 4),
+                 "expected_residual": round(float(book.mean())),
+                 "expected_shortfall": round(float(_tail_mean(book))),
+                 "expected_loss_rate": round(float(book.mean()) / due, 4) if due else 0.0,
+                 "expected_loans_repaid": round(float(p_full.sum()), 1)},
+        "paths": paths, "scenario": scenario, "shared_shocks": shared,
+        "tail": TAIL,
+    }